@@ -19,6 +19,8 @@ from PyQt5.QtCore import QObject, pyqtSignal
 from . import money
 from .wallet import Wallet
 from .community import Community
+from .net.connector import create_session
+from .txhistory import BlocksScanner
 from .registry import LocalState
 from ..tools.exceptions import ContactAlreadyExists, LookupFailureError
 from .. import __version__
@@ -36,7 +38,7 @@ class Account(QObject):
     certification_accepted = pyqtSignal()
     contacts_changed = pyqtSignal()
 
-    def __init__(self, salt, pubkey, name, communities, wallets, contacts, identities_registry):
+    def __init__(self, salt, pubkey, name, communities, wallets, contacts, identities_registry, session=None):
         """
         Create an account
 
@@ -49,6 +51,7 @@ class Account(QObject):
         :param list of sakia.core.Wallet wallets: Wallet objects owned by this account
         :param list of dict contacts: Contacts of this account
         :param sakia.core.registry.IdentitiesRegistry: The identities registry intance
+        :param aiohttp.ClientSession session: The client session shared by the communities
 
         .. warnings:: The class methods create and load should be used to create an account
         """
@@ -61,6 +64,7 @@ class Account(QObject):
         self.contacts = contacts
         self._identities_registry = identities_registry
         self._current_ref = 0
+        self._session = session
 
         self.notifications = {'membership_expire_soon':
                                   [
@@ -123,13 +127,14 @@ class Account(QObject):
         for data in json_data['wallets']:
             wallets.append(Wallet.load(data, identities_registry))
 
+        session = create_session()
         communities = []
         for data in json_data['communities']:
-            community = Community.load(data, file_version)
+            community = Community.load(data, file_version, session)
             communities.append(community)
 
         account = cls(salt, pubkey, name, communities, wallets,
-                      contacts, identities_registry)
+                      contacts, identities_registry, session)
         return account
 
     def __eq__(self, other):
@@ -169,6 +174,18 @@ class Account(QObject):
         self.contacts.remove(contact)
         self.contacts_changed.emit()
 
+    @property
+    def session(self):
+        """
+        Get the client session shared by the communities of the account.
+        Its connector pools the connections to the nodes.
+
+        :rtype: aiohttp.ClientSession
+        """
+        if self._session is None:
+            self._session = create_session()
+        return self._session
+
     def add_community(self, community):
         """
         Add a community to the account
@@ -211,11 +228,13 @@ class Account(QObject):
                     w.refresh_progressed.disconnect(progressing)
                     w.refresh_finished.disconnect(wallet_finished)
 
+        # The blocks are scanned once for all the wallets
+        scanner = BlocksScanner(community, [w.pubkey for w in self.wallets])
         for w in self.wallets:
             w.refresh_progressed.connect(progressing)
             w.refresh_finished.connect(wallet_finished)
             w.init_cache(app, community)
-            w.refresh_transactions(community, received_list)
+            w.refresh_transactions(community, received_list, scanner)
 
     def rollback_transaction(self, app, community):
         """
@@ -250,11 +269,13 @@ class Account(QObject):
                     w.refresh_progressed.disconnect(progressing)
                     w.refresh_finished.disconnect(wallet_finished)
 
+        # The blocks are scanned once for all the wallets
+        scanner = BlocksScanner(community, [w.pubkey for w in self.wallets])
         for w in self.wallets:
             w.refresh_progressed.connect(progressing)
             w.refresh_finished.connect(wallet_finished)
             w.init_cache(app, community)
-            w.rollback_transactions(community, received_list)
+            w.rollback_transactions(community, received_list, scanner)
 
     def set_display_referential(self, index):
         self._current_ref = index
@@ -605,6 +626,10 @@ class Account(QObject):
         logging.debug("Stop wallets coroutines")
         for w in self.wallets:
             w.stop_coroutines(closing)
+
+        if closing and self._session is not None:
+            logging.debug("Closing client session")
+            await self._session.close()
         logging.debug("Account coroutines stopped")
 
     def jsonify(self):
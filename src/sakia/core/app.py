@@ -12,6 +12,7 @@ import json
 import datetime
 import aiohttp
 import asyncio
+import time
 from pkg_resources import parse_version
 
 from PyQt5.QtCore import QObject, pyqtSignal, QTranslator, QCoreApplication, QLocale
@@ -39,6 +40,7 @@ class Application(QObject):
     refresh_transfers = pyqtSignal()
     account_imported = pyqtSignal(str)
     account_changed = pyqtSignal()
+    cache_loading_progressed = pyqtSignal(int, int)
 
     def __init__(self, qapp, loop, identities_registry):
         """
@@ -53,6 +55,9 @@ class Application(QObject):
         self.qapp = qapp
         self.accounts = {}
         self._current_account = None
+        # The accounts whose caches are not loaded, with their communities whose cache is not loaded
+        self._unloaded_caches = {}
+        self._cache_loading = None
         self.loop = loop
         self.available_version = (True,
                                   __version__,
@@ -72,11 +77,13 @@ class Application(QObject):
                             'proxy_port': 8080,
                             'international_system_of_units': True,
                             'auto_refresh': False,
-                            'forgetfulness':False
+                            'forgetfulness':False,
+                            'lazy_loading': True
                             }
 
     @classmethod
     def startup(cls, argv, qapp, loop):
+        start = time.time()
         config.parse_arguments(argv)
         identities_registry = IdentitiesRegistry()
         app = cls(qapp, loop, identities_registry)
@@ -84,8 +91,12 @@ class Application(QObject):
         app.switch_language()
         app.set_proxy()
         app.get_last_version()
+        loaded = time.time()
         if app.preferences["account"] != "":
             account = app.get_account(app.preferences["account"])
+            logging.debug("Startup timing : application {0:.3f}s, account properties {1:.3f}s".format(
+                loaded - start, time.time() - loaded))
+            # the caches loading is timed by change_current_account
             app.change_current_account(account)
         # no default account...
         else:
@@ -136,7 +147,7 @@ class Application(QObject):
         :return: The loaded account if it's a success, else return None
         """
         if name in self.accounts.keys():
-            self.load_account(name)
+            self.load_account(name, self.preferences['lazy_loading'])
             return self.accounts[name]
         else:
             return None
@@ -184,18 +195,39 @@ class Application(QObject):
     async def change_current_account(self, account):
         """
         Change current account displayed and refresh its cache.
+        The account is displayed at once, and its caches are loaded in background
+        before starting its coroutines.
 
         :param sakia.core.Account account: The account object to display
-        .. note:: Emits the application pyqtSignal loading_progressed
-        during cache refresh
+        .. note:: Emits the application pyqtSignal cache_loading_progressed
+        during cache loading
         """
+        start = time.time()
+        if self._cache_loading is not None:
+            self._cache_loading.cancel()
+            self._cache_loading = None
         if self._current_account is not None:
             await self.stop_current_account()
 
         self._current_account = account
-        if self._current_account is not None:
-            self._current_account.start_coroutines()
         self.account_changed.emit()
+        if account is not None:
+            if account in self._unloaded_caches:
+                self._cache_loading = asyncio.ensure_future(self.start_account_async(account, start))
+            else:
+                account.start_coroutines()
+                logging.debug("Account {0} changed in {1:.3f}s".format(account.name, time.time() - start))
+
+    async def start_account_async(self, account, start):
+        """
+        Load the caches of an account in background, then start its coroutines
+
+        :param sakia.core.Account account: The account object
+        :param float start: The time of the account change
+        """
+        await self.load_cache_async(account)
+        account.start_coroutines()
+        logging.debug("Account {0} changed in {1:.3f}s".format(account.name, time.time() - start))
 
     async def stop_current_account(self, closing=False):
         """
@@ -239,18 +271,24 @@ class Application(QObject):
         except FileNotFoundError:
             pass
 
-    def load_account(self, account_name):
+    def load_account(self, account_name, lazy=False):
         """
         Load an account from its name
 
         :param str account_name: The account name
+        :param bool lazy: True to load the caches of the account later, with load_cache_async
         """
+        start = time.time()
         account_path = os.path.join(config.parameters['home'],
                                     account_name, 'properties')
         with open(account_path, 'r') as json_data:
             data = json.load(json_data)
             account = Account.load(data, self._identities_registry)
-            self.load_cache(account)
+            logging.debug("Account {0} properties loaded in {1:.3f}s".format(account_name, time.time() - start))
+            if lazy:
+                self._unloaded_caches[account] = set(account.communities)
+            else:
+                self.load_cache(account)
             self.accounts[account_name] = account
 
             for community in account.communities:
@@ -280,34 +318,120 @@ class Application(QObject):
 
         :param account: The account object to load the cache
         """
+        start = time.time()
         for community in account.communities:
-            bma_path = os.path.join(config.parameters['home'],
-                                        account.name, '__cache__',
-                                        community.currency + '_bma')
+            self.load_community_cache(account, community)
+        for wallet in account.wallets:
+            self.load_wallet_cache(account, wallet)
+        self._unloaded_caches.pop(account, None)
+        logging.debug("Account {0} caches loaded in {1:.3f}s".format(account.name, time.time() - start))
 
-            network_path = os.path.join(config.parameters['home'],
-                                        account.name, '__cache__',
-                                        community.currency + '_network')
+    async def load_cache_async(self, account):
+        """
+        Load an account cache step by step, letting the event loop
+        process the events of the user interface between the steps.
+        The caches of the communities already used are not loaded again.
 
-            if os.path.exists(network_path):
-                with open(network_path, 'r') as json_data:
-                    data = json.load(json_data)
-                    community.network.merge_with_json(data['network'], parse_version(data['version']))
+        :param account: The account object to load the cache
+        .. note:: Emits the application pyqtSignal cache_loading_progressed
+        after each community and each wallet
+        """
+        start = time.time()
+        steps = len(account.communities) + len(account.wallets)
+        self.cache_loading_progressed.emit(0, steps)
+        for i, community in enumerate(account.communities):
+            await asyncio.sleep(0)
+            self.require_community_cache(account, community)
+            self.cache_loading_progressed.emit(i + 1, steps)
+        for i, wallet in enumerate(account.wallets):
+            await asyncio.sleep(0)
+            self.load_wallet_cache(account, wallet)
+            self.cache_loading_progressed.emit(len(account.communities) + i + 1, steps)
+        self._unloaded_caches.pop(account, None)
+        logging.debug("Account {0} caches loaded in background in {1:.3f}s".format(account.name,
+                                                                                  time.time() - start))
+
+    def require_community_cache(self, account, community):
+        """
+        Load the cache of a community the first time it is used,
+        when the caches of its account are loaded in background
+
+        :param account: The account object
+        :param community: The community object
+        """
+        unloaded = self._unloaded_caches.get(account, set())
+        if community in unloaded:
+            unloaded.remove(community)
+            self.load_community_cache(account, community)
+
+    def load_community_cache(self, account, community):
+        """
+        Load the cache of a community of an account
+
+        :param account: The account object
+        :param community: The community object to load the cache
+        """
+        start = time.time()
+        bma_path = os.path.join(config.parameters['home'],
+                                    account.name, '__cache__',
+                                    community.currency + '_bma')
+
+        network_path = os.path.join(config.parameters['home'],
+                                    account.name, '__cache__',
+                                    community.currency + '_network')
+
+        store_path = os.path.join(config.parameters['home'],
+                                    account.name, '__cache__',
+                                    community.currency + '_cache')
+        community.bma_access.open_cache_store(store_path)
+        cache_store = community.bma_access.cache_store
+
+        # The json files of previous versions are migrated once to the cache store
+        if os.path.exists(network_path):
+            with open(network_path, 'r') as json_data:
+                data = json.load(json_data)
+                cache_store.set_state('network', data)
+            cache_store.commit()
+            os.remove(network_path)
 
-            if os.path.exists(bma_path):
-                with open(bma_path, 'r') as json_data:
-                    data = json.load(json_data)
-                    community.bma_access.load_from_json(data['cache'])
+        if os.path.exists(bma_path):
+            with open(bma_path, 'r') as json_data:
+                data = json.load(json_data)
+                community.bma_access.load_from_json(data['cache'])
+            community.bma_access.save_cache_store()
+            os.remove(bma_path)
 
-        for wallet in account.wallets:
-            for c in account.communities:
-                wallet.init_cache(self, c)
-            wallet_path = os.path.join(config.parameters['home'],
-                                        account.name, '__cache__', wallet.pubkey + "_wal")
-            if os.path.exists(wallet_path):
-                with open(wallet_path, 'r') as json_data:
-                    data = json.load(json_data)
-                    wallet.load_caches(self, data)
+        data = cache_store.state('network')
+        if data:
+            community.network.merge_with_json(data['network'], parse_version(data['version']))
+
+        data = cache_store.state('dividends')
+        if data:
+            community.dividends.load_json(data)
+
+        blocks_path = os.path.join(config.parameters['home'],
+                                    account.name, '__cache__',
+                                    community.currency + '_blocks')
+        community.bma_access.open_blocks_store(blocks_path)
+        logging.debug("Community {0} cache loaded in {1:.3f}s".format(community.currency, time.time() - start))
+
+    def load_wallet_cache(self, account, wallet):
+        """
+        Load the cache of a wallet of an account
+
+        :param account: The account object
+        :param wallet: The wallet object to load the cache
+        """
+        start = time.time()
+        for c in account.communities:
+            wallet.init_cache(self, c)
+        wallet_path = os.path.join(config.parameters['home'],
+                                    account.name, '__cache__', wallet.pubkey + "_wal")
+        if os.path.exists(wallet_path):
+            with open(wallet_path, 'r') as json_data:
+                data = json.load(json_data)
+                wallet.load_caches(self, data)
+        logging.debug("Wallet {0} cache loaded in {1:.3f}s".format(wallet.name, time.time() - start))
 
     def load_preferences(self):
         """
@@ -415,6 +539,9 @@ class Application(QObject):
 
         :param account: The account object to save the cache
         """
+        if account in self._unloaded_caches:
+            logging.debug("Caches of account {0} not loaded, nothing to save".format(account.name))
+            return
         if not os.path.exists(os.path.join(config.parameters['home'],
                                         account.name, '__cache__')):
             os.makedirs(os.path.join(config.parameters['home'],
@@ -423,31 +550,21 @@ class Application(QObject):
             self.save_wallet(account, wallet)
 
         for community in account.communities:
-            bma_path = os.path.join(config.parameters['home'],
-                                        account.name, '__cache__',
-                                        community.currency + '_bma')
-
-            network_path = os.path.join(config.parameters['home'],
-                                        account.name, '__cache__',
-                                        community.currency + '_network')
-            buffer_path = network_path + ".buf"
-
-            with open(buffer_path, 'w') as outfile:
-                data = dict()
-                data['network'] = community.network.jsonify()
-                data['version'] = __version__
-                for chunk in json.JSONEncoder().iterencode(data):
-                    outfile.write(chunk)
-            shutil.move(buffer_path, network_path)
-
-            buffer_path = bma_path + ".buf"
-
-            with open(buffer_path, 'w') as outfile:
-                data['cache'] = community.bma_access.jsonify()
-                data['version'] = __version__
-                for chunk in json.JSONEncoder().iterencode(data):
-                    outfile.write(chunk)
-            shutil.move(buffer_path, bma_path)
+            if community.bma_access.cache_store is None:
+                store_path = os.path.join(config.parameters['home'],
+                                            account.name, '__cache__',
+                                            community.currency + '_cache')
+                community.bma_access.open_cache_store(store_path)
+
+            data = dict()
+            data['network'] = community.network.jsonify()
+            data['version'] = __version__
+            community.bma_access.cache_store.set_state('network', data)
+            community.bma_access.cache_store.set_state('dividends', community.dividends.jsonify())
+            community.bma_access.save_cache_store()
+
+            if community.bma_access.blocks_store is not None:
+                community.bma_access.blocks_store.flush()
 
     def import_account(self, file, name):
         """
@@ -511,6 +628,8 @@ class Application(QObject):
         return data
 
     async def stop(self):
+        if self._cache_loading is not None:
+            self._cache_loading.cancel()
         if self._current_account:
             await self.stop_current_account(closing=True)
         await asyncio.sleep(0)
@@ -7,6 +7,8 @@ Created on 1 févr. 2014
 import logging
 import re
 import math
+import asyncio
+from collections import OrderedDict
 
 from PyQt5.QtCore import QObject
 
@@ -14,6 +16,15 @@ from ..tools.exceptions import NoPeerAvailable
 from .net.network import Network
 from duniterpy.api import bma, errors
 from .net.api.bma.access import BmaAccess
+from .registry.members_index import MembersIndex
+from .dividends import DividendsSeries
+
+# Maximum number of blocks times kept in the index of a community
+MAX_BLOCKS_TIMES = 10000
+# Maximum number of blocks requested at once to get their times
+MAX_PARALLEL_TIMES = 5
+# Maximum number of blocks with universal dividend requested at once
+MAX_PARALLEL_DIVIDENDS = 5
 
 
 class Community(QObject):
@@ -38,6 +49,16 @@ class Community(QObject):
         self.currency = currency
         self._network = network
         self._bma_access = bma_access
+        self._blocks_times = OrderedDict()
+        self._members_index = MembersIndex()
+        self._members_index_block = None
+        self._members_index_task = None
+        self._dividends = DividendsSeries()
+        self._dividends_synced = False
+        self._dividends_sync = None
+        self._dividends_block = None
+        self._dividends_add = None
+        self._network.new_block_mined.connect(self.handle_new_block)
 
     @classmethod
     def create(cls, node):
@@ -53,15 +74,16 @@ class Community(QObject):
         return community
 
     @classmethod
-    def load(cls, json_data, file_version):
+    def load(cls, json_data, file_version, session=None):
         """
         Load a community from json
 
         :param dict json_data: The community as a dict in json format
         :param NormalizedVersion file_version: the file sakia version
+        :param aiohttp.ClientSession session: The client session shared with the other communities
         """
         currency = json_data['currency']
-        network = Network.from_json(currency, json_data['peers'], file_version)
+        network = Network.from_json(currency, json_data['peers'], file_version, session)
         bma_access = BmaAccess.create(network)
         community = cls(currency, network, bma_access)
         return community
@@ -113,6 +135,16 @@ class Community(QObject):
         :return: The last UD or 1 if no UD was generated.
         """
         block = await self.get_ud_block(block_number=block_number)
+        return Community.block_dividend(block)
+
+    @staticmethod
+    def block_dividend(block):
+        """
+        Get the universal dividend of a block with universal dividend
+
+        :param dict block: The block, or None if no UD was generated
+        :return: The UD or 1 if no UD was generated.
+        """
         if block:
             return block['dividend'] * math.pow(10, block['unitbase'])
         else:
@@ -142,6 +174,71 @@ class Community(QObject):
         else:
             return 1
 
+    @property
+    def dividends(self):
+        """
+        The series of the blocks with universal dividend
+        :rtype: sakia.core.dividends.DividendsSeries
+        """
+        return self._dividends
+
+    async def sync_dividends(self):
+        """
+        Synchronize the series of the blocks with universal dividend with the network.
+        It is done once, then the series is updated from the new blocks.
+        The new blocks being added are awaited.
+        """
+        if self._dividends_add is not None and not self._dividends_add.done():
+            await asyncio.shield(self._dividends_add)
+        if self._dividends_synced:
+            return
+        if self._dividends_sync is None or self._dividends_sync.done():
+            self._dividends_sync = asyncio.ensure_future(self._sync_dividends())
+        await asyncio.shield(self._dividends_sync)
+
+    async def _sync_dividends(self):
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_DIVIDENDS)
+
+        async def add_block(number):
+            async with semaphore:
+                block = await self.bma_access.future_request(bma.blockchain.Block,
+                                                             req_args={'number': number})
+                self._dividends.add(block)
+
+        try:
+            block_number = self.network.current_blockUID.number
+            udblocks = await self.bma_access.future_request(bma.blockchain.UD)
+            missing = self._dividends.sync(udblocks['result']['blocks'])
+            await asyncio.gather(*[add_block(n) for n in missing])
+            self._dividends_synced = True
+            self._dividends_block = block_number
+            logging.debug("{0} blocks with universal dividend, {1} requested".format(len(self._dividends),
+                                                                                    len(missing)))
+        except errors.DuniterError as e:
+            logging.debug(str(e))
+        except NoPeerAvailable as e:
+            logging.debug(str(e))
+
+    async def _add_dividend_block(self, block_number, previous=None):
+        """
+        Add a new block to the series of the blocks with universal dividend if it has one
+        :param int block_number: The number of the new block
+        :param asyncio.Task previous: The task adding the previous block, if it is still running
+        """
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            block = await self.bma_access.future_request(bma.blockchain.Block,
+                                                         req_args={'number': block_number})
+            if block['dividend']:
+                self._dividends.add(block)
+        except errors.DuniterError as e:
+            logging.debug(str(e))
+            self._dividends_synced = False
+        except NoPeerAvailable as e:
+            logging.debug(str(e))
+            self._dividends_synced = False
+
     async def get_ud_block(self, x=0, block_number=None):
         """
         Get a block with universal dividend
@@ -150,30 +247,22 @@ class Community(QObject):
 
         :param int x: Get the 'x' older block with UD in it
         :param int block_number: Get the latest dividend before this block number
-        :return: The last block with universal dividend.
+        :return: The last block with universal dividend, with the fields of DividendsSeries.FIELDS
         :rtype: dict
         """
-        try:
-            udblocks = await self.bma_access.future_request(bma.blockchain.UD)
-            blocks = udblocks['result']['blocks']
-            if block_number:
-                blocks = [b for b in blocks if b <= block_number]
-            if len(blocks) > 0:
-                index = len(blocks) - (1+x)
-                if index < 0:
-                    index = 0
-                block_number = blocks[index]
-                block = await self.bma_access.future_request(bma.blockchain.Block,
-                                     req_args={'number': block_number})
-                return block
-            else:
-                return None
-        except errors.DuniterError as e:
-            logging.debug(str(e))
-            return None
-        except NoPeerAvailable as e:
-            logging.debug(str(e))
-            return None
+        await self.sync_dividends()
+        return self._dividends.block(x, block_number)
+
+    async def ud_blocks(self, block_numbers):
+        """
+        Get the latest blocks with universal dividend before several blocks.
+
+        :param list block_numbers: The blocks numbers, None to get the last block with universal dividend
+        :return: The blocks with universal dividend by block number, None if no UD was generated before a block
+        :rtype: dict
+        """
+        await self.sync_dividends()
+        return {n: self._dividends.block(0, n) for n in block_numbers}
 
     async def monetary_mass(self):
         """
@@ -220,8 +309,14 @@ class Community(QObject):
             # Get cached block by block number
             if block_number is None:
                 block_number = self.network.current_blockUID.number
+            if block_number in self._blocks_times:
+                self._blocks_times.move_to_end(block_number)
+                return self._blocks_times[block_number]
             block = await self.bma_access.future_request(bma.blockchain.Block,
                                  req_args={'number': block_number})
+            self._blocks_times[block_number] = block['medianTime']
+            if len(self._blocks_times) > MAX_BLOCKS_TIMES:
+                self._blocks_times.popitem(last=False)
             return block['medianTime']
         except errors.DuniterError as e:
             logging.debug(str(e))
@@ -230,6 +325,27 @@ class Community(QObject):
             logging.debug(str(e))
             return 0
 
+    async def times(self, block_numbers):
+        """
+        Get the blockchain time of several blocks.
+        Each unknown block is requested once, with a bounded concurrency.
+
+        :param list block_numbers: The blocks numbers
+        :return: The blockchain time by block number, 0 if it could not be found
+        :rtype: dict
+        """
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_TIMES)
+
+        async def block_time(number):
+            async with semaphore:
+                return number, await self.time(number)
+
+        missing = set([n for n in block_numbers if n not in self._blocks_times])
+        times = {n: self._blocks_times[n] for n in block_numbers if n not in missing}
+        if missing:
+            times.update(await asyncio.gather(*[block_time(n) for n in missing]))
+        return times
+
     @property
     def network(self):
         """
@@ -262,9 +378,8 @@ class Community(QObject):
 
         :param int cert_time: the timestamp of the certification
         """
-        parameters = await self.parameters()
-        blockchain_time = await self.time()
-        return blockchain_time - cert_time > parameters['sigValidity']
+        validity = await self.certifications_validity([cert_time])
+        return validity[0][0]
 
     async def certification_writable(self, cert_time):
         """
@@ -272,9 +387,24 @@ class Community(QObject):
 
         :param int cert_time: the timestamp of the certification
         """
+        validity = await self.certifications_validity([cert_time])
+        return validity[0][1]
+
+    async def certifications_validity(self, cert_times):
+        """
+        Evaluate the validity of a list of certifications at once.
+        The parameters and the blockchain time are requested only once.
+
+        :param list cert_times: the timestamps of the certifications
+        :return: a (expired, writable) tuple for each certification
+        :rtype: list
+        """
         parameters = await self.parameters()
         blockchain_time = await self.time()
-        return blockchain_time - cert_time < parameters['sigWindow'] * parameters['avgGenTime']
+        sig_validity = parameters['sigValidity']
+        sig_window = parameters['sigWindow'] * parameters['avgGenTime']
+        return [(blockchain_time - t > sig_validity, blockchain_time - t < sig_window)
+                for t in cert_times]
 
     def add_node(self, node):
         """
@@ -317,13 +447,91 @@ class Community(QObject):
         memberships = await self.bma_access.future_request(bma.wot.Members)
         return [m['pubkey'] for m in memberships["results"]]
 
+    @property
+    def members_index(self):
+        """
+        The local index of the members uids and pubkeys
+        :rtype: sakia.core.registry.MembersIndex
+        """
+        return self._members_index
+
+    async def refresh_members_index(self):
+        """
+        Update the index of the members from the list of the members of the community
+        """
+        try:
+            block_number = self.network.current_blockUID.number
+            memberships = await self.bma_access.future_request(bma.wot.Members)
+            added, removed = self._members_index.update(memberships['results'])
+            self._members_index_block = block_number
+            logging.debug("Members index of {0} : {1} added, {2} removed".format(self.currency, added, removed))
+        except errors.DuniterError as e:
+            logging.debug(str(e))
+        except NoPeerAvailable as e:
+            logging.debug(str(e))
+
+    def handle_new_block(self, block_number):
+        """
+        Update the series of the blocks with universal dividend, and
+        refresh the members index in the background once it was loaded
+        :param int block_number: The number of the block mined
+        """
+        if self._dividends_synced:
+            if self._dividends_block is not None and block_number == self._dividends_block + 1:
+                previous = self._dividends_add if self._dividends_add is not None \
+                                                  and not self._dividends_add.done() else None
+                self._dividends_add = asyncio.ensure_future(self._add_dividend_block(block_number, previous))
+            elif self._dividends_block != block_number:
+                # some blocks were missed : the series is synchronized on the next request
+                self._dividends_synced = False
+            self._dividends_block = block_number
+        if self._members_index_block is not None and self._members_index_block != block_number \
+                and (self._members_index_task is None or self._members_index_task.done()):
+            self._members_index_task = asyncio.ensure_future(self.refresh_members_index())
+
+    async def search_members(self, text):
+        """
+        Search the members whose uid or pubkey contains a text in the local members index.
+        The index is loaded on the first search, then refreshed on each new block.
+
+        :param str text: The searched text
+        :return: The (pubkey, uid) of the matching members
+        :rtype: list
+        """
+        if self._members_index_block is None:
+            await self.refresh_members_index()
+        return self._members_index.search(text)
+
+    async def lookup_non_members(self, text):
+        """
+        Look up the identities whose uid or pubkey contains a text on the network,
+        except the members of the local members index, found by search_members.
+
+        :param str text: The searched text
+        :return: The results of the lookup which are not members
+        :rtype: list
+        :raises NoPeerAvailable: if no node answered the lookup
+        """
+        try:
+            response = await self.bma_access.future_request(bma.wot.Lookup, {'search': text}, hedged=True)
+            return [r for r in response['results'] if r['pubkey'] not in self._members_index]
+        except errors.DuniterError as e:
+            if e.ucode != errors.NO_MATCHING_IDENTITY:
+                logging.debug(str(e))
+        return []
+
     def start_coroutines(self):
         self.network.start_coroutines()
 
     async def stop_coroutines(self, closing=False):
         await self.network.stop_coroutines(closing)
+        if closing:
+            self._bma_access.close_blocks_store()
+            self._bma_access.close_cache_store()
 
     def rollback_cache(self):
+        self._blocks_times.clear()
+        self._dividends_synced = False
         self._bma_access.rollback()
 
     def jsonify(self):
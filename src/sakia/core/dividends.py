@@ -0,0 +1,103 @@
+import bisect
+
+
+class DividendsSeries:
+    """
+    The blocks with universal dividend of a community, ordered by block number.
+    Only the fields used to compute the dividends and the referentials are kept.
+    """
+    FIELDS = ('number', 'medianTime', 'dividend', 'unitbase', 'monetaryMass', 'membersCount')
+
+    def __init__(self):
+        self._numbers = []
+        self._values = []
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, number):
+        index = bisect.bisect_left(self._numbers, number)
+        return index < len(self._numbers) and self._numbers[index] == number
+
+    @property
+    def numbers(self):
+        """
+        The numbers of the blocks with universal dividend
+        :rtype: list
+        """
+        return list(self._numbers)
+
+    def add(self, block):
+        """
+        Add a block with universal dividend
+
+        :param dict block: The block data
+        """
+        value = tuple([block[f] for f in DividendsSeries.FIELDS])
+        index = bisect.bisect_left(self._numbers, block['number'])
+        if index < len(self._numbers) and self._numbers[index] == block['number']:
+            self._values[index] = value
+        else:
+            self._numbers.insert(index, block['number'])
+            self._values.insert(index, value)
+
+    def remove(self, number):
+        """
+        Remove a block with universal dividend
+
+        :param int number: The block number
+        """
+        index = bisect.bisect_left(self._numbers, number)
+        if index < len(self._numbers) and self._numbers[index] == number:
+            del self._numbers[index]
+            del self._values[index]
+
+    def sync(self, numbers):
+        """
+        Synchronize the series with the list of the blocks with universal dividend of the network.
+        The blocks which are not in the list are removed.
+
+        :param list numbers: The numbers of the blocks with universal dividend
+        :return: The numbers of the blocks missing in the series
+        :rtype: list
+        """
+        known = set(numbers)
+        for number in [n for n in self._numbers if n not in known]:
+            self.remove(number)
+        return [n for n in numbers if n not in self]
+
+    def block(self, x=0, block_number=None):
+        """
+        Get a block with universal dividend.
+        If x and block_number are passed,
+        it returns the 'x' older block with UD in it BEFORE block_number
+
+        :param int x: Get the 'x' older block with UD in it
+        :param int block_number: Get the latest dividend before this block number
+        :return: The block data, or None if no UD was generated before the block
+        :rtype: dict
+        """
+        if block_number:
+            count = bisect.bisect_right(self._numbers, block_number)
+        else:
+            count = len(self._numbers)
+        if count == 0:
+            return None
+        index = max(0, count - (1 + x))
+        return dict(zip(DividendsSeries.FIELDS, self._values[index]))
+
+    def jsonify(self):
+        return {'fields': list(DividendsSeries.FIELDS),
+                'blocks': [list(v) for v in self._values]}
+
+    def load_json(self, json_data):
+        """
+        Load the series from json data
+
+        :param dict json_data: The series in json format
+        """
+        self._numbers = []
+        self._values = []
+        if json_data.get('fields') == list(DividendsSeries.FIELDS):
+            for value in json_data['blocks']:
+                self.add(dict(zip(DividendsSeries.FIELDS, value)))
@@ -1,10 +1,16 @@
 import logging
 import networkx
 import asyncio
+import time
 from PyQt5.QtCore import pyqtSignal
 from .base_graph import BaseGraph
 from ..graph.constants import EdgeStatus, NodeStatus
 
+# Maximum number of identities explored concurrently
+MAX_PARALLEL_EXPLORATIONS = 5
+# Minimum delay between two graph changes signals during an exploration, in seconds
+GRAPH_CHANGED_DELAY = 0.5
+
 
 class ExplorerGraph(BaseGraph):
 
@@ -23,6 +29,7 @@ class ExplorerGraph(BaseGraph):
         self.exploration_task = None
         self.explored_identity = None
         self.steps = 0
+        self._graph_changed_time = 0
 
     def start_exploration(self, identity, steps):
         """
@@ -48,59 +55,78 @@ class ExplorerGraph(BaseGraph):
             self.exploration_task.cancel()
             self.exploration_task = None
 
+    def _notify_graph_changed(self):
+        """
+        Emit graph_changed, at most once every GRAPH_CHANGED_DELAY
+        """
+        now = time.time()
+        if now - self._graph_changed_time >= GRAPH_CHANGED_DELAY:
+            self._graph_changed_time = now
+            self.graph_changed.emit()
+
+    async def _explore_identity(self, current_identity, account_identity, nb_members):
+        """
+        Add the certifiers and the certified of an identity to the graph
+        :param sakia.core.registry.Identity current_identity: The explored identity
+        :param sakia.core.registry.Identity account_identity: The identity source of exploration
+        :param int nb_members: The number of members of the community
+        :return: The certifications of the identity
+        :rtype: list
+        """
+        self.current_identity_changed.emit(current_identity.pubkey)
+        self.add_identity(current_identity, NodeStatus.NEUTRAL)
+        self.nx_graph.node[current_identity.pubkey]['is_sentry'] = False
+        logging.debug("New identity explored : {pubkey}".format(pubkey=current_identity.pubkey[:5]))
+
+        certifier_list = await current_identity.unique_valid_certifiers_of(self.app.identities_registry,
+                                                                           self.community)
+        await self.add_certifier_list(certifier_list, current_identity, account_identity)
+        logging.debug("New identity certifiers : {pubkey}".format(pubkey=current_identity.pubkey[:5]))
+
+        is_sentry = self.is_sentry(len(certifier_list), nb_members)
+        self.nx_graph.node[current_identity.pubkey]['is_sentry'] = is_sentry
+
+        certified_list = await current_identity.unique_valid_certified_by(self.app.identities_registry,
+                                                                          self.community)
+        await self.add_certified_list(certified_list, current_identity, account_identity)
+        logging.debug("New identity certified : {pubkey}".format(pubkey=current_identity.pubkey[:5]))
+        self._notify_graph_changed()
+        return certified_list + certifier_list
+
     async def _explore(self, identity, steps):
         """
-        Scan graph recursively
+        Scan graph breadth first. The identities of each step are explored concurrently.
         :param sakia.core.registry.Identity identity:   identity instance from where we start
         :param int steps: The number of steps from given identity to explore
-        :return: False when the identity is added in the graph
         """
-        # functions keywords args are persistent... Need to reset it with None trick
         logging.debug("search %s in " % identity.uid)
 
-        explored = []
-        explorable = {0: [identity]}
-        current_identity = identity
         self.nx_graph.clear()
-        self.add_identity(current_identity, NodeStatus.HIGHLIGHTED)
-        self.nx_graph.node[current_identity.pubkey]['is_sentry'] = False
+        self.add_identity(identity, NodeStatus.HIGHLIGHTED)
+        self.nx_graph.node[identity.pubkey]['is_sentry'] = False
+        self._graph_changed_time = time.time()
         self.graph_changed.emit()
-        for step in range(1, steps + 1):
-            explorable[step] = []
 
+        nb_members = await self.community.nb_members()
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_EXPLORATIONS)
+
+        async def explore(current_identity):
+            async with semaphore:
+                return await self._explore_identity(current_identity, identity, nb_members)
+
+        explored = set()
+        frontier = {identity.pubkey: identity}
         for step in range(0, steps):
-            while len(explorable[step]) > 0:
-                current_identity = explorable[step].pop()
-                # for each pubkey connected...
-                if current_identity not in explored:
-                    self.current_identity_changed.emit(current_identity.pubkey)
-                    node = self.add_identity(current_identity, NodeStatus.NEUTRAL)
-                    self.nx_graph.node[current_identity.pubkey]['is_sentry'] = False
-                    logging.debug("New identity explored : {pubkey}".format(pubkey=current_identity.pubkey[:5]))
-                    self.graph_changed.emit()
-
-                    certifier_list = await current_identity.unique_valid_certifiers_of(self.app.identities_registry,
-                                                                                             self.community)
-                    await self.add_certifier_list(certifier_list, current_identity, identity)
-                    logging.debug("New identity certifiers : {pubkey}".format(pubkey=current_identity.pubkey[:5]))
-
-                    is_sentry = self.is_sentry(len(certifier_list), await self.community.nb_members())
-                    self.nx_graph.node[current_identity.pubkey]['is_sentry'] = is_sentry
-
-                    self.graph_changed.emit()
-
-
-                    certified_list = await current_identity.unique_valid_certified_by(self.app.identities_registry,
-                                                                                            self.community)
-                    await self.add_certified_list(certified_list, current_identity, identity)
-                    logging.debug("New identity certified : {pubkey}".format(pubkey=current_identity.pubkey[:5]))
-                    self.graph_changed.emit()
-
-                    for cert in certified_list + certifier_list:
-                        if cert['identity'] not in explorable[step + 1]:
-                            explorable[step + 1].append(cert['identity'])
-
-                    explored.append(current_identity)
-                    logging.debug("New identity explored : {pubkey}".format(pubkey=current_identity.pubkey[:5]))
-                    self.graph_changed.emit()
+            if not frontier:
+                break
+            explored.update(frontier.keys())
+            certifications = await asyncio.gather(*[explore(i) for i in frontier.values()])
+            frontier = {}
+            for cert in [c for certs in certifications for c in certs]:
+                pubkey = cert['identity'].pubkey
+                if pubkey not in explored and pubkey not in frontier:
+                    frontier[pubkey] = cert['identity']
+            logging.debug("Step {0} explored, {1} identities to explore".format(step, len(frontier)))
+
+        self.graph_changed.emit()
         self.current_identity_changed.emit("")
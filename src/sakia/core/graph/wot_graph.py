@@ -4,6 +4,11 @@ import networkx
 from .base_graph import BaseGraph
 from .constants import NodeStatus
 
+# Maximum number of identities expanded concurrently when searching a path
+MAX_PARALLEL_SEARCHES = 5
+# Maximum length of the paths searched between two identities
+MAX_PATH_DEPTH = 10
+
 
 class WoTGraph(BaseGraph):
     def __init__(self, app, community, nx_graph=None):
@@ -61,27 +66,60 @@ class WoTGraph(BaseGraph):
 
         return path
 
-    async def explore_to_find_member(self, account_identity, to_identity):
+    async def explore_to_find_member(self, account_identity, to_identity, max_depth=MAX_PATH_DEPTH):
         """
-        Scan graph to find identity
-        :param sakia.core.registry.Identity from_identity: Scan starting point
+        Scan graph to find identity, breadth first from both identities :
+        the certified identities are explored forward from account_identity and
+        the certifiers are explored backward from to_identity, until the two searches meet.
+        :param sakia.core.registry.Identity account_identity: Scan starting point
         :param sakia.core.registry.Identity to_identity: Scan goal
+        :param int max_depth: The maximum length of the searched path
+        :return: True if a path was found
+        :rtype: bool
         """
-        explored = []
-        explorable = [account_identity]
-
-        while len(explorable) > 0:
-            current = explorable.pop()
-            certified_list = await current.unique_valid_certified_by(self.app.identities_registry,
-                                                                                    self.community)
-
-            await self.add_certified_list(certified_list, current, account_identity)
-            if to_identity.pubkey in [data['identity'].pubkey for data in certified_list]:
-                return True
-
-            explored.append(current)
-            for entry in certified_list:
-                if entry['identity'] not in explored + explorable:
-                    explorable.append(entry['identity'])
-
-        return False
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_SEARCHES)
+
+        async def certified(identity):
+            async with semaphore:
+                certified_list = await identity.unique_valid_certified_by(self.app.identities_registry,
+                                                                          self.community)
+                await self.add_certified_list(certified_list, identity, account_identity)
+                return certified_list
+
+        async def certifiers(identity):
+            async with semaphore:
+                certifier_list = await identity.unique_valid_certifiers_of(self.app.identities_registry,
+                                                                           self.community)
+                await self.add_certifier_list(certifier_list, identity, account_identity)
+                return certifier_list
+
+        async def expand(frontier, search, visited):
+            certifications = await asyncio.gather(*[search(i) for i in frontier.values()])
+            next_frontier = {}
+            for cert in [c for certs in certifications for c in certs]:
+                pubkey = cert['identity'].pubkey
+                if pubkey not in visited:
+                    visited.add(pubkey)
+                    next_frontier[pubkey] = cert['identity']
+            return next_frontier
+
+        forward = {account_identity.pubkey: account_identity}
+        backward = {to_identity.pubkey: to_identity}
+        forward_visited = set(forward.keys())
+        backward_visited = set(backward.keys())
+        depth = 0
+        while forward_visited.isdisjoint(backward_visited):
+            # no path exists when one of the searches can't go further
+            if not forward or not backward or depth >= max_depth:
+                return False
+            if depth + 2 <= max_depth:
+                forward, backward = await asyncio.gather(expand(forward, certified, forward_visited),
+                                                         expand(backward, certifiers, backward_visited))
+                depth += 2
+            else:
+                forward = await expand(forward, certified, forward_visited)
+                depth += 1
+
+        if 'status' not in self.nx_graph.node.get(to_identity.pubkey, {}):
+            self.add_identity(to_identity, await self.node_status(to_identity, account_identity))
+        return True
@@ -16,6 +16,36 @@ class BaseReferential:
     def instance(cls, amount, community, app, block_number=None):
         return cls(amount, community, app, block_number)
 
+    @classmethod
+    async def diff_localized_many(cls, amounts, block_numbers, community, app, units=False,
+                                  international_system=False):
+        """
+        Localize the differential values of several amounts at once,
+        using the referential class selected by the preferences
+
+        :param list amounts: The amounts
+        :param list block_numbers: The block numbers of the amounts, None if they are not in a block
+        :param sakia.core.Community community: The community of the amounts
+        :param sakia.core.Application app: The application
+        :return: The localized values, in the order of the amounts
+        :rtype: list
+        """
+        referential = type(cls.instance(0, community, app))
+        return await referential._diff_localized_many(amounts, block_numbers, community, app,
+                                                      units, international_system)
+
+    @classmethod
+    async def _diff_localized_many(cls, amounts, block_numbers, community, app, units, international_system):
+        """
+        Localize the differential values of several amounts one by one.
+        The referentials depending on the universal dividends resolve them once for all the amounts.
+        """
+        localized = []
+        for amount, block_number in zip(amounts, block_numbers):
+            localized.append(await cls(amount, community, app, block_number)
+                             .diff_localized(units, international_system))
+        return localized
+
     @classmethod
     def translated_name(self):
         pass
@@ -94,6 +94,23 @@ class DividendPerDay(BaseReferential):
 
     async def diff_localized(self, units=False, international_system=False):
         value = await self.differential()
+        return self._diff_localized_value(value, units, international_system)
+
+    @classmethod
+    async def _diff_localized_many(cls, amounts, block_numbers, community, app, units, international_system):
+        dividend = await community.dividend()
+        params = await community.parameters()
+        localized = []
+        for amount, block_number in zip(amounts, block_numbers):
+            if dividend > 0:
+                value = (amount * 100) / (float(dividend) / (params['dt'] / 86400))
+            else:
+                value = amount
+            localized.append(cls(amount, community, app, block_number)
+                             ._diff_localized_value(value, units, international_system))
+        return localized
+
+    def _diff_localized_value(self, value, units, international_system):
         prefix = ""
         localized_value = QLocale().toString(float(value), 'f', self.app.preferences['digits_after_comma'])
 
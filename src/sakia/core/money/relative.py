@@ -119,6 +119,19 @@ class Relative(BaseReferential):
 
     async def diff_localized(self, units=False, international_system=False):
         value = await self.differential()
+        return self._diff_localized_value(value, units, international_system)
+
+    @classmethod
+    async def _diff_localized_many(cls, amounts, block_numbers, community, app, units, international_system):
+        dividend = await community.dividend()
+        localized = []
+        for amount, block_number in zip(amounts, block_numbers):
+            value = amount / float(dividend) if dividend > 0 else amount
+            localized.append(cls(amount, community, app, block_number)
+                             ._diff_localized_value(value, units, international_system))
+        return localized
+
+    def _diff_localized_value(self, value, units, international_system):
         prefix = ""
         if international_system and value != 0:
             localized_value, prefix = Relative.to_si(value, self.app.preferences['digits_after_comma'])
@@ -93,9 +93,24 @@ class RelativeToPast(BaseReferential):
             return localized_value
 
     async def diff_localized(self, units=False, international_system=False):
-        from . import Relative
         value = await self.differential()
         block = await self.community.get_ud_block(0, self._block_number)
+        return self._diff_localized_value(value, block, units, international_system)
+
+    @classmethod
+    async def _diff_localized_many(cls, amounts, block_numbers, community, app, units, international_system):
+        ud_blocks = await community.ud_blocks(block_numbers)
+        localized = []
+        for amount, block_number in zip(amounts, block_numbers):
+            block = ud_blocks[block_number]
+            dividend = community.block_dividend(block)
+            value = amount / float(dividend) if dividend > 0 else amount
+            localized.append(cls(amount, community, app, block_number)
+                             ._diff_localized_value(value, block, units, international_system))
+        return localized
+
+    def _diff_localized_value(self, value, block, units, international_system):
+        from . import Relative
         if block:
             date = QLocale.toString(
                         QLocale(),
@@ -1,5 +1,6 @@
 from PyQt5.QtCore import QObject, QCoreApplication, QT_TRANSLATE_NOOP, QLocale, QDateTime
 from .base_referential import BaseReferential
+from ...tools.exceptions import NoPeerAvailable
 
 
 class UDDToPast(BaseReferential):
@@ -113,9 +114,31 @@ class UDDToPast(BaseReferential):
             return localized_value
 
     async def diff_localized(self, units=False, international_system=False):
-        from . import Relative
         value = await self.differential()
         block = await self.community.get_block(self._block_number)
+        return self._diff_localized_value(value, block['medianTime'], units, international_system)
+
+    @classmethod
+    async def _diff_localized_many(cls, amounts, block_numbers, community, app, units, international_system):
+        ud_blocks = await community.ud_blocks(block_numbers)
+        params = await community.parameters()
+        times = await community.times(block_numbers)
+        if not all(times.values()):
+            # the times which could not be requested are not computable, as in diff_localized
+            raise NoPeerAvailable(community.currency, 0)
+        localized = []
+        for amount, block_number in zip(amounts, block_numbers):
+            dividend = community.block_dividend(ud_blocks[block_number])
+            if dividend > 0:
+                value = (amount * 100) / (float(dividend) / (params['dt'] / 86400))
+            else:
+                value = amount
+            localized.append(cls(amount, community, app, block_number)
+                             ._diff_localized_value(value, times[block_number], units, international_system))
+        return localized
+
+    def _diff_localized_value(self, value, median_time, units, international_system):
+        from . import Relative
         prefix = ""
         if international_system and value != 0:
             localized_value, prefix = Relative.to_si(value, self.app.preferences['digits_after_comma'])
@@ -128,7 +151,7 @@ class UDDToPast(BaseReferential):
                     prefix,
                     QLocale.toString(
                         QLocale(),
-                        QDateTime.fromTime_t(block['medianTime']).date(),
+                        QDateTime.fromTime_t(median_time).date(),
                         QLocale.dateFormat(QLocale(), QLocale.ShortFormat)
                     ),
                     self.community.short_currency if units else "")
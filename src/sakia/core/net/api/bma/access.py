@@ -2,15 +2,20 @@ from PyQt5.QtCore import QObject, pyqtSlot
 from duniterpy.api import bma
 from duniterpy.api import errors
 from .....tools.exceptions import NoPeerAvailable
+from .cache import BmaCache, freeze
+from .blockchain import Blocks
+from .blocks_store import BlocksStore
+from .cache_store import CacheStore
+from .health import NodesHealth
 from ..... import __version__
 import logging
 from aiohttp.errors import ClientError, ServerDisconnectedError
 import asyncio
 import random
+import time
 from socket import gaierror
 import jsonschema
 from pkg_resources import parse_version
-import copy
 
 
 class BmaAccess(QObject):
@@ -20,17 +25,24 @@ class BmaAccess(QObject):
 
     __saved_requests = [str(bma.blockchain.Block), str(bma.blockchain.Parameters)]
 
-    def __init__(self, data, network):
+    def __init__(self, cache, network):
         """
         Constructor of a network
 
-        :param dict data: The data present in this cache
+        :param sakia.core.net.api.bma.cache.BmaCache cache: The cache of bma replies
         :param sakia.core.net.network.Network network: The network used to connect
         """
         super().__init__()
-        self._data = data
+        self._cache = cache
+        self._blocks_store = None
+        self._cache_store = None
         self._rollback_to = None
+        self._rollback_time = 0
+        self._rollback_pending = False
+        self._fork_point_search = None
         self._pending_requests = {}
+        self._stats = {'sent': 0, 'coalesced': 0, 'hedged': 0}
+        self._health = NodesHealth()
         self._network = network
 
     @classmethod
@@ -42,11 +54,81 @@ class BmaAccess(QObject):
         :return: A new BmaAccess object
         :rtype: sakia.core.net.api.bma.access.BmaAccess
         """
-        return cls({}, network)
+        return cls(BmaCache(), network)
 
     @property
-    def data(self):
-        return self._data.copy()
+    def cache(self):
+        return self._cache
+
+    @property
+    def health(self):
+        """
+        Get the health of the requested nodes
+        :rtype: sakia.core.net.api.bma.health.NodesHealth
+        """
+        return self._health
+
+    @property
+    def blocks_store(self):
+        return self._blocks_store
+
+    def open_blocks_store(self, path):
+        """
+        Open the local store of blocks, consulted before the network
+
+        :param str path: The path of the blocks store file
+        """
+        self.close_blocks_store()
+        self._blocks_store = BlocksStore.open(path)
+
+    def close_blocks_store(self):
+        if self._blocks_store is not None:
+            self._blocks_store.close()
+            self._blocks_store = None
+
+    @property
+    def cache_store(self):
+        return self._cache_store
+
+    def open_cache_store(self, path):
+        """
+        Open the database persisting the cache.
+        Its entries are loaded when they are requested.
+
+        :param str path: The path of the database file
+        """
+        self.close_cache_store()
+        self._cache_store = CacheStore.open(path)
+        state = self._cache_store.state('access')
+        if state:
+            self._load_state(state)
+        self._cache.attach_store(self._cache_store)
+
+    def save_cache_store(self):
+        """
+        Write the changes of the cache to its database
+        """
+        if self._cache_store is not None:
+            self._cache_store.set_state('access', self._state())
+            self._cache.flush()
+            self._cache_store.commit()
+
+    def close_cache_store(self):
+        if self._cache_store is not None:
+            self._cache_store.close()
+            self._cache_store = None
+
+    def block_doc(self, number):
+        """
+        Get the parsed document of a block known locally
+
+        :param int number: The block number
+        :return: The block document, or None if the block is not in the blocks store
+        :rtype: duniterpy.documents.Block
+        """
+        if self._blocks_store is not None:
+            return self._blocks_store.block_doc(number)
+        return None
 
     def load_from_json(self, json_data):
         """
@@ -54,13 +136,22 @@ class BmaAccess(QObject):
 
         :param dict data: The cache in json format
         """
-        data = {}
-        for entry in json_data['entries']:
-            key = entry['key']
-            cache_key = (key[0], key[1], key[2], key[3], key[4])
-            data[cache_key] = entry['value']
-        self._data = data
+        cache = BmaCache(self._cache.max_entries, self._cache.max_size)
+        if self._cache_store is not None:
+            cache.attach_store(self._cache_store)
+        cache.load_json(json_data['entries'])
+        self._cache = cache
+        self._load_state(json_data)
+
+    def _load_state(self, json_data):
         self._rollback_to = json_data['rollback']
+        self._rollback_time = json_data.get('rollback_time', time.time())
+        self._rollback_pending = json_data.get('rollback_pending', False)
+
+    def _state(self):
+        return {'rollback': self._rollback_to,
+                'rollback_time': self._rollback_time,
+                'rollback_pending': self._rollback_pending}
 
     def jsonify(self):
         """
@@ -68,21 +159,13 @@ class BmaAccess(QObject):
 
         :return: The cache as a dict in json format
         """
-        data = {k: self._data[k] for k in self._data.keys()}
-        entries = []
-        for d in data:
-            entries.append({'key': d,
-                            'value': data[d]})
-        return {'rollback': self._rollback_to,
-                'entries': entries}
+        data = self._state()
+        data['entries'] = self._cache.jsonify()
+        return data
 
     @staticmethod
     def _gen_cache_key(request, req_args, get_args):
-        return (str(request),
-                str(tuple(frozenset(sorted(req_args.keys())))),
-                str(tuple(frozenset(sorted(req_args.values())))),
-                str(tuple(frozenset(sorted(get_args.keys())))),
-                str(tuple(frozenset(sorted(get_args.values())))))
+        return BmaCache.gen_key(request, req_args, get_args)
 
     def _compare_json(self, first, second):
         """
@@ -112,24 +195,31 @@ class BmaAccess(QObject):
         Get data from the cache
         :param request: The requested data
         :param cache_key: The key
+        :return: (need_reload, data). The data is read-only.
         :rtype: tuple[bool, dict]
         """
+        if request is bma.blockchain.Block and self._blocks_store is not None \
+                and req_args.get('number') in self._blocks_store:
+            # Until the fork point is found, the stored blocks of the fork window are not trusted
+            need_reload = self._rollback_pending and req_args['number'] >= self._rollback_to
+            return need_reload, self._blocks_store.get(req_args['number'])
+
         cache_key = BmaAccess._gen_cache_key(request, req_args, get_args)
-        if cache_key in self._data.keys():
-            cached_data = self._data[cache_key]
+        cached_data = self._cache.get(cache_key)
+        if cached_data:
             need_reload = True
+            cached_before_rollback = cached_data['metadata']['time'] < self._rollback_time
             # If we detected a rollback
             # We reload if we don't know if this block changed or not
-            if self._rollback_to:
-                if request is bma.blockchain.Block:
-                    if get_args["number"] >= self._rollback_to:
-                        need_reload = True
-                if request is bma.blockchain.Parameters and self._rollback_to == 0:
-                    need_reload = True
+            if self._rollback_to is not None and request is bma.blockchain.Block \
+                    and req_args['number'] >= self._rollback_to and cached_before_rollback:
+                need_reload = True
+            elif self._rollback_to == 0 and request is bma.blockchain.Parameters and cached_before_rollback:
+                need_reload = True
             elif str(request) in BmaAccess.__saved_requests \
                 or cached_data['metadata']['block_hash'] == self._network.current_blockUID.sha_hash:
                 need_reload = False
-            ret_data = copy.deepcopy(cached_data['value'])
+            ret_data = cached_data['value']
         else:
             need_reload = True
             ret_data = None
@@ -147,11 +237,10 @@ class BmaAccess(QObject):
         :param dict get_args: Arguments to pass to the request __get__ method
         :param dict data: Json data got from the blockchain
         """
-        if self._rollback_to and request is bma.blockchain.Block:
-            if get_args['number'] >= self._rollback_to:
-                cache_key = BmaAccess._gen_cache_key(request, req_args, get_args)
-                if cache_key in self._data and self._data[cache_key]['value']['hash'] == data['hash']:
-                    self._rollback_to = get_args['number']
+        if self._rollback_to is not None and request is bma.blockchain.Block:
+            if req_args['number'] >= self._rollback_to:
+                if self._local_block_hash(req_args['number']) == data['hash']:
+                    self._rollback_to = req_args['number']
 
     def _update_cache(self, request, req_args, get_args, data):
         """
@@ -165,18 +254,21 @@ class BmaAccess(QObject):
         """
         self._update_rollback(request, req_args, get_args, data)
 
+        if request is bma.blockchain.Block and self._blocks_store is not None:
+            changed = self._blocks_store.block_hash(data['number']) != data['hash']
+            self._blocks_store.add(data)
+            return changed
+
         cache_key = BmaAccess._gen_cache_key(request, req_args, get_args)
-        if cache_key not in self._data:
-            self._data[cache_key] = {'metadata': {},
-                                     'value': {}}
-
-        self._data[cache_key]['metadata']['block_number'] = self._network.current_blockUID.number
-        self._data[cache_key]['metadata']['block_hash'] = self._network.current_blockUID.sha_hash
-        self._data[cache_key]['metadata']['sakia_version'] = __version__
-        if not self._compare_json(self._data[cache_key]['value'], data):
-            self._data[cache_key]['value'] = copy.deepcopy(data)
-            return True
-        return False
+        metadata = {'block_number': self._network.current_blockUID.number,
+                    'block_hash': self._network.current_blockUID.sha_hash,
+                    'sakia_version': __version__}
+        cached_data = self._cache.get(cache_key)
+        if cached_data and self._compare_json(cached_data['value'], data):
+            self._cache.touch(cache_key, metadata)
+            return False
+        self._cache.put(cache_key, data, metadata)
+        return True
 
     def _invalidate_cache(self, post_request):
         """
@@ -185,17 +277,106 @@ class BmaAccess(QObject):
         """
         invalidated = {bma.wot.Add: bma.wot.Lookup}
         if post_request in invalidated:
-            invalidated_cache = self._data.copy()
-            for data in self._data:
-                if data[0] == str(invalidated[post_request]):
-                    invalidated_cache.pop(data)
-            self._data = invalidated_cache
+            self._cache.invalidate(invalidated[post_request])
 
     def rollback(self):
         """
-        When a rollback is detected, we move the rollback cursor to 0
+        When a rollback is detected, we move the rollback cursor to the
+        oldest block which could have been forked : the first block of the
+        fork window. Only the blocks after this cursor are reloaded, until
+        the fork point is found.
+        """
+        current_number = self._network.current_blockUID.number
+        fork_window = max([n.fork_window for n in self._network.synced_nodes] + [0])
+        if current_number is None or fork_window == 0:
+            self._rollback_to = 0
+        else:
+            self._rollback_to = max(0, current_number - fork_window)
+        self._rollback_time = time.time()
+        self._rollback_pending = True
+        self._fork_point_search = None
+
+    def _local_block_hash(self, number):
+        """
+        Get the hash of a block known locally
+        :param int number: The block number
+        :return: The block hash or None if the block is not known
+        :rtype: str
+        """
+        if self._blocks_store is not None and number in self._blocks_store:
+            return self._blocks_store.block_hash(number)
+        cached_data = self._cache.get(BmaAccess._gen_cache_key(bma.blockchain.Block, {'number': number}, {}))
+        if cached_data:
+            return cached_data['value']['hash']
+        return None
+
+    async def _search_fork_point(self):
         """
-        self._rollback_to = 0
+        Binary search of the first forked block among the blocks
+        known locally after the rollback cursor.
+        """
+        rollback_time = self._rollback_time
+        low = self._rollback_to
+        high = self._network.current_blockUID.number
+        nodes = self.filter_nodes(bma.blockchain.Block, self._network.synced_nodes)
+        if high is None or len(nodes) == 0:
+            raise NoPeerAvailable("", len(nodes))
+
+        known = [n for n in range(low, high + 1) if self._local_block_hash(n)]
+        # Blocks are chained by their hash : if a block is still in the main chain,
+        # all the blocks before it are too
+        first = 0
+        last = len(known)
+        while first < last:
+            middle = (first + last) // 2
+            number = known[middle]
+            local_hash = self._local_block_hash(number)
+            try:
+                block = await self._request_nodes(bma.blockchain.Block, {'number': number}, {}, nodes)
+            except errors.DuniterError as e:
+                if e.ucode != errors.BLOCK_NOT_FOUND:
+                    raise
+                block = {'hash': None}
+            if block is None:
+                raise NoPeerAvailable("", len(nodes))
+            if block['hash'] == local_hash:
+                first = middle + 1
+            else:
+                last = middle
+        fork_point = known[first - 1] + 1 if first > 0 else low
+        logging.debug("Fork point found at {0}".format(fork_point))
+
+        if self._rollback_time == rollback_time:
+            self._rollback_to = fork_point
+            self._rollback_pending = False
+            if self._blocks_store is not None:
+                self._blocks_store.invalidate_from(fork_point)
+        return fork_point
+
+    async def fork_point(self):
+        """
+        Find the first block forked by the last detected rollback.
+        The blocks known locally are compared with the main chain by a binary
+        search, so that a short fork costs a few requests.
+        Concurrent callers share the same search.
+
+        :return: The number of the first forked block, or None if no rollback was detected
+        :rtype: int
+        """
+        if self._rollback_to is None:
+            return None
+        if not self._rollback_pending and self._fork_point_search is None:
+            return self._rollback_to
+        if self._fork_point_search is None:
+            self._fork_point_search = asyncio.ensure_future(self._search_fork_point())
+        search = self._fork_point_search
+        try:
+            return await asyncio.shield(search)
+        except NoPeerAvailable:
+            # The next caller will start a new search
+            if self._fork_point_search is search:
+                self._fork_point_search = None
+            raise
 
     def filter_nodes(self, request, nodes):
         def compare_versions(node, version):
@@ -216,14 +397,140 @@ class BmaAccess(QObject):
         else:
             return nodes
 
-    async def future_request(self, request, req_args={}, get_args={}):
+    @property
+    def stats(self):
+        """
+        Get the counters of the requests
+
+        :return: the number of requests sent to the network, the number
+        of requests which were coalesced with an identical pending request,
+        and the number of hedged requests sent to a second node
+        :rtype: dict
+        """
+        return self._stats.copy()
+
+    async def _get(self, request, req_args, get_args, node):
+        """
+        Send a GET request to a node and record the health of the node
+
+        :param class request: A bma request class calling for data
+        :param dict req_args: Arguments to pass to the request constructor
+        :param dict get_args: Arguments to pass to the request __get__ method
+        :param sakia.core.net.Node node: The node to request
+        :return: The json data
+        """
+        req = request(node.endpoint.conn_handler(), **req_args)
+        start = time.time()
+        self._stats['sent'] += 1
+        try:
+            json_data = await req.get(**get_args, session=self._network.session)
+        except errors.DuniterError:
+            self._health.record_success(node, time.time() - start)
+            raise
+        except (ClientError, ServerDisconnectedError, gaierror, asyncio.TimeoutError,
+                ValueError, jsonschema.ValidationError):
+            self._health.record_failure(node)
+            raise
+        self._health.record_success(node, time.time() - start)
+        return json_data
+
+    async def _hedged_get(self, request, req_args, get_args, nodes, tried):
+        """
+        Send a GET request to a node, and to a second node if the first one
+        did not answer within the usual latency of the nodes.
+        The first answer wins and the other request is cancelled.
+
+        :param class request: A bma request class calling for data
+        :param dict req_args: Arguments to pass to the request constructor
+        :param dict get_args: Arguments to pass to the request __get__ method
+        :param list nodes: The nodes to request
+        :param list tried: The nodes already requested, updated with the requested nodes
+        :return: The json data
+        """
+        node = self._health.choose(nodes, tried)
+        tried.append(node)
+        tasks = {asyncio.ensure_future(self._get(request, req_args, get_args, node))}
+        hedged = False
+        error = None
+        try:
+            while True:
+                done, pending = await asyncio.wait(tasks, timeout=None if hedged else self._health.hedge_delay(),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.remove(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                    if isinstance(error, errors.DuniterError):
+                        raise error
+                if not hedged:
+                    hedged = True
+                    if any(n not in tried for n in nodes):
+                        node = self._health.choose(nodes, tried)
+                        tried.append(node)
+                        tasks.add(asyncio.ensure_future(self._get(request, req_args, get_args, node)))
+                        self._stats['hedged'] += 1
+                if not tasks:
+                    raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _send(self, request, req_args, get_args, nodes, tried, hedged):
+        if hedged:
+            return await self._hedged_get(request, req_args, get_args, nodes, tried)
+        node = self._health.choose(nodes, tried)
+        tried.append(node)
+        return await self._get(request, req_args, get_args, node)
+
+    async def _request_nodes(self, request, req_args, get_args, nodes, hedged=False):
+        """
+        Request the network and update the cache
+
+        :param class request: A bma request class calling for data
+        :param dict req_args: Arguments to pass to the request constructor
+        :param dict get_args: Arguments to pass to the request __get__ method
+        :param list nodes: The nodes to request
+        :param bool hedged: True to send hedged requests
+        :return: The data, read-only, or None if no node answered
+        :rtype: dict
+        """
+        tries = 0
+        tried = []
+        while tries < 3:
+            try:
+                json_data = freeze(await self._send(request, req_args, get_args, nodes, tried, hedged))
+                self._update_cache(request, req_args, get_args, json_data)
+                return json_data
+            except (ClientError, ServerDisconnectedError, gaierror, asyncio.TimeoutError, ValueError) as e:
+                tries += 1
+            except jsonschema.ValidationError as e:
+                logging.debug(str(e))
+                tries += 1
+        return None
+
+    def _pending_request_done(self, cache_key, future):
+        """
+        Remove a finished request from the pending requests
+        :param tuple cache_key: The key of the request
+        :param asyncio.Future future: The finished request
+        """
+        if self._pending_requests.get(cache_key) is future:
+            self._pending_requests.pop(cache_key)
+        if not future.cancelled():
+            # Retrieve the exception to avoid warnings if all waiters were cancelled
+            future.exception()
+
+    async def future_request(self, request, req_args={}, get_args={}, hedged=False):
         """
         Start a request to the network and returns a future.
+        Identical requests started while this one is pending share its reply.
 
         :param class request: A bma request class calling for data
         :param dict req_args: Arguments to pass to the request constructor
         :param dict get_args: Arguments to pass to the request __get__ method
-        :return: The future data
+        :param bool hedged: True to send the request to a second node if the first one is slow
+        :return: The future data, read-only
         :rtype: dict
         """
         data = self._get_from_cache(request, req_args, get_args)
@@ -232,42 +539,67 @@ class BmaAccess(QObject):
 
         nodes = self.filter_nodes(request, self._network.synced_nodes)
         if need_reload and len(nodes) > 0:
-            tries = 0
-            while tries < 3:
-                node = random.choice(nodes)
-                conn_handler = node.endpoint.conn_handler()
-                req = request(conn_handler, **req_args)
-                try:
-                    json_data = await req.get(**get_args, session=self._network.session)
-                    self._update_cache(request, req_args, get_args, json_data)
-                    return json_data
-                except (ClientError, ServerDisconnectedError, gaierror, asyncio.TimeoutError, ValueError) as e:
-                    tries += 1
-                except jsonschema.ValidationError as e:
-                    logging.debug(str(e))
-                    tries += 1
+            cache_key = BmaAccess._gen_cache_key(request, req_args, get_args)
+            if cache_key in self._pending_requests:
+                self._stats['coalesced'] += 1
+                pending = self._pending_requests[cache_key]
+            else:
+                pending = asyncio.ensure_future(self._request_nodes(request, req_args, get_args, nodes, hedged))
+                pending.add_done_callback(lambda f, k=cache_key: self._pending_request_done(k, f))
+                self._pending_requests[cache_key] = pending
+            # the request is shielded so that a cancelled caller does not cancel the other ones
+            reply = await asyncio.shield(pending)
+            if reply is not None:
+                return reply
         if len(nodes) == 0 or json_data is None:
             raise NoPeerAvailable("", len(nodes))
         return json_data
 
-    async def simple_request(self, request, req_args={}, get_args={}):
+    async def future_blocks(self, start, count):
+        """
+        Get a contiguous range of blocks.
+        Missing blocks are requested all at once, and cached as bma.blockchain.Block replies.
+
+        :param int start: The number of the first block
+        :param int count: The number of blocks
+        :return: The blocks data, read-only, in chain order
+        :rtype: list
+        """
+        blocks = []
+        for number in range(start, start + count):
+            need_reload, block = self._get_from_cache(bma.blockchain.Block, {'number': number}, {})
+            if need_reload:
+                break
+            blocks.append(block)
+        else:
+            return blocks
+
+        data = await self.simple_request(Blocks, req_args={'count': count, 'start': start})
+        blocks = []
+        for block in data:
+            block = freeze(block)
+            self._update_cache(bma.blockchain.Block, {'number': block['number']}, {}, block)
+            blocks.append(block)
+        return blocks
+
+    async def simple_request(self, request, req_args={}, get_args={}, hedged=False):
         """
         Start a request to the network but don't cache its result.
 
         :param class request: A bma request class calling for data
         :param dict req_args: Arguments to pass to the request constructor
         :param dict get_args: Arguments to pass to the request __get__ method
+        :param bool hedged: True to send the request to a second node if the first one is slow
         :return: The returned data
         """
         nodes = self.filter_nodes(request, self._network.synced_nodes)
+        json_data = None
         if len(nodes) > 0:
-            node = random.choice(nodes)
-            req = request(node.endpoint.conn_handler(), **req_args)
             tries = 0
-            json_data = None
+            tried = []
             while tries < 3:
                 try:
-                    json_data = await req.get(**get_args, session=self._network.session)
+                    json_data = await self._send(request, req_args, get_args, nodes, tried, hedged)
                     return json_data
                 except (ClientError, ServerDisconnectedError, gaierror, asyncio.TimeoutError, ValueError) as e:
                     tries += 1
@@ -0,0 +1,30 @@
+from duniterpy.api.bma.blockchain import Blockchain, Block
+
+
+class Blocks(Blockchain):
+    """GET a contiguous range of blocks from the blockchain."""
+
+    schema = {
+        "type": "array",
+        "items": Block.schema
+    }
+
+    def __init__(self, connection_handler, count=None, start=None):
+        """
+        Use the count and start parameters in order to select the range of blocks.
+
+        Arguments:
+        - `count`: number of blocks to select
+        - `start`: number of the first block to select
+        """
+
+        super().__init__(connection_handler)
+
+        self.count = count
+        self.start = start
+
+    async def __get__(self, session, **kwargs):
+        assert self.count is not None
+        assert self.start is not None
+        r = await self.requests_get(session, '/blocks/%d/%d' % (self.count, self.start), **kwargs)
+        return (await self.parse_response(r))
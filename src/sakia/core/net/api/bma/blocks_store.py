@@ -0,0 +1,255 @@
+import os
+import bisect
+import json
+import logging
+from collections import OrderedDict
+from duniterpy.documents import Block
+from .cache import freeze
+
+# Maximum number of parsed block documents kept in memory
+MAX_DOCUMENTS = 500
+# Maximum number of decoded blocks kept in memory
+MAX_BLOCKS = 1000
+
+
+class BlocksStore:
+    """
+    An append-only file of blocks, indexed by number and by hash.
+
+    Each line of the file is either a block, formatted as
+    "<number> <hash> <json data>", or a fork record, formatted as
+    "F <number>", which marks all the blocks stored before it
+    with a number greater or equal to <number> as forked.
+    """
+    def __init__(self, path):
+        """
+        Constructor of a blocks store
+
+        :param str path: The path of the store file
+        """
+        self._path = path
+        self._file = None
+        self._reader = None
+        # number -> (hash, offset) of the blocks of the main chain
+        self._numbers = {}
+        # sorted numbers of the blocks of the main chain
+        self._sorted = []
+        # hash -> number of all the stored blocks
+        self._hashes = {}
+        # hashes of the stored blocks which were forked
+        self._forked = set()
+        self._documents = OrderedDict()
+        self._blocks = OrderedDict()
+        # True when lines were written but not flushed yet
+        self._pending = False
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open a store file, creating it if needed
+
+        :param str path: The path of the store file
+        :return: The blocks store
+        :rtype: BlocksStore
+        """
+        store = cls(path)
+        store._load()
+        if len(store._forked) > len(store._numbers):
+            store.compact()
+        return store
+
+    def _load(self):
+        directory = os.path.dirname(self._path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        valid_size = 0
+        if os.path.exists(self._path):
+            with open(self._path, 'rb') as store_file:
+                offset = 0
+                for line in store_file:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        fields = line.split(b' ', 2)
+                        if fields[0] == b'F':
+                            self._invalidate_index(int(fields[1]))
+                        else:
+                            self._index(int(fields[0]), fields[1].decode('ascii'), offset)
+                    except (ValueError, IndexError):
+                        break
+                    offset += len(line)
+                valid_size = offset
+            if valid_size != os.path.getsize(self._path):
+                logging.debug("Truncating blocks store {0} at {1}".format(self._path, valid_size))
+                with open(self._path, 'r+b') as store_file:
+                    store_file.truncate(valid_size)
+        self._file = open(self._path, 'ab')
+        self._reader = open(self._path, 'rb')
+
+    def _index(self, number, block_hash, offset):
+        if number not in self._numbers:
+            if not self._sorted or number > self._sorted[-1]:
+                self._sorted.append(number)
+            else:
+                bisect.insort(self._sorted, number)
+        self._numbers[number] = (block_hash, offset)
+        self._hashes[block_hash] = number
+        self._forked.discard(block_hash)
+
+    def _invalidate_index(self, number):
+        # only the suffix of the sorted numbers is invalidated
+        index = bisect.bisect_left(self._sorted, number)
+        for n in self._sorted[index:]:
+            block_hash, offset = self._numbers.pop(n)
+            self._forked.add(block_hash)
+            self._documents.pop(n, None)
+            self._blocks.pop(n, None)
+        del self._sorted[index:]
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, number):
+        return number in self._numbers
+
+    def block_hash(self, number):
+        """
+        Get the hash of a block of the main chain
+        :param int number: The block number
+        :return: The block hash or None if the block is not stored
+        :rtype: str
+        """
+        if number in self._numbers:
+            return self._numbers[number][0]
+        return None
+
+    def number(self, block_hash):
+        """
+        Get the number of a stored block
+        :param str block_hash: The block hash
+        :return: The block number or None if the block is not stored
+        :rtype: int
+        """
+        return self._hashes.get(block_hash)
+
+    def is_forked(self, block_hash):
+        """
+        Check if a stored block was forked
+        :param str block_hash: The block hash
+        :return: True if the block was stored and then invalidated
+        :rtype: bool
+        """
+        return block_hash in self._forked
+
+    def get(self, number):
+        """
+        Get a block of the main chain
+        :param int number: The block number
+        :return: The block data, read-only, or None if the block is not stored
+        :rtype: dict
+        """
+        if number not in self._numbers:
+            return None
+        if number in self._blocks:
+            self._blocks.move_to_end(number)
+            return self._blocks[number]
+        block_hash, offset = self._numbers[number]
+        self.flush()
+        self._reader.seek(offset)
+        line = self._reader.readline()
+        block = freeze(json.loads(line.split(b' ', 2)[2].decode('utf-8')))
+        self._blocks[number] = block
+        if len(self._blocks) > MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        return block
+
+    def block_doc(self, number):
+        """
+        Get the parsed document of a block of the main chain
+        :param int number: The block number
+        :return: The block document or None if the block is not stored
+        :rtype: duniterpy.documents.Block
+        """
+        if number in self._documents:
+            self._documents.move_to_end(number)
+            return self._documents[number]
+        block = self.get(number)
+        if block is None:
+            return None
+        signed_raw = "{0}{1}\n".format(block['raw'], block['signature'])
+        try:
+            block_doc = Block.from_signed_raw(signed_raw)
+        except TypeError:
+            logging.debug("Error in {0}".format(number))
+            return None
+        self._documents[number] = block_doc
+        if len(self._documents) > MAX_DOCUMENTS:
+            self._documents.popitem(last=False)
+        return block_doc
+
+    def add(self, block):
+        """
+        Append a block to the store.
+        If another block was stored with the same number, the stored
+        blocks are invalidated from this number.
+
+        :param dict block: The block data
+        """
+        number = block['number']
+        block_hash = block['hash']
+        if number in self._numbers:
+            if self._numbers[number][0] == block_hash:
+                return
+            self.invalidate_from(number)
+        line = "{0} {1} {2}\n".format(number, block_hash, json.dumps(block, separators=(',', ':')))
+        offset = self._file.tell()
+        self._file.write(line.encode('utf-8'))
+        self._pending = True
+        self._index(number, block_hash, offset)
+
+    def invalidate_from(self, number):
+        """
+        Mark the stored blocks as forked from a block number
+        :param int number: The first invalidated block number
+        """
+        if self._sorted and self._sorted[-1] >= number:
+            self._file.write("F {0}\n".format(number).encode('ascii'))
+            self._pending = True
+            self._invalidate_index(number)
+
+    def compact(self):
+        """
+        Rewrite the store file without the forked blocks
+        """
+        self.flush()
+        buffer_path = self._path + ".buf"
+        numbers = {}
+        with open(self._path, 'rb') as store_file, open(buffer_path, 'wb') as buffer_file:
+            for number in self._sorted:
+                block_hash, offset = self._numbers[number]
+                store_file.seek(offset)
+                numbers[number] = (block_hash, buffer_file.tell())
+                buffer_file.write(store_file.readline())
+        self.close()
+        os.replace(buffer_path, self._path)
+        self._numbers = numbers
+        self._hashes = {h: n for n, (h, o) in numbers.items()}
+        self._forked = set()
+        self._file = open(self._path, 'ab')
+        self._reader = open(self._path, 'rb')
+
+    def flush(self):
+        """
+        Write the pending lines to the store file
+        """
+        if self._file and self._pending:
+            self._file.flush()
+            self._pending = False
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._reader:
+            self._reader.close()
+            self._reader = None
@@ -0,0 +1,370 @@
+import logging
+import sys
+import time
+from collections import OrderedDict
+from duniterpy.api import bma
+
+# Default budget of a BMA cache
+MAX_ENTRIES = 20000
+MAX_SIZE = 64 * 1024 * 1024
+
+# Time to live of the cached data, in seconds, by request type
+# None means the data never expires (it is only invalidated by rollbacks)
+DEFAULT_TTL = 7 * 24 * 3600
+TTL_POLICIES = {
+    str(bma.blockchain.Block): None,
+    str(bma.blockchain.Parameters): None,
+    str(bma.wot.Lookup): 24 * 3600,
+    str(bma.wot.Requirements): 24 * 3600,
+}
+
+
+class FrozenDict(dict):
+    """
+    A read-only dict. Its copy() method returns a plain mutable dict.
+    """
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Cached data is read-only")
+
+    __setitem__ = _immutable
+    __delitem__ = _immutable
+    __ior__ = _immutable
+    clear = _immutable
+    pop = _immutable
+    popitem = _immutable
+    setdefault = _immutable
+    update = _immutable
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return dict, (thaw(self),)
+
+
+class FrozenList(list):
+    """
+    A read-only list. Its copy() method returns a plain mutable list.
+    """
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Cached data is read-only")
+
+    __setitem__ = _immutable
+    __delitem__ = _immutable
+    __iadd__ = _immutable
+    __imul__ = _immutable
+    append = _immutable
+    extend = _immutable
+    insert = _immutable
+    pop = _immutable
+    remove = _immutable
+    clear = _immutable
+    sort = _immutable
+    reverse = _immutable
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return list, (thaw(self),)
+
+
+def freeze(data):
+    """
+    Get a read-only copy of json data
+
+    :param data: the json data
+    :return: the data with dicts and lists made read-only
+    """
+    if isinstance(data, FrozenDict) or isinstance(data, FrozenList):
+        return data
+    if isinstance(data, dict):
+        frozen = FrozenDict()
+        for k, v in data.items():
+            dict.__setitem__(frozen, k, freeze(v))
+        return frozen
+    if isinstance(data, (list, tuple)):
+        frozen = FrozenList()
+        for v in data:
+            list.append(frozen, freeze(v))
+        return frozen
+    return data
+
+
+def thaw(data):
+    """
+    Get a mutable deep copy of json data
+
+    :param data: the json data
+    :return: the data with plain dicts and lists
+    """
+    if isinstance(data, dict):
+        return {k: thaw(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [thaw(v) for v in data]
+    return data
+
+
+def estimate_size(data):
+    """
+    Estimate the memory used by json data
+
+    :param data: the json data
+    :return: the size in bytes
+    :rtype: int
+    """
+    size = sys.getsizeof(data)
+    if isinstance(data, dict):
+        for k, v in data.items():
+            size += sys.getsizeof(k) + estimate_size(v)
+    elif isinstance(data, list):
+        for v in data:
+            size += estimate_size(v)
+    return size
+
+
+class BmaCache:
+    """
+    A bounded cache of BMA replies.
+
+    Entries are evicted in least recently used order when the
+    entries or memory budget is exceeded. Values are stored read-only
+    so that cache hits can be returned without any copy.
+
+    When a store is attached, the entries missing in memory are loaded
+    from it on first access, and only the changed entries are written to it.
+    """
+    def __init__(self, max_entries=MAX_ENTRIES, max_size=MAX_SIZE, ttl_policies=None):
+        """
+        Constructor of a cache
+
+        :param int max_entries: The maximum number of entries
+        :param int max_size: The estimated maximum memory size of the cached values, in bytes
+        :param dict ttl_policies: The time to live of entries by request type
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._ttl_policies = TTL_POLICIES.copy()
+        if ttl_policies:
+            self._ttl_policies.update(ttl_policies)
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._by_request = {}
+        self._size = 0
+        self._store = None
+        self._dirty = set()
+        self._removed = set()
+
+    @staticmethod
+    def gen_key(request, req_args, get_args):
+        """
+        Generate the canonical key of a request
+
+        :param class request: A bma request class
+        :param dict req_args: Arguments passed to the request constructor
+        :param dict get_args: Arguments passed to the request __get__ method
+        :return: The cache key
+        :rtype: tuple
+        """
+        return (str(request),
+                tuple(sorted(req_args.items())),
+                tuple(sorted(get_args.items())))
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        return list(self._entries.keys())
+
+    @property
+    def store(self):
+        return self._store
+
+    @property
+    def dirty(self):
+        """
+        Get the number of changes not written to the store yet
+        :rtype: int
+        """
+        return len(self._dirty) + len(self._removed)
+
+    def attach_store(self, store):
+        """
+        Attach a store to the cache.
+        The expired entries of the store are deleted, and all the entries
+        in memory are marked as changed.
+
+        :param sakia.core.net.api.bma.cache_store.CacheStore store: The store
+        """
+        self._store = store
+        now = time.time()
+        for request_str in store.requests():
+            ttl = self.ttl(request_str)
+            if ttl is not None:
+                store.delete_request(request_str, now - ttl)
+        self._dirty = set(self._entries.keys())
+        self._removed = set()
+
+    def ttl(self, request_str):
+        return self._ttl_policies.get(request_str, DEFAULT_TTL)
+
+    def _expired(self, key, entry):
+        ttl = self.ttl(key[0])
+        if ttl is None:
+            return False
+        return entry['metadata'].get('time', 0) + ttl < time.time()
+
+    def get(self, key):
+        """
+        Get an entry of the cache
+
+        :param tuple key: The cache key
+        :return: The entry dict, with 'metadata' and 'value' keys, or None
+        :rtype: dict
+        """
+        entry = self._entries.get(key)
+        if entry is None and self._store is not None and key not in self._removed:
+            entry = self._load(key)
+        if entry is None:
+            return None
+        if self._expired(key, entry):
+            self.remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value, metadata):
+        """
+        Put data in the cache
+
+        :param tuple key: The cache key
+        :param value: The json data to store
+        :param dict metadata: The metadata of the data
+        """
+        if key in self._entries:
+            self._drop(key)
+        metadata = metadata.copy()
+        metadata.setdefault('time', time.time())
+        self._insert(key, value, metadata)
+        if self._store is not None:
+            self._dirty.add(key)
+            self._removed.discard(key)
+        self._evict()
+
+    def _insert(self, key, value, metadata):
+        entry_size = estimate_size(value)
+        self._entries[key] = {'metadata': metadata,
+                              'value': freeze(value)}
+        self._sizes[key] = entry_size
+        self._size += entry_size
+        self._by_request.setdefault(key[0], set()).add(key)
+
+    def _load(self, key):
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        self._insert(key, entry['value'], entry['metadata'])
+        self._evict()
+        return self._entries.get(key)
+
+    def touch(self, key, metadata):
+        """
+        Update the metadata of an entry
+        :param tuple key: The cache key
+        :param dict metadata: The metadata to update
+        """
+        entry = self._entries[key]
+        entry['metadata'].update(metadata)
+        entry['metadata']['time'] = time.time()
+        if self._store is not None:
+            self._dirty.add(key)
+
+    def remove(self, key):
+        """
+        Remove an entry from the cache
+        :param tuple key: The cache key
+        """
+        self._drop(key)
+        if self._store is not None:
+            self._dirty.discard(key)
+            self._removed.add(key)
+
+    def _drop(self, key):
+        self._entries.pop(key)
+        self._size -= self._sizes.pop(key)
+        keys = self._by_request[key[0]]
+        keys.discard(key)
+        if not keys:
+            self._by_request.pop(key[0])
+
+    def invalidate(self, request):
+        """
+        Remove all entries of a request type
+        :param class request: A bma request class
+        """
+        for key in list(self._by_request.get(str(request), ())):
+            self.remove(key)
+        if self._store is not None:
+            self._store.delete_request(str(request))
+
+    def _evict(self):
+        evicted = 0
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_size):
+            key = next(iter(self._entries))
+            if key in self._dirty:
+                self._store.put(key, self._entries[key])
+                self._dirty.remove(key)
+            self._drop(key)
+            evicted += 1
+        if evicted:
+            logging.debug("Evicted {0} entries from bma cache".format(evicted))
+
+    def flush(self):
+        """
+        Write the changed entries to the store.
+        The changes are committed by the owner of the store.
+        """
+        if self._store is None:
+            return
+        for key in self._removed:
+            self._store.delete(key)
+        for key in self._dirty:
+            self._store.put(key, self._entries[key])
+        logging.debug("Flushed {0} changes of bma cache".format(self.dirty))
+        self._dirty = set()
+        self._removed = set()
+
+    def load_json(self, entries):
+        """
+        Load entries from json data
+        Entries from the legacy cache format are dropped.
+
+        :param list entries: The entries in json format
+        """
+        for entry in entries:
+            key = entry['key']
+            if len(key) != 3:
+                continue
+            cache_key = (key[0],
+                         tuple(tuple(i) for i in key[1]),
+                         tuple(tuple(i) for i in key[2]))
+            self.put(cache_key, entry['value']['value'], entry['value']['metadata'])
+
+    def jsonify(self):
+        """
+        Get the cache entries in json format, from the least recently used one
+
+        :return: The entries as a list in json format
+        """
+        entries = []
+        for key, entry in self._entries.items():
+            entries.append({'key': key,
+                            'value': entry})
+        return entries
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import sqlite3
+
+
+class CacheStore:
+    """
+    A sqlite database persisting the entries of a bma cache
+    and the state of the objects of a community.
+
+    Entries are written one by one when they change, and read
+    only when they are requested, so that the database never
+    needs to be loaded or rewritten as a whole.
+    """
+    def __init__(self, connection):
+        """
+        Constructor of a cache store
+
+        :param sqlite3.Connection connection: The connection to the database
+        """
+        self._connection = connection
+        self._states = {}
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open a store database, creating it if needed
+
+        :param str path: The path of the database file
+        :return: The cache store
+        :rtype: CacheStore
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE IF NOT EXISTS entries ("
+                           "key TEXT PRIMARY KEY, request TEXT, time REAL, data TEXT)")
+        connection.execute("CREATE INDEX IF NOT EXISTS entries_request ON entries (request, time)")
+        connection.execute("CREATE TABLE IF NOT EXISTS states (name TEXT PRIMARY KEY, data TEXT)")
+        connection.commit()
+        return cls(connection)
+
+    @staticmethod
+    def _encode_key(key):
+        return json.dumps(key, separators=(',', ':'))
+
+    def get(self, key):
+        """
+        Get a stored entry
+
+        :param tuple key: The cache key
+        :return: The entry dict, with 'metadata' and 'value' keys, or None
+        :rtype: dict
+        """
+        row = self._connection.execute("SELECT data FROM entries WHERE key = ?",
+                                       (CacheStore._encode_key(key),)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key, entry):
+        """
+        Store an entry
+
+        :param tuple key: The cache key
+        :param dict entry: The entry dict, with 'metadata' and 'value' keys
+        """
+        self._connection.execute("INSERT OR REPLACE INTO entries (key, request, time, data) VALUES (?, ?, ?, ?)",
+                                 (CacheStore._encode_key(key), key[0],
+                                  entry['metadata'].get('time', time.time()),
+                                  json.dumps(entry, separators=(',', ':'))))
+
+    def delete(self, key):
+        """
+        Delete a stored entry
+        :param tuple key: The cache key
+        """
+        self._connection.execute("DELETE FROM entries WHERE key = ?", (CacheStore._encode_key(key),))
+
+    def delete_request(self, request_str, before=None):
+        """
+        Delete the stored entries of a request type
+
+        :param str request_str: The request type
+        :param float before: If set, only the entries stored before this timestamp are deleted
+        :return: The number of deleted entries
+        :rtype: int
+        """
+        if before is None:
+            cursor = self._connection.execute("DELETE FROM entries WHERE request = ?", (request_str,))
+        else:
+            cursor = self._connection.execute("DELETE FROM entries WHERE request = ? AND time < ?",
+                                              (request_str, before))
+        return cursor.rowcount
+
+    def requests(self):
+        """
+        Get the request types of the stored entries
+        :rtype: list
+        """
+        return [row[0] for row in self._connection.execute("SELECT DISTINCT request FROM entries")]
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def state(self, name):
+        """
+        Get a stored state
+
+        :param str name: The name of the state
+        :return: The state in json format, or None if it was never stored
+        """
+        row = self._connection.execute("SELECT data FROM states WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        self._states[name] = row[0]
+        return json.loads(row[0])
+
+    def set_state(self, name, data):
+        """
+        Store a state. Nothing is written if the state did not change.
+
+        :param str name: The name of the state
+        :param data: The state in json format
+        """
+        text = json.dumps(data, separators=(',', ':'), sort_keys=True)
+        if self._states.get(name) != text:
+            self._connection.execute("INSERT OR REPLACE INTO states (name, data) VALUES (?, ?)", (name, text))
+            self._states[name] = text
+
+    def commit(self):
+        """
+        Commit the changes to the database file
+        """
+        self._connection.commit()
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
@@ -0,0 +1,126 @@
+import random
+import time
+from collections import deque
+
+# Weight of the last request in the moving averages
+EWMA_ALPHA = 0.3
+# Latency assumed for nodes which were never requested, in seconds
+DEFAULT_LATENCY = 1.0
+# Cost factor of the errors in the score of a node
+ERROR_PENALTY = 10
+# Hedged requests are sent to a second node after this percentile of the latencies
+HEDGE_PERCENTILE = 0.95
+# Number of latencies kept to compute the percentile, and minimum number to use it
+LATENCY_SAMPLES = 100
+MIN_LATENCY_SAMPLES = 10
+# Delay of hedged requests when not enough latencies are known, in seconds
+DEFAULT_HEDGE_DELAY = 1.0
+
+
+class NodeHealth:
+    """
+    The health of a node, computed from the replies to its requests
+    """
+    def __init__(self):
+        self.latency = None
+        self.error_rate = 0.
+        self.last_success = None
+        self.requests = 0
+
+    def record_success(self, latency):
+        """
+        Record a request answered by the node
+        :param float latency: The duration of the request, in seconds
+        """
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate
+        self.last_success = time.time()
+        self.requests += 1
+
+    def record_failure(self):
+        """
+        Record a request which failed
+        """
+        self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+        self.requests += 1
+
+    @property
+    def score(self):
+        """
+        Get the expected cost of a request to the node. The lower, the better.
+        :rtype: float
+        """
+        latency = self.latency if self.latency is not None else DEFAULT_LATENCY
+        return latency * (1 + ERROR_PENALTY * self.error_rate)
+
+
+class NodesHealth:
+    """
+    The health of the nodes requested by a bma access,
+    used to prefer fast and healthy nodes
+    """
+    def __init__(self):
+        self._health = {}
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def get(self, node):
+        """
+        Get the health of a node
+        :param sakia.core.net.Node node: The node
+        :rtype: NodeHealth
+        """
+        if node.pubkey not in self._health:
+            self._health[node.pubkey] = NodeHealth()
+        return self._health[node.pubkey]
+
+    def record_success(self, node, latency):
+        """
+        Record a request answered by a node
+        :param sakia.core.net.Node node: The node
+        :param float latency: The duration of the request, in seconds
+        """
+        self.get(node).record_success(latency)
+        self._latencies.append(latency)
+
+    def record_failure(self, node):
+        """
+        Record a request which failed
+        :param sakia.core.net.Node node: The node
+        """
+        self.get(node).record_failure()
+
+    def hedge_delay(self):
+        """
+        Get the delay after which a hedged request is sent to a second node :
+        the HEDGE_PERCENTILE of the last latencies of all the nodes.
+        :return: The delay in seconds
+        :rtype: float
+        """
+        if len(self._latencies) < MIN_LATENCY_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * HEDGE_PERCENTILE))]
+
+    def choose(self, nodes, tried=()):
+        """
+        Choose a node with the power of two choices :
+        the best of two random nodes is selected.
+        Nodes already tried are avoided if other nodes are available.
+
+        :param list nodes: The nodes to choose from
+        :param tried: The nodes already tried for the current request
+        :return: The chosen node
+        :rtype: sakia.core.net.Node
+        """
+        candidates = [n for n in nodes if n not in tried] if tried else nodes
+        if not candidates:
+            candidates = nodes
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.sample(candidates, 2)
+        if self.get(second).score < self.get(first).score:
+            return second
+        return first
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from collections import defaultdict
+import aiohttp
+from aiohttp import hdrs
+
+# Maximum number of simultaneous connections to a node,
+# including its block and peer websockets
+LIMIT_PER_HOST = 6
+# Maximum number of simultaneous http requests of all the nodes
+MAX_CONNECTIONS = 30
+# Time an idle connection is kept open to be reused, in seconds
+KEEPALIVE_TIMEOUT = 60
+# Timeout to open a connection, in seconds
+CONN_TIMEOUT = 15
+
+
+class PooledConnector(aiohttp.TCPConnector):
+    """
+    A connector sharing a pool of keep-alive connections between
+    all the communities of an account.
+
+    The simultaneous connections are limited by host and in total.
+    Websockets are long lived connections : they are not counted
+    in the total limit.
+    """
+    def __init__(self, limit_per_host=LIMIT_PER_HOST, max_connections=MAX_CONNECTIONS,
+                 keepalive_timeout=KEEPALIVE_TIMEOUT, conn_timeout=CONN_TIMEOUT,
+                 use_dns_cache=True, loop=None):
+        """
+        Constructor of a connector
+
+        :param int limit_per_host: The maximum number of simultaneous connections to a host
+        :param int max_connections: The maximum number of simultaneous http connections
+        :param float keepalive_timeout: The time an idle connection is kept open, in seconds
+        :param float conn_timeout: The timeout to open a connection, in seconds
+        :param bool use_dns_cache: True to cache the resolution of the hosts names
+        :param loop: The event loop
+        """
+        # The limit of the base connector is not used : it keeps the waiters
+        # of the failed connections, which then block the host forever
+        super().__init__(keepalive_timeout=keepalive_timeout, conn_timeout=conn_timeout,
+                         use_dns_cache=use_dns_cache, loop=loop)
+        self.limit_per_host = limit_per_host
+        self.max_connections = max_connections
+        self._host_connections = defaultdict(lambda: asyncio.Semaphore(limit_per_host, loop=loop))
+        self._connections = asyncio.Semaphore(max_connections, loop=loop)
+        # The host of the acquired connections
+        self._hosts = {}
+        self._counted = set()
+        self._stats = {'created': 0, 'reused': 0}
+
+    @property
+    def stats(self):
+        """
+        Get the metrics of the connections
+
+        :return: the number of connections created, of connections reused
+        from the pool, of idle connections in the pool and of connections in use
+        :rtype: dict
+        """
+        stats = self._stats.copy()
+        stats['idle'] = sum([len(conns) for conns in self._conns.values()])
+        stats['acquired'] = sum([len(transports) for transports in self._acquired.values()])
+        return stats
+
+    async def connect(self, req):
+        key = (req.host, req.port, req.ssl)
+        counted = req.headers.get(hdrs.UPGRADE, "").lower() != "websocket"
+        await self._host_connections[key].acquire()
+        try:
+            if counted:
+                await self._connections.acquire()
+            try:
+                connection = await super().connect(req)
+            except BaseException:
+                if counted:
+                    self._connections.release()
+                raise
+        except BaseException:
+            self._host_connections[key].release()
+            raise
+        self._hosts[connection._transport] = key
+        if counted:
+            self._counted.add(connection._transport)
+        return connection
+
+    def _get(self, key):
+        transport, protocol = super()._get(key)
+        if transport is not None:
+            self._stats['reused'] += 1
+        return transport, protocol
+
+    async def _create_connection(self, req):
+        self._stats['created'] += 1
+        return await super()._create_connection(req)
+
+    def _release(self, key, req, transport, protocol, *, should_close=False):
+        if transport in self._hosts:
+            self._host_connections[self._hosts.pop(transport)].release()
+        if transport in self._counted:
+            self._counted.remove(transport)
+            self._connections.release()
+        super()._release(key, req, transport, protocol, should_close=should_close)
+
+    def close(self):
+        logging.debug("Connections : {0}".format(self.stats))
+        for key in self._hosts.values():
+            self._host_connections[key].release()
+        self._hosts.clear()
+        for transport in self._counted:
+            self._connections.release()
+        self._counted.clear()
+        return super().close()
+
+
+def create_session(**kwargs):
+    """
+    Create a client session using a pooled connector
+
+    :param kwargs: The parameters of the PooledConnector
+    :return: The client session
+    :rtype: aiohttp.ClientSession
+    """
+    return aiohttp.ClientSession(connector=PooledConnector(**kwargs))
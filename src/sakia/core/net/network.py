@@ -4,6 +4,8 @@ Created on 24 févr. 2015
 @author: inso
 """
 from .node import Node
+from .scheduler import RefreshScheduler
+from .connector import create_session
 from ...tools.exceptions import InvalidNodeCurrency
 from ...tools.decorators import asyncify
 import logging
@@ -13,7 +15,6 @@ import asyncio
 from duniterpy.documents import Peer,  Block, BlockUID, MalformedDocumentError
 from duniterpy.key import VerifyingKey
 from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QTimer
-from collections import Counter
 
 MAX_CONFIRMATIONS = 6
 
@@ -38,6 +39,15 @@ class Network(QObject):
         super().__init__()
         self._root_nodes = nodes
         self._nodes = []
+        self._nodes_by_pubkey = {}
+        self._nodes_by_state = None
+        self._online_nodes = None
+        # hash -> online nodes with this block, and the block data
+        self._nodes_by_block = {}
+        self._blocks_data = {}
+        # node -> hash of the block counted for this node
+        self._counted_blocks = {}
+        self._synced_block_hash = None
         for n in nodes:
             self.add_node(n)
         self.currency = currency
@@ -46,6 +56,8 @@ class Network(QObject):
         self._timer = QTimer()
         self._client_session = session
         self._discovery_stack = []
+        self._discovery_signatures = set()
+        self._refresh_scheduler = RefreshScheduler()
 
     @classmethod
     def create(cls, node):
@@ -71,11 +83,11 @@ class Network(QObject):
         for data in json_data:
             try:
                 node = Node.from_json(self.currency, data, file_version, self.session)
-                if node.pubkey not in [n.pubkey for n in self.nodes]:
+                other_node = self.node_by_pubkey(node.pubkey)
+                if not other_node:
                     self.add_node(node)
                     logging.debug("Loading : {:}".format(data['pubkey']))
                 else:
-                    other_node = [n for n in self.nodes if n.pubkey == node.pubkey][0]
                     other_node._uid = node.uid
                     other_node._version = node.version
                     other_node._software = node.software
@@ -90,19 +102,22 @@ class Network(QObject):
                         other_node.set_block(node.block)
                         other_node.last_change = node.last_change
                         other_node.state = node.state
+                        self._count_block(other_node)
             except MalformedDocumentError:
                 logging.debug("Could not load node {0}".format(data))
 
     @classmethod
-    def from_json(cls, currency, json_data, file_version):
+    def from_json(cls, currency, json_data, file_version, session=None):
         """
         Load a network from a configured community
 
         :param str currency: The currency name of a community
         :param dict json_data: A json_data view of a network
         :param NormalizedVersion file_version: the version of the json file
+        :param aiohttp.ClientSession session: The client session shared with the other networks
         """
-        session = aiohttp.ClientSession()
+        if session is None:
+            session = create_session()
         nodes = []
         for data in json_data:
             try:
@@ -149,6 +164,7 @@ class Network(QObject):
         Stop network nodes crawling.
         """
         self._must_crawl = False
+        self._refresh_scheduler.cancel()
         close_tasks = []
         logging.debug("Start closing")
         for node in self.nodes:
@@ -156,31 +172,77 @@ class Network(QObject):
         logging.debug("Closing {0} websockets".format(len(close_tasks)))
         if len(close_tasks) > 0:
             await asyncio.wait(close_tasks, timeout=15)
-        if closing:
-            logging.debug("Closing client session")
-            await self._client_session.close()
+        # the client session is shared with the other networks of the account, which closes it
         logging.debug("Closed")
 
     @property
     def session(self):
         return self._client_session
 
+    @property
+    def refresh_scheduler(self):
+        """
+        Get the scheduler of the nodes refresh, exposing its queue depth and cycle latency
+        """
+        return self._refresh_scheduler
+
     def continue_crawling(self):
         return self._must_crawl
 
+    def _index_states(self):
+        """
+        Build the index of the nodes by state.
+        The index is invalidated each time a node changes.
+        """
+        if self._nodes_by_state is None:
+            nodes_by_state = {}
+            online_nodes = []
+            for n in self._nodes:
+                nodes_by_state.setdefault(n.state, []).append(n)
+                if n.state in (Node.ONLINE, Node.DESYNCED):
+                    online_nodes.append(n)
+            self._nodes_by_state = nodes_by_state
+            self._online_nodes = online_nodes
+
+    def _invalidate_states(self):
+        self._nodes_by_state = None
+        self._online_nodes = None
+
+    def nodes_in_state(self, state):
+        """
+        Get nodes which are in a given state.
+        The returned list must not be modified.
+
+        :param int state: The state of the nodes
+        :rtype: list[sakia.core.net.Node]
+        """
+        self._index_states()
+        return self._nodes_by_state.get(state, [])
+
     @property
     def synced_nodes(self):
         """
         Get nodes which are in the ONLINE state.
         """
-        return [n for n in self.nodes if n.state == Node.ONLINE]
+        return self.nodes_in_state(Node.ONLINE)
 
     @property
     def online_nodes(self):
         """
-        Get nodes which are in the ONLINE state.
+        Get nodes which are in the ONLINE or DESYNCED state.
+        """
+        self._index_states()
+        return self._online_nodes
+
+    def node_by_pubkey(self, pubkey):
+        """
+        Get a known node from its pubkey
+
+        :param str pubkey: The pubkey of the node
+        :return: The node or None if the node is not known
+        :rtype: sakia.core.net.Node
         """
-        return [n for n in self.nodes if n.state in (Node.ONLINE, Node.DESYNCED)]
+        return self._nodes_by_pubkey.get(pubkey)
 
     @property
     def nodes(self):
@@ -202,35 +264,67 @@ class Network(QObject):
         Get the latest block considered valid
         It is the most frequent last block of every known nodes
         """
-        blocks = [n.block for n in self.synced_nodes if n.block]
-        if len(blocks) > 0:
-            return BlockUID(blocks[0]['number'], blocks[0]['hash'])
+        block = next((n.block for n in self.synced_nodes if n.block), None)
+        if block:
+            return BlockUID(block['number'], block['hash'])
         else:
             return BlockUID.empty()
 
-    def _check_nodes_sync(self):
-        """
-        Check nodes sync with the following rules :
+    def _count_block(self, node):
+        """
+        Update the count of the nodes by block with the current block of a node
+        :param sakia.core.net.Node node: The node
+        :return: True if the counted block of the node changed
+        :rtype: bool
+        """
+        block_hash = None
+        if node.block and node.state in (Node.ONLINE, Node.DESYNCED) \
+                and self._nodes_by_pubkey.get(node.pubkey) is node:
+            block_hash = node.block['hash']
+        previous_hash = self._counted_blocks.get(node)
+        if previous_hash == block_hash:
+            return False
+
+        if previous_hash:
+            self._counted_blocks.pop(node)
+            nodes = self._nodes_by_block[previous_hash]
+            nodes.discard(node)
+            if not nodes:
+                self._nodes_by_block.pop(previous_hash)
+                self._blocks_data.pop(previous_hash)
+        if block_hash:
+            self._counted_blocks[node] = block_hash
+            self._nodes_by_block.setdefault(block_hash, set()).add(node)
+            self._blocks_data[block_hash] = node.block
+        return True
+
+    def _count_blocks(self):
+        """
+        Count the nodes by block from scratch
+        """
+        self._nodes_by_block = {}
+        self._blocks_data = {}
+        self._counted_blocks = {}
+        for n in self._nodes:
+            self._count_block(n)
+
+    def _synced_hash(self):
+        """
+        Get the hash of the block considered valid with the following rules :
         1 : The block of the majority
         2 : The more last different issuers
         3 : The more difficulty
         4 : The biggest number or timestamp
+        :return: the hash of the block or None if no online node knows a block
+        :rtype: str
         """
         # rule number 1 : block of the majority
-        blocks = [n.block['hash'] for n in self.online_nodes if n.block]
-        blocks_occurences = Counter(blocks)
         blocks_by_occurences = {}
-        for key, value in blocks_occurences.items():
-            the_block = [n.block for n in self.online_nodes if n.block and n.block['hash'] == key][0]
-            if value not in blocks_by_occurences:
-                blocks_by_occurences[value] = [the_block]
-            else:
-                blocks_by_occurences[value].append(the_block)
+        for block_hash, nodes in self._nodes_by_block.items():
+            blocks_by_occurences.setdefault(len(nodes), []).append(self._blocks_data[block_hash])
 
         if len(blocks_by_occurences) == 0:
-            for n in [n for n in self.online_nodes if n.state in (Node.ONLINE, Node.DESYNCED)]:
-                n.state = Node.ONLINE
-            return
+            return None
 
         most_present = max(blocks_by_occurences.keys())
 
@@ -254,32 +348,66 @@ class Network(QObject):
                     for block in blocks_by_powmin[bigger_powmin]:
                         blocks_by_ts[block['time']] = block
                     latest_ts = max(blocks_by_ts.keys())
-                    synced_block_hash = blocks_by_ts[latest_ts]['hash']
+                    return blocks_by_ts[latest_ts]['hash']
                 else:
-                    synced_block_hash = blocks_by_powmin[bigger_powmin][0]['hash']
+                    return blocks_by_powmin[bigger_powmin][0]['hash']
             else:
-                synced_block_hash = blocks_by_issuers[most_issuers][0]['hash']
+                return blocks_by_issuers[most_issuers][0]['hash']
+        else:
+            return blocks_by_occurences[most_present][0]['hash']
+
+    def _check_nodes_sync(self, node=None):
+        """
+        Check nodes sync, from the count of the online nodes by block.
+        Only the states of the nodes whose sync changed are updated.
+
+        :param sakia.core.net.Node node: The node which changed, None to check all the nodes
+        """
+        if node:
+            self._count_block(node)
         else:
-            synced_block_hash = blocks_by_occurences[most_present][0]['hash']
+            self._count_blocks()
+        synced_hash = self._synced_hash()
 
-        for n in self.online_nodes:
-            if n.block and n.block['hash'] == synced_block_hash:
+        if synced_hash is None:
+            self._synced_block_hash = None
+            for n in [n for n in self.online_nodes if n.state == Node.DESYNCED]:
                 n.state = Node.ONLINE
-            else:
-                n.state = Node.DESYNCED
+            return
+
+        if node is None:
+            self._synced_block_hash = synced_hash
+            changed_nodes = list(self.online_nodes)
+        elif synced_hash != self._synced_block_hash:
+            previous_hash = self._synced_block_hash
+            self._synced_block_hash = synced_hash
+            changed_nodes = list(self._nodes_by_block.get(previous_hash, ())) \
+                            + list(self._nodes_by_block[synced_hash]) + [node]
+        else:
+            changed_nodes = [node]
+
+        for n in changed_nodes:
+            if n.state in (Node.ONLINE, Node.DESYNCED):
+                if self._counted_blocks.get(n) == self._synced_block_hash:
+                    n.state = Node.ONLINE
+                else:
+                    n.state = Node.DESYNCED
 
     def _check_nodes_unique(self):
         """
         Check that all nodes are unique by them pubkeys
         """
-        pubkeys = set()
+        nodes_by_pubkey = {}
         unique_nodes = []
         for n in self.nodes:
-            if n.pubkey not in pubkeys:
+            if n.pubkey not in nodes_by_pubkey:
                 unique_nodes.append(n)
-                pubkeys.add(n.pubkey)
+                nodes_by_pubkey[n.pubkey] = n
 
         self._nodes = unique_nodes
+        self._nodes_by_pubkey = nodes_by_pubkey
+        self._invalidate_states()
+        self._count_blocks()
 
     def confirmations(self, block_number):
         """
@@ -300,6 +428,8 @@ class Network(QObject):
         Add a nod to the network.
         """
         self._nodes.append(node)
+        self._nodes_by_pubkey.setdefault(node.pubkey, node)
+        self._invalidate_states()
         node.changed.connect(self.handle_change)
         node.error.connect(self.handle_error)
         node.identity_changed.connect(self.handle_identity_change)
@@ -346,16 +476,10 @@ class Network(QObject):
         To stop this crawling, call "stop_crawling" method.
         """
         self._must_crawl = True
-        first_loop = True
         asyncio.ensure_future(self.pop_discovery_stack())
         while self.continue_crawling():
-            for node in self.nodes:
-                if self.continue_crawling():
-                    node.refresh()
-                    if not first_loop:
-                        await asyncio.sleep(15)
-            first_loop = False
-            await asyncio.sleep(15)
+            self._refresh_scheduler.schedule(self.nodes)
+            await asyncio.sleep(1)
 
         logging.debug("End of network discovery")
 
@@ -368,18 +492,19 @@ class Network(QObject):
             try:
                 await asyncio.sleep(1)
                 peer = self._discovery_stack.pop()
-                pubkeys = [n.pubkey for n in self.nodes]
-                if peer.pubkey not in pubkeys:
+                self._discovery_signatures.discard(peer.signatures[0])
+                node = self.node_by_pubkey(peer.pubkey)
+                if not node:
                     logging.debug("New node found : {0}".format(peer.pubkey[:5]))
                     try:
                         node = Node.from_peer(self.currency, peer, self.session)
                         node.refresh(manual=True)
                         self.add_node(node)
+                        self._refresh_scheduler.postpone(node)
                         self.nodes_changed.emit()
                     except InvalidNodeCurrency as e:
                         logging.debug(str(e))
                 else:
-                    node = [n for n in self.nodes if n.pubkey == peer.pubkey][0]
                     if node.peer.blockUID.number < peer.blockUID.number:
                         logging.debug("Update node : {0}".format(peer.pubkey[:5]))
                         node.peer = peer
@@ -390,9 +515,10 @@ class Network(QObject):
         key = VerifyingKey(peer.pubkey)
         if key.verify_document(peer):
             if len(self._discovery_stack) < 1000 \
-                and peer.signatures[0] not in [p.signatures[0] for p in self._discovery_stack]:
+                and peer.signatures[0] not in self._discovery_signatures:
                 logging.debug("Stacking new peer document : {0}".format(peer.pubkey))
                 self._discovery_stack.append(peer)
+                self._discovery_signatures.add(peer.signatures[0])
         else:
             logging.debug("Wrong document received : {0}".format(peer.signed_raw()))
 
@@ -410,16 +536,22 @@ class Network(QObject):
         if node.state in (Node.OFFLINE, Node.CORRUPTED) and \
                                 node.last_change + 3600 < time.time():
             node.disconnect()
-            self.nodes.remove(node)
+            self._nodes.remove(node)
+            if self._nodes_by_pubkey.get(node.pubkey) is node:
+                self._nodes_by_pubkey.pop(node.pubkey)
+            self._invalidate_states()
+            self._count_block(node)
             self.nodes_changed.emit()
 
     @pyqtSlot()
     def handle_change(self):
         node = self.sender()
+        self._invalidate_states()
 
-        if node.state in (Node.ONLINE, Node.DESYNCED):
-            self._check_nodes_sync()
-        self._check_nodes_unique()
+        if node.state in (Node.ONLINE, Node.DESYNCED) or self._count_block(node):
+            self._check_nodes_sync(node)
+        if len(self._nodes_by_pubkey) != len(self._nodes):
+            self._check_nodes_unique()
         self.nodes_changed.emit()
 
         if node.state == Node.ONLINE:
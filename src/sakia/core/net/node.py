@@ -65,7 +65,6 @@ class Node(QObject):
         self._software = software
         self._version = version
         self._fork_window = fork_window
-        self._refresh_counter = 19
         self._ws_tasks = {'block': None,
                     'peer': None}
         self._connected = {'block': False,
@@ -327,6 +326,8 @@ class Node(QObject):
         """
         Refresh all data of this node
         :param bool manual: True if the refresh was manually initiated
+        :return: The tasks refreshing the informations of the node
+        :rtype: list[asyncio.Task]
         """
         if not self._ws_tasks['block']:
             self._ws_tasks['block'] = asyncio.ensure_future(self.connect_current_block())
@@ -337,13 +338,9 @@ class Node(QObject):
         if manual:
             asyncio.ensure_future(self.request_peers())
 
-        if self._refresh_counter % 20 == 0 or manual:
-            self.refresh_informations()
-            self.refresh_uid()
-            self.refresh_summary()
-            self._refresh_counter = self._refresh_counter if manual else 1
-        else:
-            self._refresh_counter += 1
+        return [self.refresh_informations(),
+                self.refresh_uid(),
+                self.refresh_summary()]
 
     async def connect_current_block(self):
         """
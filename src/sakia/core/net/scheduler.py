@@ -0,0 +1,145 @@
+from .node import Node
+import asyncio
+import logging
+import time
+
+# Maximum number of nodes refreshed at once
+MAX_PARALLEL_REFRESH = 5
+# Interval between two refreshes of an online node, in seconds
+ONLINE_REFRESH_INTERVAL = 30
+# Interval between two refreshes of the other reachable nodes, in seconds
+REFRESH_INTERVAL = 300
+# Bounds of the exponential backoff of unreachable nodes, in seconds
+MIN_BACKOFF = 60
+MAX_BACKOFF = 3600
+# Maximum duration of a node refresh, in seconds
+REFRESH_TIMEOUT = 60
+
+
+class RefreshScheduler:
+    """
+    Schedule the refresh of the nodes of a network with a bounded parallelism.
+
+    Online nodes are refreshed often, the other reachable nodes at a slower
+    regular interval, while offline and corrupted nodes are refreshed with
+    an exponential backoff.
+    """
+    def __init__(self, max_parallel=MAX_PARALLEL_REFRESH):
+        """
+        Constructor of a scheduler
+
+        :param int max_parallel: The maximum number of nodes refreshed at once
+        """
+        self.max_parallel = max_parallel
+        self._next_refresh = {}
+        self._backoff = {}
+        self._running = {}
+        self._cycle_nodes = set()
+        self._cycle_start = None
+        self._cycle_latency = None
+
+    @property
+    def queue_depth(self):
+        """
+        Get the number of nodes waiting for a refresh slot
+        :rtype: int
+        """
+        now = time.time()
+        return len([n for n, t in self._next_refresh.items() if t <= now and n not in self._running])
+
+    @property
+    def running(self):
+        """
+        Get the number of nodes being refreshed
+        :rtype: int
+        """
+        return len(self._running)
+
+    @property
+    def cycle_latency(self):
+        """
+        Get the duration of the last complete refresh cycle over all the nodes
+        :return: the duration in seconds or None if no cycle was completed
+        :rtype: float
+        """
+        return self._cycle_latency
+
+    def interval(self, node):
+        """
+        Get the interval before the next refresh of a node
+        :param sakia.core.net.Node node: The node
+        :return: The interval in seconds
+        :rtype: float
+        """
+        if node.state in (Node.OFFLINE, Node.CORRUPTED):
+            return self._backoff.get(node, MIN_BACKOFF)
+        elif node.state == Node.ONLINE:
+            return ONLINE_REFRESH_INTERVAL
+        return REFRESH_INTERVAL
+
+    def postpone(self, node):
+        """
+        Postpone the next refresh of a node which was just refreshed
+        :param sakia.core.net.Node node: The node
+        """
+        self._next_refresh[node] = time.time() + self.interval(node)
+
+    def _refreshed(self, node):
+        if node.state in (Node.OFFLINE, Node.CORRUPTED):
+            if node in self._backoff:
+                self._backoff[node] = min(self._backoff[node] * 2, MAX_BACKOFF)
+            else:
+                self._backoff[node] = MIN_BACKOFF
+        else:
+            self._backoff.pop(node, None)
+        if node in self._next_refresh:
+            self.postpone(node)
+
+        self._cycle_nodes.discard(node)
+        if not self._cycle_nodes and self._cycle_start:
+            self._cycle_latency = time.time() - self._cycle_start
+            logging.debug("Nodes refresh cycle finished in {0:.1f}s".format(self._cycle_latency))
+            self._cycle_start = None
+
+    async def _refresh(self, node):
+        try:
+            tasks = node.refresh()
+            if tasks:
+                done, pending = await asyncio.wait(tasks, timeout=REFRESH_TIMEOUT)
+                for task in pending:
+                    task.cancel()
+        finally:
+            self._running.pop(node, None)
+            self._refreshed(node)
+
+    def schedule(self, nodes):
+        """
+        Start the refresh of the nodes which are due, within the parallelism bound
+
+        :param list nodes: The nodes of the network
+        """
+        now = time.time()
+        known = set(nodes)
+        for node in [n for n in self._next_refresh if n not in known]:
+            self._next_refresh.pop(node)
+            self._backoff.pop(node, None)
+            self._cycle_nodes.discard(node)
+        for node in nodes:
+            if node not in self._next_refresh:
+                self._next_refresh[node] = now
+
+        if not self._cycle_start:
+            self._cycle_start = now
+            self._cycle_nodes = set(nodes)
+
+        due = sorted([n for n, t in self._next_refresh.items() if t <= now and n not in self._running],
+                     key=lambda n: self._next_refresh[n])
+        for node in due[:max(0, self.max_parallel - len(self._running))]:
+            self._running[node] = asyncio.ensure_future(self._refresh(node))
+
+    def cancel(self):
+        """
+        Cancel the running refreshes
+        """
+        for task in list(self._running.values()):
+            task.cancel()
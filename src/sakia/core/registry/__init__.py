@@ -1,2 +1,3 @@
 from .identities import IdentitiesRegistry
-from .identity import Identity, LocalState, BlockchainState
\ No newline at end of file
+from .identity import Identity, LocalState, BlockchainState
+from .members_index import MembersIndex
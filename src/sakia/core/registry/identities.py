@@ -3,9 +3,18 @@ from duniterpy.documents import BlockUID
 from .identity import Identity, LocalState, BlockchainState
 from pkg_resources import parse_version
 import asyncio
+import logging
+import time
 from aiohttp.errors import ClientError
 from ...tools.exceptions import NoPeerAvailable
 
+# Maximum number of identities looked up concurrently
+MAX_PARALLEL_FINDS = 5
+# Time during which a pubkey which was not found is not looked up again, in seconds
+NOT_FOUND_TTL = 3600
+# Number of blocks after which a known identity is refreshed in the background
+REFRESH_BLOCKS = 288
+
 
 class IdentitiesRegistry:
     """
@@ -20,6 +29,9 @@ class IdentitiesRegistry:
         :rtype: IdentitiesRegistry
         """
         self._instances = instances
+        # The (time, block number) of the last lookup of the identities, by currency and pubkey
+        self._checks = {}
+        self._resolving = {}
 
     def load_json(self, json_data):
         """
@@ -37,15 +49,28 @@ class IdentitiesRegistry:
                     person = Identity.from_json(person_data, version)
                     instances[currency][person.pubkey] = person
         self._instances = instances
+        self._checks = {}
+        for currency in json_data.get('checks', {}):
+            self._checks[currency] = {}
+            for pubkey, check in json_data['checks'][currency].items():
+                self._checks[currency][pubkey] = tuple(check)
 
     def jsonify(self):
         communities_json = {}
+        checks_json = {}
         for currency in self._instances:
             identities_json = []
+            currency_checks = self._checks.get(currency, {})
             for identity in self._instances[currency].values():
+                # the pubkeys which were not found are forgotten once their miss expired
+                if identity.local_state == LocalState.NOT_FOUND \
+                        and not self._miss_valid(currency_checks.get(identity.pubkey)):
+                    continue
                 identities_json.append(identity.jsonify())
             communities_json[currency] = identities_json
-        return {'registry': communities_json}
+            checks_json[currency] = {p: list(c) for p, c in currency_checks.items()
+                                     if p in self._instances[currency]}
+        return {'registry': communities_json, 'checks': checks_json}
 
     def _identities(self, community):
         """
@@ -61,6 +86,24 @@ class IdentitiesRegistry:
             self._instances[community.currency] = {}
             return self._identities(community)
 
+    def _check(self, community, pubkey):
+        """
+        Record that an identity was just looked up
+        :param sakia.core.Community community: the community
+        :param str pubkey: the pubkey of the identity
+        """
+        checks = self._checks.setdefault(community.currency, {})
+        checks[pubkey] = (time.time(), community.network.current_blockUID.number)
+
+    @staticmethod
+    def _miss_valid(check):
+        """
+        :param tuple check: The (time, block number) of the last lookup of a pubkey which was not found
+        :return: True if the pubkey should not be looked up again yet
+        :rtype: bool
+        """
+        return check is not None and time.time() - check[0] < NOT_FOUND_TTL
+
     async def _find_by_lookup(self, pubkey, community):
         identity = self._identities(community)[pubkey]
         lookup_tries = 0
@@ -90,42 +133,124 @@ class IdentitiesRegistry:
                 return identity
         return identity
 
+    async def _resolve(self, identity, community):
+        """
+        Request the data of an identity from the network
+
+        :param sakia.core.registry.Identity identity: The identity to resolve
+        :param sakia.core.Community community: The community where we look for the identity
+        :return: The identity
+        :rtype: sakia.core.registry.Identity
+        """
+        tries = 0
+        while tries < 3:
+            try:
+                data = await community.bma_access.simple_request(bma.blockchain.Membership,
+                                                                 req_args={'search': identity.pubkey})
+                identity.uid = data['uid']
+                identity.sigdate = BlockUID.from_str(data['sigDate'])
+                if identity.local_state == LocalState.NOT_FOUND:
+                    identity.local_state = LocalState.PARTIAL
+                identity.blockchain_state = BlockchainState.VALIDATED
+                break
+            except errors.DuniterError as e:
+                if e.ucode == errors.NO_MEMBER_MATCHING_PUB_OR_UID:
+                    identity = await self._find_by_lookup(identity.pubkey, community)
+                    break
+                else:
+                    tries += 1
+            except asyncio.TimeoutError:
+                tries += 1
+            except ClientError:
+                tries += 1
+            except NoPeerAvailable:
+                # the network is unreachable : the identity is looked up again next time
+                return identity
+        self._check(community, identity.pubkey)
+        return identity
+
+    async def _resolve_once(self, identity, community):
+        """
+        Resolve an identity, sharing the requests with the concurrent resolutions
+        of the same identity
+        """
+        key = (community.currency, identity.pubkey)
+        if key not in self._resolving:
+            task = asyncio.ensure_future(self._resolve(identity, community))
+            self._resolving[key] = task
+            task.add_done_callback(lambda t: self._resolving.pop(key, None))
+        return await asyncio.shield(self._resolving[key])
+
     async def future_find(self, pubkey, community):
         """
+        Find an identity.
+        A pubkey which was not found is not looked up again before NOT_FOUND_TTL,
+        and a known identity is refreshed in the background every REFRESH_BLOCKS blocks.
 
         :param pubkey: The pubkey we look for
         :param community: The community where we look for the identity
         :return: The identity found
         :rtype: sakia.core.registry.Identity
         """
-        if pubkey in self._identities(community):
-            identity = self._identities(community)[pubkey]
+        identities = self._identities(community)
+        if pubkey in identities:
+            identity = identities[pubkey]
+            checks = self._checks.setdefault(community.currency, {})
+            if identity.local_state == LocalState.NOT_FOUND:
+                if not self._miss_valid(checks.get(pubkey)):
+                    identity = await self._resolve_once(identity, community)
+            elif pubkey not in checks:
+                self._check(community, pubkey)
+            else:
+                current_block = community.network.current_blockUID.number
+                checked_block = checks[pubkey][1]
+                # the height is unknown when no node is synced
+                if current_block is not None and checked_block is not None \
+                        and current_block - checked_block >= REFRESH_BLOCKS:
+                    # the known data is returned while it is refreshed
+                    asyncio.ensure_future(self._resolve_once(identity, community))
         else:
             identity = Identity.empty(pubkey)
-            self._identities(community)[pubkey] = identity
-            tries = 0
-            while tries < 3 and identity.local_state == LocalState.NOT_FOUND:
-                try:
-                    data = await community.bma_access.simple_request(bma.blockchain.Membership,
-                                                                          req_args={'search': pubkey})
-                    identity.uid = data['uid']
-                    identity.sigdate = BlockUID.from_str(data['sigDate'])
-                    identity.local_state = LocalState.PARTIAL
-                    identity.blockchain_state = BlockchainState.VALIDATED
-                except errors.DuniterError as e:
-                    if errors.NO_MEMBER_MATCHING_PUB_OR_UID:
-                        identity = await self._find_by_lookup(pubkey, community)
-                        return identity
-                    else:
-                        tries += 1
-                except asyncio.TimeoutError:
-                    tries += 1
-                except ClientError:
-                    tries += 1
-                except NoPeerAvailable:
-                    return identity
+            identities[pubkey] = identity
+            identity = await self._resolve_once(identity, community)
         return identity
 
+    async def find_many(self, pubkeys, community):
+        """
+        Find several identities at once.
+        Unknown members are found in the list of the members of the community,
+        and the other unknown identities are looked up concurrently.
+
+        :param list pubkeys: The pubkeys we look for
+        :param community: The community where we look for the identities
+        :return: The identities found by pubkey
+        :rtype: dict
+        """
+        identities = self._identities(community)
+        unknown = set([p for p in pubkeys if p not in identities])
+        if unknown:
+            try:
+                members = await community.bma_access.future_request(bma.wot.Members)
+                for member in members['results']:
+                    if member['pubkey'] in unknown:
+                        self.from_handled_data(member['uid'], member['pubkey'], None,
+                                               BlockchainState.VALIDATED, community)
+                        unknown.remove(member['pubkey'])
+            except errors.DuniterError as e:
+                logging.debug(str(e))
+            except NoPeerAvailable as e:
+                logging.debug(str(e))
+
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_FINDS)
+
+        async def find(pubkey):
+            async with semaphore:
+                await self.future_find(pubkey, community)
+
+        if unknown:
+            await asyncio.gather(*[find(p) for p in unknown])
+        return {p: identities[p] for p in pubkeys if p in identities}
+
     def from_handled_data(self, uid, pubkey, sigdate, blockchain_state, community):
         """
         Get a person from a metadata dict.
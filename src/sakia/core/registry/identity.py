@@ -6,6 +6,7 @@ Created on 11 févr. 2014
 
 import logging
 import time
+from collections import OrderedDict
 from enum import Enum
 from pkg_resources import parse_version
 
@@ -323,6 +324,7 @@ class Identity(QObject):
 
         try:
             data = await community.bma_access.future_request(bma.wot.Lookup, {'search': self.pubkey})
+            pending = []
             for result in data['results']:
                 if result["pubkey"] == self.pubkey:
                     self._refresh_uid(result['uids'])
@@ -337,10 +339,13 @@ class Identity(QObject):
                                                       None,
                                                       BlockchainState.BUFFERED,
                                                       community)
-                                certifier['cert_time'] = await community.time(certifier_data['meta']['block_number'])
                                 certifier['block_number'] = None
-
-                                certifiers.append(certifier)
+                                pending.append((certifier, certifier_data['meta']['block_number']))
+            # The times of the blocks of the pending certifications are requested at once
+            times = await community.times([number for certifier, number in pending])
+            for certifier, number in pending:
+                certifier['cert_time'] = times[number]
+                certifiers.append(certifier)
         except errors.DuniterError as e:
             if e.ucode in (errors.NO_MATCHING_IDENTITY, errors.NO_MEMBER_MATCHING_PUB_OR_UID):
                 logging.debug("Lookup error : {0}".format(str(e)))
@@ -380,6 +385,7 @@ class Identity(QObject):
 
         try:
             data = await community.bma_access.future_request(bma.wot.Lookup, {'search': self.pubkey})
+            pending = []
             for result in data['results']:
                 if result["pubkey"] == self.pubkey:
                     self._refresh_uid(result['uids'])
@@ -391,9 +397,13 @@ class Identity(QObject):
                                                                           BlockchainState.BUFFERED,
                                                                           community)
                         timestamp = BlockUID.from_str(certified_data['meta']['timestamp'])
-                        certified['cert_time'] = await community.time(timestamp.number)
                         certified['block_number'] = None
-                        certified_list.append(certified)
+                        pending.append((certified, timestamp.number))
+            # The times of the blocks of the pending certifications are requested at once
+            times = await community.times([number for certified, number in pending])
+            for certified, number in pending:
+                certified['cert_time'] = times[number]
+                certified_list.append(certified)
         except errors.DuniterError as e:
             if e.ucode in (errors.NO_MATCHING_IDENTITY, errors.NO_MEMBER_MATCHING_PUB_OR_UID):
                 logging.debug("Lookup error : {0}".format(str(e)))
@@ -410,36 +420,25 @@ class Identity(QObject):
         :return: The list of the certifiers of this community
         :rtype: list
         """
-        unique_valid = []
-        #  add certifiers of uid
-        for certifier in tuple(cert_list):
-            # add only valid certification...
-            try:
-                cert_expired = await community.certification_expired(certifier['cert_time'])
-            except NoPeerAvailable:
-                logging.debug("No peer available")
-                cert_expired = True
-
-            if not certifier['block_number']:
-                # add only valid certification...
-                try:
-                    cert_writable = await community.certification_writable(certifier['cert_time'])
-                except NoPeerAvailable:
-                    logging.debug("No peer available")
-                    cert_writable = False
-            else:
+        try:
+            validity = await community.certifications_validity([c['cert_time'] for c in cert_list])
+        except NoPeerAvailable:
+            logging.debug("No peer available")
+            return []
+
+        unique_valid = OrderedDict()
+        for certifier, (cert_expired, cert_writable) in zip(cert_list, validity):
+            # certifications written in the blockchain are always writable
+            if certifier['block_number']:
                 cert_writable = True
 
+            # add only valid certification...
             if not cert_expired and cert_writable:
                 # keep only the latest certification
-                already_found = [c['identity'].pubkey for c in unique_valid]
-                if certifier['identity'].pubkey in already_found:
-                    index = already_found.index(certifier['identity'].pubkey)
-                    if certifier['cert_time'] > unique_valid[index]['cert_time']:
-                        unique_valid[index] = certifier
-                else:
-                    unique_valid.append(certifier)
-        return unique_valid
+                pubkey = certifier['identity'].pubkey
+                if pubkey not in unique_valid or certifier['cert_time'] > unique_valid[pubkey]['cert_time']:
+                    unique_valid[pubkey] = certifier
+        return list(unique_valid.values())
 
     async def unique_valid_certifiers_of(self, identities_registry, community):
         """
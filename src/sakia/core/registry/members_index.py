@@ -0,0 +1,103 @@
+import bisect
+
+# Length of the substrings indexed to search inside the uids and pubkeys
+NGRAM_LENGTH = 3
+
+
+class MembersIndex:
+    """
+    A local index of the uids and pubkeys of the members of a community.
+
+    Searches shorter than NGRAM_LENGTH are answered with a prefix search in
+    the sorted keys, longer searches with the intersection of the trigrams
+    of the text. The index is updated incrementally from the list of members.
+    """
+    def __init__(self):
+        self._uids = {}
+        # Sorted (key, pubkey) couples, where the keys are the lowered uids and pubkeys
+        self._keys = []
+        # The pubkeys of the members by trigram of their keys
+        self._ngrams = {}
+
+    def __len__(self):
+        return len(self._uids)
+
+    def __contains__(self, pubkey):
+        return pubkey in self._uids
+
+    @staticmethod
+    def _member_keys(pubkey, uid):
+        return set([uid.lower(), pubkey.lower()])
+
+    @staticmethod
+    def _text_ngrams(text):
+        return set([text[i:i + NGRAM_LENGTH] for i in range(0, len(text) - NGRAM_LENGTH + 1)])
+
+    def _add(self, pubkey, uid):
+        self._uids[pubkey] = uid
+        for key in MembersIndex._member_keys(pubkey, uid):
+            bisect.insort(self._keys, (key, pubkey))
+            for ngram in MembersIndex._text_ngrams(key):
+                self._ngrams.setdefault(ngram, set()).add(pubkey)
+
+    def _remove(self, pubkey):
+        uid = self._uids.pop(pubkey)
+        keys = MembersIndex._member_keys(pubkey, uid)
+        for key in keys:
+            index = bisect.bisect_left(self._keys, (key, pubkey))
+            if index < len(self._keys) and self._keys[index] == (key, pubkey):
+                del self._keys[index]
+        ngrams = set()
+        for key in keys:
+            ngrams |= MembersIndex._text_ngrams(key)
+        for ngram in ngrams:
+            pubkeys = self._ngrams[ngram]
+            pubkeys.discard(pubkey)
+            if not pubkeys:
+                del self._ngrams[ngram]
+
+    def update(self, members):
+        """
+        Update the index with the current members of the community
+
+        :param list members: The members, as dicts with 'pubkey' and 'uid' keys
+        :return: The number of members added and removed
+        :rtype: tuple
+        """
+        members = {m['pubkey']: m['uid'] for m in members}
+        removed = [p for p in self._uids if members.get(p) != self._uids[p]]
+        for pubkey in removed:
+            self._remove(pubkey)
+        added = [p for p in members if p not in self._uids]
+        for pubkey in added:
+            self._add(pubkey, members[pubkey])
+        return len(added), len(removed)
+
+    def search(self, text):
+        """
+        Search the members whose uid or pubkey contains a text.
+        Searches shorter than NGRAM_LENGTH only match the start of the uids and pubkeys.
+
+        :param str text: The searched text
+        :return: The (pubkey, uid) of the matching members, sorted by uid
+        :rtype: list
+        """
+        text = text.lower()
+        if not text:
+            return []
+        if len(text) < NGRAM_LENGTH:
+            pubkeys = set()
+            index = bisect.bisect_left(self._keys, (text, ""))
+            while index < len(self._keys) and self._keys[index][0].startswith(text):
+                pubkeys.add(self._keys[index][1])
+                index += 1
+        else:
+            candidates = None
+            for ngram in sorted(MembersIndex._text_ngrams(text), key=lambda n: len(self._ngrams.get(n, ()))):
+                candidates = self._ngrams.get(ngram, set()) if candidates is None \
+                    else candidates & self._ngrams.get(ngram, set())
+                if not candidates:
+                    return []
+            pubkeys = [p for p in candidates
+                       if any([text in k for k in MembersIndex._member_keys(p, self._uids[p])])]
+        return sorted([(p, self._uids[p]) for p in pubkeys], key=lambda m: m[1].lower())
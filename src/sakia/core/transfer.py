@@ -35,6 +35,7 @@ class Transfer(QObject):
     """
     transfer_broadcasted = pyqtSignal(str)
     broadcast_error = pyqtSignal(int, str)
+    state_changed = pyqtSignal()
 
     def __init__(self, sha_hash, state, blockUID, metadata, locally_created):
         """
@@ -311,6 +312,7 @@ class Transfer(QObject):
                     if transition[1]:
                         transition[1](*inputs)
                     self.state = transition[2]
+                    self.state_changed.emit()
                     return True
         return False
 
@@ -2,12 +2,345 @@ import asyncio
 import logging
 import hashlib
 import math
+from collections import deque
 from duniterpy.documents import SimpleTransaction, Block, MalformedDocumentError
 from duniterpy.api import  bma, errors
 from .transfer import Transfer, TransferState
 from .net.network import MAX_CONFIRMATIONS
 from ..tools.exceptions import LookupFailureError, NoPeerAvailable
 
+# Maximum number of blocks requested at once
+BLOCKS_CHUNK = 50
+# Maximum number of blocks without transactions downloaded
+# to merge two ranges of blocks in one request
+BLOCKS_GAP = 10
+# Maximum number of blocks ranges requested concurrently
+MAX_PARALLEL_REQUESTS = 3
+# Maximum number of blocks read to find the blocks with transactions and dividends,
+# instead of downloading the complete list of the blocks with transactions
+INCREMENTAL_BLOCKS = 50
+# Maximum number of scanned blocks waiting to be read by the slowest wallet
+MAX_SCANNED_AHEAD = 100
+
+
+class BlocksPipeline:
+    """
+    Fetch and parse ranges of blocks ahead, with a bounded concurrency,
+    and deliver the block documents in chain order.
+    """
+    def __init__(self, fetch, ranges, max_parallel=MAX_PARALLEL_REQUESTS):
+        """
+        :param fetch: A coroutine function taking (start, count) and returning a dict of block documents
+        :param list ranges: The (start, count) ranges of blocks, in chain order
+        :param int max_parallel: The maximum number of ranges fetched concurrently
+        """
+        self._fetch = fetch
+        self._ranges = iter(ranges)
+        self._pending = deque()
+        self._docs = {}
+        for i in range(max_parallel):
+            self._schedule()
+
+    @staticmethod
+    def ranges(numbers, chunk=BLOCKS_CHUNK, gap=BLOCKS_GAP):
+        """
+        Group block numbers in contiguous ranges of blocks
+        :param list numbers: The blocks numbers
+        :param int chunk: The maximum count of blocks in a range
+        :param int gap: The maximum number of unneeded blocks between two needed blocks of a range
+        :return: The (start, count) ranges, in chain order
+        :rtype: list
+        """
+        ranges = []
+        for number in sorted(set(numbers)):
+            if ranges:
+                start, count = ranges[-1]
+                if number - start < chunk and number - (start + count) < gap:
+                    ranges[-1] = (start, number - start + 1)
+                    continue
+            ranges.append((number, 1))
+        return ranges
+
+    def _schedule(self):
+        try:
+            start, count = next(self._ranges)
+            self._pending.append(asyncio.ensure_future(self._fetch(start, count)))
+        except StopIteration:
+            pass
+
+    async def block_doc(self, number):
+        """
+        Get a block document. Block numbers must be requested in chain order.
+        :param int number: The block number
+        :return: The block document or None if it could not be fetched
+        :rtype: duniterpy.documents.Block
+        """
+        while number not in self._docs and len(self._pending) > 0:
+            docs = await self._pending.popleft()
+            self._schedule()
+            self._docs.update(docs)
+        return self._docs.pop(number, None)
+
+    def cancel(self):
+        """
+        Cancel the pending requests
+        """
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
+
+
+class BlocksScanner:
+    """
+    Walk the blocks with transactions once for all the wallets of an account.
+
+    Each block is fetched and parsed once, and its transactions are matched
+    against the pubkeys of all the wallets. The history of each wallet then
+    reads the blocks of its own range with the transactions matching its pubkey.
+    The scan starts when every wallet registered its range or skipped the refresh,
+    and waits for the slowest wallet when too many blocks were not read yet.
+    """
+    def __init__(self, community, pubkeys, max_ahead=MAX_SCANNED_AHEAD):
+        """
+        :param sakia.core.Community community: The community of the blocks
+        :param list pubkeys: The pubkeys of the wallets
+        :param int max_ahead: The maximum number of scanned blocks not read yet by all the wallets
+        """
+        self.community = community
+        self._pubkeys = set(pubkeys)
+        self._waiting = set(pubkeys)
+        self._ranges = {}
+        self._blocks_with_tx = asyncio.Future()
+        self._dividend_blocks = None
+        self._blocks = {}
+        self._consumers = {}
+        self._scanned = set()
+        self._scanned_ahead = asyncio.Semaphore(max_ahead)
+        self._task = None
+
+    @staticmethod
+    async def get_block_doc(community, number):
+        """
+        Retrieve a block document
+        :param sakia.core.Community community: The community we look for a block
+        :param int number: The block number to retrieve
+        :return: the block doc or None if no block was found
+        """
+        block_doc = community.bma_access.block_doc(number)
+        if block_doc:
+            return block_doc
+        tries = 0
+        block = None
+        while block is None and tries < 3:
+            try:
+                block = await community.bma_access.future_request(bma.blockchain.Block,
+                                      req_args={'number': number})
+                signed_raw = "{0}{1}\n".format(block['raw'],
+                                           block['signature'])
+                try:
+                    block_doc = Block.from_signed_raw(signed_raw)
+                except TypeError:
+                    logging.debug("Error in {0}".format(number))
+                    block = None
+                    tries += 1
+            except errors.DuniterError as e:
+                if e.ucode == errors.BLOCK_NOT_FOUND:
+                    block = None
+                    tries += 1
+        return block_doc
+
+    def register(self, pubkey, block_from, block_to):
+        """
+        Register the range of blocks to scan for a wallet
+        :param str pubkey: The wallet pubkey
+        :param int block_from: The first block number to scan
+        :param int block_to: The last block number to scan
+        """
+        self._ranges[pubkey] = (block_from, block_to)
+        self._ready(pubkey)
+
+    def skip(self, pubkey):
+        """
+        Declare that a wallet does not need to scan the blocks.
+        Has no effect if the wallet already registered its range.
+        :param str pubkey: The wallet pubkey
+        """
+        self._ready(pubkey)
+
+    def _ready(self, pubkey):
+        if pubkey in self._waiting:
+            self._waiting.remove(pubkey)
+            if not self._waiting and self._ranges:
+                self._task = asyncio.ensure_future(self._scan())
+
+    async def blocks_with_tx(self):
+        """
+        Get the numbers of the scanned blocks containing transactions
+        :rtype: set
+        """
+        return await asyncio.shield(self._blocks_with_tx)
+
+    @property
+    def dividend_blocks(self):
+        """
+        Get the numbers of the scanned blocks containing a dividend,
+        once the blocks with transactions are known
+        :return: the blocks numbers or None if they are not known
+        :rtype: set
+        """
+        return self._dividend_blocks
+
+    async def block(self, pubkey, number):
+        """
+        Get a scanned block
+        :param str pubkey: The wallet pubkey
+        :param int number: The block number
+        :return: the block document, or None if it could not be fetched,
+        and the simple transactions of the block matching the wallet pubkey
+        :rtype: tuple
+        """
+        if number not in self._blocks:
+            return None, []
+        future = self._blocks[number]
+        block_doc, matches = await asyncio.shield(future)
+        self._consume(pubkey, number)
+        return block_doc, matches.get(pubkey, [])
+
+    def release(self, pubkey):
+        """
+        Declare that a wallet will not read the blocks anymore.
+        Its blocks which were not read yet are released.
+        :param str pubkey: The wallet pubkey
+        """
+        for number in list(self._consumers.keys()):
+            self._consume(pubkey, number)
+
+    def _consume(self, pubkey, number):
+        # The block is released when all the wallets read it
+        if number in self._consumers:
+            self._consumers[number].discard(pubkey)
+            if not self._consumers[number]:
+                self._blocks.pop(number)
+                self._consumers.pop(number)
+                if number in self._scanned:
+                    self._scanned.remove(number)
+                    self._scanned_ahead.release()
+
+    def _match(self, block_doc):
+        matches = {}
+        for tx in block_doc.transactions:
+            if not SimpleTransaction.is_simple(tx):
+                continue
+            pubkeys = set(tx.issuers)
+            pubkeys.update([o.conditions.left.pubkey for o in tx.outputs])
+            for pubkey in pubkeys & self._pubkeys:
+                matches.setdefault(pubkey, []).append(tx)
+        return matches
+
+    async def _scan(self):
+        block_from = min([r[0] for r in self._ranges.values()])
+        block_to = max([r[1] for r in self._ranges.values()])
+        pipeline = None
+        try:
+            numbers, self._dividend_blocks = await self._tx_blocks(block_from, block_to)
+            numbers = sorted(set(numbers))
+            # Only the blocks in the range of a wallet are scanned
+            numbers = [n for n in numbers if any([r[0] <= n <= r[1] for r in self._ranges.values()])]
+            for n in numbers:
+                self._blocks[n] = asyncio.Future()
+                self._consumers[n] = set([p for p, r in self._ranges.items() if r[0] <= n <= r[1]])
+            blocks_with_tx = set(numbers)
+            self._blocks_with_tx.set_result(blocks_with_tx)
+            # Blocks are fetched ahead by ranges, and parsed in chain order
+            pipeline = BlocksPipeline(lambda start, count: self._fetch_block_docs(start, count, blocks_with_tx),
+                                      BlocksPipeline.ranges(numbers))
+            for n in numbers:
+                block_doc = await pipeline.block_doc(n)
+                # The scan waits for the slowest wallet to read the blocks scanned ahead
+                await self._scanned_ahead.acquire()
+                if n in self._blocks:
+                    self._scanned.add(n)
+                    self._blocks[n].set_result((block_doc, self._match(block_doc) if block_doc else {}))
+                else:
+                    # All the wallets released the block
+                    self._scanned_ahead.release()
+        except Exception as e:
+            if not self._blocks_with_tx.done():
+                self._blocks_with_tx.set_exception(e)
+            else:
+                logging.debug(str(e))
+        finally:
+            if pipeline:
+                pipeline.cancel()
+            if not self._blocks_with_tx.done():
+                self._blocks_with_tx.cancel()
+            for future in self._blocks.values():
+                if not future.done():
+                    future.set_result((None, {}))
+
+    async def _tx_blocks(self, block_from, block_to):
+        """
+        Get the numbers of the blocks with transactions of a range.
+        Short ranges are read from the blocks themselves, which are stored
+        locally most of the time, instead of downloading the complete
+        list of the blocks with transactions.
+
+        :param int block_from: The first block number
+        :param int block_to: The last block number
+        :return: the numbers of the blocks with transactions, and the numbers
+        of the blocks with a dividend or None if they are not known
+        :rtype: tuple
+        """
+        count = block_to - block_from + 1
+        if count <= INCREMENTAL_BLOCKS:
+            try:
+                blocks = await self.community.bma_access.future_blocks(block_from, count)
+            except (errors.DuniterError, NoPeerAvailable) as e:
+                logging.debug(str(e))
+                blocks = []
+            if len(blocks) == count:
+                return ([b['number'] for b in blocks if b['transactions']],
+                        set([b['number'] for b in blocks if b['dividend']]))
+        with_tx_data = await self.community.bma_access.future_request(bma.blockchain.TX)
+        return [n for n in with_tx_data['result']['blocks'] if block_from <= n <= block_to], None
+
+    async def _fetch_block_docs(self, start, count, numbers):
+        """
+        Retrieve the documents of a range of blocks
+        :param int start: The first block number of the range
+        :param int count: The number of blocks of the range
+        :param set numbers: The numbers of the blocks to parse
+        :return: the block docs by block number
+        :rtype: dict
+        """
+        block_docs = {}
+        wanted = [n for n in range(start, start + count) if n in numbers]
+        try:
+            blocks = await self.community.bma_access.future_blocks(start, count)
+        except (errors.DuniterError, NoPeerAvailable) as e:
+            logging.debug(str(e))
+            blocks = []
+        for block in blocks:
+            if block['number'] in numbers:
+                block_doc = self.community.bma_access.block_doc(block['number'])
+                if block_doc is None:
+                    signed_raw = "{0}{1}\n".format(block['raw'],
+                                                   block['signature'])
+                    try:
+                        block_doc = Block.from_signed_raw(signed_raw)
+                    except TypeError:
+                        logging.debug("Error in {0}".format(block['number']))
+                if block_doc:
+                    block_docs[block['number']] = block_doc
+                # Let other coroutines run between two parsed blocks
+                await asyncio.sleep(0)
+        # Fallback on single block requests for blocks missing in the range
+        for number in [n for n in wanted if n not in block_docs]:
+            block_doc = await BlocksScanner.get_block_doc(self.community, number)
+            if block_doc:
+                block_docs[number] = block_doc
+        return block_docs
+
 
 class TxHistory:
     def __init__(self, app, wallet):
@@ -17,8 +350,14 @@ class TxHistory:
         self._stop_coroutines = False
         self._running_refresh = []
         self._transfers = []
+        # Indexes of the transfers, updated when their state changes
+        self._transfers_by_hash = {}
+        self._transfers_by_block = {}
+        self._transfers_by_state = {}
+        self._indexed_transfers = {}
         self.available_sources = []
         self._dividends = []
+        self._dividends_by_block = {}
 
     @property
     def latest_block(self):
@@ -37,17 +376,23 @@ class TxHistory:
         :return:
         """
         self._transfers = []
+        self._transfers_by_hash = {}
+        self._transfers_by_block = {}
+        self._transfers_by_state = {}
+        self._indexed_transfers = {}
 
         data_sent = data['transfers']
         for s in data_sent:
-            self._transfers.append(Transfer.load(s))
+            self.add_transfer(Transfer.load(s))
 
         for s in data['sources']:
             self.available_sources.append(s.copy())
 
+        self._dividends = []
+        self._dividends_by_block = {}
         for d in data['dividends']:
             d['state'] = TransferState[d['state']]
-            self._dividends.append(d)
+            self._add_dividend(d)
 
         self.latest_block = data['latest_block']
 
@@ -86,6 +431,74 @@ class TxHistory:
     def dividends(self):
         return self._dividends.copy()
 
+    def add_transfer(self, transfer):
+        """
+        Add a transfer to the history
+        :param sakia.core.transfer.Transfer transfer: The transfer
+        """
+        self._transfers.append(transfer)
+        self._index_transfer(transfer)
+        transfer.state_changed.connect(lambda t=transfer: self._index_transfer(t))
+
+    def _index_transfer(self, transfer):
+        if transfer in self._indexed_transfers:
+            self._unindex_transfer(transfer)
+        block_number = transfer.blockUID.number if transfer.blockUID else None
+        self._indexed_transfers[transfer] = (transfer.sha_hash, block_number, transfer.state)
+        if transfer.sha_hash:
+            self._transfers_by_hash[transfer.sha_hash] = transfer
+        if block_number is not None:
+            self._transfers_by_block.setdefault(block_number, set()).add(transfer)
+        self._transfers_by_state.setdefault(transfer.state, set()).add(transfer)
+
+    def _unindex_transfer(self, transfer):
+        sha_hash, block_number, state = self._indexed_transfers.pop(transfer)
+        if self._transfers_by_hash.get(sha_hash) is transfer:
+            self._transfers_by_hash.pop(sha_hash)
+        if block_number is not None:
+            self._transfers_by_block[block_number].discard(transfer)
+            if not self._transfers_by_block[block_number]:
+                self._transfers_by_block.pop(block_number)
+        self._transfers_by_state[state].discard(transfer)
+
+    def transfer_by_hash(self, sha_hash):
+        """
+        Get a transfer from its transaction hash
+        :param str sha_hash: The transaction hash
+        :return: The transfer or None if it is unknown
+        :rtype: sakia.core.transfer.Transfer
+        """
+        return self._transfers_by_hash.get(sha_hash)
+
+    def transfers_in_block(self, block_number, *states):
+        """
+        Get the transfers of a block
+        :param int block_number: The block number
+        :param states: If set, only the transfers in these states are returned
+        :rtype: list
+        """
+        return [t for t in self._transfers_by_block.get(block_number, ())
+                if not states or t.state in states]
+
+    def transfers_in_state(self, *states):
+        """
+        Get the transfers in some states
+        :param states: The transfer states
+        :rtype: list
+        """
+        transfers = []
+        for state in states:
+            transfers.extend(self._transfers_by_state.get(state, ()))
+        return transfers
+
+    def _add_dividend(self, dividend):
+        self._dividends.append(dividend)
+        self._dividends_by_block[dividend['block_number']] = dividend
+
+    def _remove_dividend(self, dividend):
+        self._dividends.remove(dividend)
+        self._dividends_by_block.pop(dividend['block_number'], None)
+
     def stop_coroutines(self, closing=False):
         self._stop_coroutines = True
 
@@ -96,26 +509,7 @@ class TxHistory:
         :param int number: The block number to retrieve
         :return: the block doc or None if no block was found
         """
-        tries = 0
-        block_doc = None
-        block = None
-        while block is None and tries < 3:
-            try:
-                block = await community.bma_access.future_request(bma.blockchain.Block,
-                                      req_args={'number': number})
-                signed_raw = "{0}{1}\n".format(block['raw'],
-                                           block['signature'])
-                try:
-                    block_doc = Block.from_signed_raw(signed_raw)
-                except TypeError:
-                    logging.debug("Error in {0}".format(number))
-                    block = None
-                    tries += 1
-            except errors.DuniterError as e:
-                if e.ucode == errors.BLOCK_NOT_FOUND:
-                    block = None
-                    tries += 1
-        return block_doc
+        return await BlocksScanner.get_block_doc(community, number)
 
     async def _parse_transaction(self, community, tx, blockUID,
                            mediantime, received_list, txid):
@@ -192,36 +586,39 @@ class TxHistory:
             return transfer
         return None
 
-    async def _parse_block(self, community, block_number, received_list, txmax):
+    async def _parse_block(self, community, block_doc, transactions, received_list, txmax):
         """
         Parse a block
         :param sakia.core.Community community: The community
-        :param int block_number: The block to request
+        :param duniterpy.documents.Block block_doc: The block to parse
+        :param list transactions: The simple transactions of the block matching the wallet pubkey
         :param list received_list: The list where we are appending transactions
         :param int txmax: Latest tx id
         :return: The list of transfers sent
         """
-        block_doc = await self._get_block_doc(community, block_number)
         transfers = []
-        if block_doc:
-            for transfer in [t for t in self._transfers if t.state == TransferState.AWAITING]:
-                transfer.run_state_transitions((False, block_doc))
-
-            new_tx = [t for t in block_doc.transactions
-                      if t.sha_hash not in [trans.sha_hash for trans in self._transfers]
-                       and SimpleTransaction.is_simple(t)]
-
-            for (txid, tx) in enumerate(new_tx):
-                transfer = await self._parse_transaction(community, tx, block_doc.blockUID,
-                                        block_doc.mediantime, received_list, txid+txmax)
-                if transfer:
-                    #logging.debug("Transfer amount : {0}".format(transfer.metadata['amount']))
-                    transfers.append(transfer)
-                else:
-                    pass
-                    #logging.debug("None transfer")
-        else:
-            logging.debug("Could not find or parse block {0}".format(block_number))
+        for transfer in self.transfers_in_state(TransferState.AWAITING):
+            transfer.run_state_transitions((False, block_doc))
+
+        new_tx = [t for t in transactions if t.sha_hash not in self._transfers_by_hash]
+
+        # The identities of the issuers and receivers are found at once
+        pubkeys = set()
+        for tx in new_tx:
+            pubkeys.add(tx.issuers[0])
+            pubkeys.update([o.conditions.left.pubkey for o in tx.outputs])
+        if pubkeys:
+            await self.wallet._identities_registry.find_many(list(pubkeys), community)
+
+        for (txid, tx) in enumerate(new_tx):
+            transfer = await self._parse_transaction(community, tx, block_doc.blockUID,
+                                    block_doc.mediantime, received_list, txid+txmax)
+            if transfer:
+                #logging.debug("Transfer amount : {0}".format(transfer.metadata['amount']))
+                transfers.append(transfer)
+            else:
+                pass
+                #logging.debug("None transfer")
         return transfers
 
     async def request_dividends(self, community, parsed_block):
@@ -230,54 +627,59 @@ class TxHistory:
                 dividends_data = await community.bma_access.future_request(bma.ud.History,
                                                 req_args={'pubkey': self.wallet.pubkey})
 
-                dividends = dividends_data['history']['history'].copy()
-
-                for d in dividends:
-                    if d['block_number'] < parsed_block:
-                        dividends.remove(d)
-                return dividends
+                # Cached data is read-only, we work on copies of the dividends
+                return [d.copy() for d in dividends_data['history']['history']
+                        if d['block_number'] >= parsed_block]
             except errors.DuniterError as e:
                 if e.ucode == errors.BLOCK_NOT_FOUND:
                     pass
-        return {}
+        return []
 
-    async def _refresh(self, community, block_number_from, block_to, received_list):
+    async def _refresh(self, community, block_number_from, block_to, received_list, scanner):
         """
         Refresh last transactions
 
         :param sakia.core.Community community: The community
         :param list received_list: List of transactions received
+        :param BlocksScanner scanner: The scanner of the blocks
         """
         new_transfers = []
         new_dividends = []
         try:
             logging.debug("Refresh from : {0} to {1}".format(block_number_from, block_to['number']))
-            dividends = await self.request_dividends(community, block_number_from)
-            with_tx_data = await community.bma_access.future_request(bma.blockchain.TX)
-            blocks_with_tx = with_tx_data['result']['blocks']
+            blocks_with_tx = await scanner.blocks_with_tx()
+            if scanner.dividend_blocks is not None \
+                    and all([n in self._dividends_by_block for n in scanner.dividend_blocks
+                             if block_number_from <= n <= block_to['number']]):
+                # No new dividend in the range : the known dividends are used
+                dividends = [d for d in self._dividends if d['block_number'] >= block_number_from]
+            else:
+                dividends = await self.request_dividends(community, block_number_from)
             while block_number_from <= block_to['number']:
                 udid = 0
                 for d in [ud for ud in dividends if ud['block_number'] == block_number_from]:
                     state = TransferState.VALIDATED if block_number_from + MAX_CONFIRMATIONS <= block_to['number'] \
                         else TransferState.VALIDATING
 
-                    if d['block_number'] not in [ud['block_number'] for ud in self._dividends]:
+                    if d['block_number'] not in self._dividends_by_block:
                         d['id'] = udid
                         d['state'] = state
                         new_dividends.append(d)
 
                         udid += 1
                     else:
-                        known_dividend = [ud for ud in self._dividends
-                                          if ud['block_number'] == d['block_number']][0]
-                        known_dividend['state'] = state
+                        self._dividends_by_block[d['block_number']]['state'] = state
 
                 # We parse only blocks with transactions
                 if block_number_from in blocks_with_tx:
-                    transfers = await self._parse_block(community, block_number_from,
-                                                             received_list,
-                                                             udid + len(new_transfers))
-                    new_transfers += transfers
+                    block_doc, transactions = await scanner.block(self.wallet.pubkey, block_number_from)
+                    if block_doc:
+                        transfers = await self._parse_block(community, block_doc, transactions,
+                                                                 received_list,
+                                                                 udid + len(new_transfers))
+                        new_transfers += transfers
+                    else:
+                        logging.debug("Could not find or parse block {0}".format(block_number_from))
 
                 self.wallet.refresh_progressed.emit(block_number_from, block_to['number'], self.wallet.pubkey)
                 block_number_from += 1
@@ -285,7 +687,8 @@ class TxHistory:
             signed_raw = "{0}{1}\n".format(block_to['raw'],
                                        block_to['signature'])
             block_to = Block.from_signed_raw(signed_raw)
-            for transfer in [t for t in self._transfers + new_transfers if t.state == TransferState.VALIDATING]:
+            for transfer in self.transfers_in_state(TransferState.VALIDATING) + \
+                    [t for t in new_transfers if t.state == TransferState.VALIDATING]:
                 transfer.run_state_transitions((False, block_to, MAX_CONFIRMATIONS))
 
             # We check if latest parsed block_number is a new high number
@@ -296,16 +699,20 @@ class TxHistory:
                 self.latest_block = block_number_from
 
             parameters = await community.parameters()
-            for transfer in [t for t in self._transfers if t.state == TransferState.AWAITING]:
+            for transfer in self.transfers_in_state(TransferState.AWAITING):
                 transfer.run_state_transitions((False, block_to,
                                                 parameters['avgGenTime'], parameters['medianTimeBlocks']))
-        except (MalformedDocumentError, NoPeerAvailable) as e:
+        except (MalformedDocumentError, errors.DuniterError, NoPeerAvailable) as e:
             logging.debug(str(e))
             self.wallet.refresh_finished.emit([])
             return
+        finally:
+            scanner.release(self.wallet.pubkey)
 
-        self._transfers = self._transfers + new_transfers
-        self._dividends = self._dividends + new_dividends
+        for transfer in new_transfers:
+            self.add_transfer(transfer)
+        for dividend in new_dividends:
+            self._add_dividend(dividend)
 
         self.wallet.refresh_finished.emit(received_list)
 
@@ -318,18 +725,17 @@ class TxHistory:
         block_doc = await self._get_block_doc(community, block_number)
         if block_doc:
             # We check the block dividend state
-            match = [d for d in self._dividends if d['block_number'] == block_number]
-            if len(match) > 0:
+            dividend = self._dividends_by_block.get(block_number)
+            if dividend:
                 if block_doc.ud:
-                    match[0]['amount'] = block_doc.ud
-                    match[0]['base'] = block_doc.unit_base
+                    dividend['amount'] = block_doc.ud
+                    dividend['base'] = block_doc.unit_base
                 else:
-                    self._dividends.remove(match[0])
+                    self._remove_dividend(dividend)
 
             # We check if transactions are still present
-            for transfer in [t for t in self._transfers
-                             if t.state in (TransferState.VALIDATING, TransferState.VALIDATED) and
-                             t.blockUID.number == block_number]:
+            for transfer in self.transfers_in_block(block_number, TransferState.VALIDATING,
+                                                    TransferState.VALIDATED):
                 if transfer.blockUID.sha_hash == block_doc.blockUID.sha_hash:
                     return True
                 transfer.run_state_transitions((True, block_doc))
@@ -339,37 +745,51 @@ class TxHistory:
 
     async def _rollback(self, community):
         """
-        Rollback last transactions until we find one still present
-        in the main blockchain
+        Rollback last transactions and dividends found after the fork point
+        of the blockchain
 
         :param sakia.core.Community community: The community
         """
         try:
             logging.debug("Rollback from : {0}".format(self.latest_block))
-            # We look for the block goal to check for rollback,
-            #  depending on validating and validated transfers...
-            tx_blocks = [tx.blockUID.number for tx in self._transfers
-                          if tx.state in (TransferState.VALIDATED, TransferState.VALIDATING) and
-                          tx.blockUID is not None]
-            ud_blocks = [ud['block_number'] for ud in self._dividends
-                          if ud['state'] in (TransferState.AWAITING, TransferState.VALIDATING)]
-            blocks = tx_blocks + ud_blocks
-            blocks.reverse()
+            fork_point = await community.bma_access.fork_point()
+            if fork_point is None:
+                fork_point = 0
+            logging.debug("Fork point : {0}".format(fork_point))
+            # We check only the blocks of validating and validated transfers
+            # and of dividends found after the fork point
+            tx_blocks = [n for n in self._transfers_by_block if n >= fork_point and
+                         self.transfers_in_block(n, TransferState.VALIDATED, TransferState.VALIDATING)]
+            ud_blocks = [n for n in self._dividends_by_block if n >= fork_point]
+            blocks = sorted(set(tx_blocks + ud_blocks), reverse=True)
             for i, block_number in enumerate(blocks):
                 self.wallet.refresh_progressed.emit(i, len(blocks), self.wallet.pubkey)
-                if await self._check_block(community, block_number):
-                    break
+                await self._check_block(community, block_number)
+
+            # The blocks after the fork point will be parsed again by the next refresh
+            self.latest_block = min(self.latest_block, fork_point)
 
             current_block = await self._get_block_doc(community, community.network.current_blockUID.number)
             if current_block:
                 members_pubkeys = await community.members_pubkeys()
-                for transfer in [t for t in self._transfers
-                                 if t.state == TransferState.VALIDATED]:
+                # Only the transfers in the fork window can go back to validating
+                for transfer in [t for n in self._transfers_by_block
+                                 if n + MAX_CONFIRMATIONS > current_block.number
+                                 for t in self.transfers_in_block(n, TransferState.VALIDATED)]:
                     transfer.run_state_transitions((True, current_block, MAX_CONFIRMATIONS))
         except NoPeerAvailable:
             logging.debug("No peer available")
 
-    async def refresh(self, community, received_list):
+    async def refresh(self, community, received_list, scanner=None):
+        """
+        Refresh the transactions and dividends of the wallet
+
+        :param sakia.core.Community community: The community
+        :param list received_list: List of transactions received
+        :param BlocksScanner scanner: The scanner shared by the wallets of the account, if any
+        """
+        if scanner is None:
+            scanner = BlocksScanner(community, [self.wallet.pubkey])
         # We update the block goal
         try:
             current_block_number = community.network.current_blockUID.number
@@ -377,29 +797,34 @@ class TxHistory:
                 current_block = await community.bma_access.future_request(bma.blockchain.Block,
                                         req_args={'number': current_block_number})
                 members_pubkeys = await community.members_pubkeys()
+                # The previous refresh or rollback may move the latest block
+                await self._wait_for_previous_refresh()
                 # We look for the first block to parse, depending on awaiting and validating transfers and ud...
-                tx_blocks = [tx.blockUID.number for tx in self._transfers
-                          if tx.state in (TransferState.AWAITING, TransferState.VALIDATING) \
-                         and tx.blockUID is not None]
+                tx_blocks = [tx.blockUID.number for tx
+                             in self.transfers_in_state(TransferState.AWAITING, TransferState.VALIDATING)
+                             if tx.blockUID is not None]
                 ud_blocks = [ud['block_number'] for ud in self._dividends
                           if ud['state'] in (TransferState.AWAITING, TransferState.VALIDATING)]
                 blocks = tx_blocks + ud_blocks + \
                          [max(0, self.latest_block - MAX_CONFIRMATIONS)]
                 block_from = min(set(blocks))
 
-                await self._wait_for_previous_refresh()
                 if block_from < current_block["number"]:
                     # Then we start a new one
                     logging.debug("Starts a new refresh")
-                    task = asyncio.ensure_future(self._refresh(community, block_from, current_block, received_list))
+                    scanner.register(self.wallet.pubkey, block_from, current_block["number"])
+                    task = asyncio.ensure_future(self._refresh(community, block_from, current_block,
+                                                               received_list, scanner))
                     self._running_refresh.append(task)
         except errors.DuniterError as e:
             if e.ucode == errors.BLOCK_NOT_FOUND:
                 logging.debug("Block not found")
         except NoPeerAvailable:
             logging.debug("No peer available")
+        finally:
+            scanner.skip(self.wallet.pubkey)
 
-    async def rollback(self, community, received_list):
+    async def rollback(self, community, received_list, scanner=None):
         await self._wait_for_previous_refresh()
         # Then we start a new one
         logging.debug("Starts a new rollback")
@@ -407,7 +832,7 @@ class TxHistory:
         self._running_refresh.append(task)
 
         # Then we start a refresh to check for new transactions
-        await self.refresh(community, received_list)
+        await self.refresh(community, received_list, scanner)
 
     async def _wait_for_previous_refresh(self):
         # We wait for current refresh coroutines
@@ -107,23 +107,25 @@ class Wallet(QObject):
         if community.currency not in self.caches:
             self.caches[community.currency] = TxHistory(app, self)
 
-    def refresh_transactions(self, community, received_list):
+    def refresh_transactions(self, community, received_list, scanner=None):
         """
         Refresh the cache of this wallet for the specified community.
 
         :param community: The community to refresh its cache
+        :param sakia.core.txhistory.BlocksScanner scanner: The scanner shared by the wallets of the account
         """
         logging.debug("Refresh transactions for {0}".format(self.pubkey))
-        asyncio.ensure_future(self.caches[community.currency].refresh(community, received_list))
+        asyncio.ensure_future(self.caches[community.currency].refresh(community, received_list, scanner))
 
-    def rollback_transactions(self, community, received_list):
+    def rollback_transactions(self, community, received_list, scanner=None):
         """
         Rollback the transactions of this wallet for the specified community.
 
         :param community: The community to refresh its cache
+        :param sakia.core.txhistory.BlocksScanner scanner: The scanner shared by the wallets of the account
         """
         logging.debug("Refresh transactions for {0}".format(self.pubkey))
-        asyncio.ensure_future(self.caches[community.currency].rollback(community, received_list))
+        asyncio.ensure_future(self.caches[community.currency].rollback(community, received_list, scanner))
 
     def check_password(self, salt, password):
         """
@@ -360,7 +362,7 @@ class Wallet(QObject):
                     'txid': txid
                     }
         transfer = Transfer.initiate(metadata)
-        self.caches[community.currency]._transfers.append(transfer)
+        self.caches[community.currency].add_transfer(transfer)
         try:
             tx = self.prepare_tx(recipient, blockUID, amount, message, community)
             logging.debug("TX : {0}".format(tx.raw()))
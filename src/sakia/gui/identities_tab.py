@@ -10,7 +10,7 @@ from PyQt5.QtCore import Qt, pyqtSignal, QEvent, QT_TRANSLATE_NOOP, QObject
 from PyQt5.QtGui import QCursor
 from PyQt5.QtWidgets import QWidget, QAction, QMenu, QDialog, \
                             QAbstractItemView
-from duniterpy.api import bma, errors
+from duniterpy.api import errors
 from duniterpy.documents import BlockUID
 
 from ..models.identities import IdentitiesFilterProxyModel, IdentitiesTableModel
@@ -120,9 +120,22 @@ class IdentitiesTabWidget(QObject):
         if len(text) < 2:
             return
         try:
-            response = await self.community.bma_access.future_request(bma.wot.Lookup, {'search': text})
             identities = []
-            for identity_data in response['results']:
+            for pubkey, uid in await self.community.search_members(text):
+                identity = self.app.identities_registry.from_handled_data(uid, pubkey, None,
+                                                                          BlockchainState.VALIDATED,
+                                                                          self.community)
+                identities.append(identity)
+            # The members are shown at once, the non members are added when the network answers
+            members_shown = len(identities) > 0
+            if members_shown:
+                self.ui.edit_textsearch.clear()
+                self.ui.edit_textsearch.setPlaceholderText(text)
+                await self.refresh_identities(identities)
+                self.ui.busy.hide()
+
+            non_members = await self.community.lookup_non_members(text)
+            for identity_data in non_members:
                 for uid_data in identity_data['uids']:
                     identity = Identity.from_handled_data(uid_data['uid'],
                                                          identity_data['pubkey'],
@@ -130,9 +143,11 @@ class IdentitiesTabWidget(QObject):
                                                          BlockchainState.BUFFERED)
                     identities.append(identity)
 
-            self.ui.edit_textsearch.clear()
-            self.ui.edit_textsearch.setPlaceholderText(text)
-            await self.refresh_identities(identities)
+            if not members_shown:
+                self.ui.edit_textsearch.clear()
+                self.ui.edit_textsearch.setPlaceholderText(text)
+            if non_members or not members_shown:
+                await self.refresh_identities(identities)
         except errors.DuniterError as e:
             if e.ucode == errors.BLOCK_NOT_FOUND:
                 logging.debug(str(e))
@@ -157,6 +157,7 @@ class MainWindow(QObject):
         app.version_requested.connect(main_window.latest_version_requested)
         app.account_imported.connect(main_window.import_account_accepted)
         app.account_changed.connect(main_window.change_account)
+        app.cache_loading_progressed.connect(main_window.cache_loading_progressed)
         main_window._init_ui()
         main_window._init_homescreen()
         main_window._init_community_view()
@@ -183,6 +184,13 @@ class MainWindow(QObject):
             self.account.contacts_changed.connect(self.refresh_contacts)
         self.refresh()
 
+    @pyqtSlot(int, int)
+    def cache_loading_progressed(self, value, maximum):
+        if value < maximum:
+            self.status_label.setText(self.tr("Loading account data {0}/{1}").format(value, maximum))
+        else:
+            self.status_label.setText("")
+
     @asyncify
     async def open_add_account_dialog(self, checked=False):
         dialog = ProcessConfigureAccount(self.app, None)
@@ -341,6 +349,8 @@ class MainWindow(QObject):
     @pyqtSlot(Community)
     def change_community(self, community):
         if community:
+            # The cache of the community may still be loading in background
+            self.app.require_community_cache(self.account, community)
             self.homescreen.hide()
             self.community_view.show()
         else:
@@ -68,7 +68,7 @@ class StepPageInit(Step):
         logging.debug("Is valid ? ")
         self.config_dialog.label_error.setText(self.tr("connecting..."))
         try:
-            self.node = await Node.from_address(None, server, port, session=aiohttp.ClientSession())
+            self.node = await Node.from_address(None, server, port, session=self.account.session)
             community = Community.create(self.node)
             self.config_dialog.button_connect.setEnabled(False)
             self.config_dialog.button_register.setEnabled(False)
@@ -90,7 +90,7 @@ class StepPageInit(Step):
         logging.debug("Is valid ? ")
         self.config_dialog.label_error.setText(self.tr("connecting..."))
         try:
-            self.node = await Node.from_address(None, server, port, session=aiohttp.ClientSession())
+            self.node = await Node.from_address(None, server, port, session=self.account.session)
             community = Community.create(self.node)
             self.config_dialog.button_connect.setEnabled(False)
             self.config_dialog.button_register.setEnabled(False)
@@ -123,8 +123,7 @@ Yours : {0}, the network : {1}""".format(registered[1], registered[2])))
         logging.debug("Is valid ? ")
         self.config_dialog.label_error.setText(self.tr("connecting..."))
         try:
-            session = aiohttp.ClientSession()
-            self.node = await Node.from_address(None, server, port, session=session)
+            self.node = await Node.from_address(None, server, port, session=self.account.session)
             community = Community.create(self.node)
             self.config_dialog.button_connect.setEnabled(False)
             self.config_dialog.button_register.setEnabled(False)
@@ -156,7 +155,6 @@ Yours : {0}, the network : {1}""".format(registered[1], registered[2])))
                 self.config_dialog.label_error.setText(self.tr("Your account already exists on the network"))
         except (MalformedDocumentError, ValueError, errors.DuniterError,
                 aiohttp.errors.ClientError, aiohttp.errors.DisconnectedError) as e:
-            session.close()
             self.config_dialog.label_error.setText(str(e))
         except NoPeerAvailable:
             self.config_dialog.label_error.setText(self.tr("Could not connect. Check node peering entry"))
@@ -3,8 +3,6 @@ import logging
 from PyQt5.QtCore import QEvent, pyqtSignal, QT_TRANSLATE_NOOP, Qt
 from PyQt5.QtWidgets import QComboBox, QWidget
 
-from duniterpy.api import bma, errors
-
 from ...tools.decorators import asyncify
 from ...tools.exceptions import NoPeerAvailable
 from ...core.registry import BlockchainState, Identity
@@ -68,36 +66,40 @@ class SearchUserWidget(QWidget, Ui_SearchUserWidget):
         self.combobox_search.lineEdit().setPlaceholderText(self.tr("Looking for {0}...".format(text)))
 
         if len(text) > 2:
+            # The members are shown at once, the non members are added when the network answers
+            members = await self.community.search_members(text)
+            self._show_nodes(text, members, True)
             try:
-                response = await self.community.bma_access.future_request(bma.wot.Lookup, {'search': text})
-
-                nodes = {}
-                for identity in response['results']:
-                    nodes[identity['pubkey']] = identity['uids'][0]['uid']
-
-                if nodes:
-                    self.nodes = list()
-                    self.blockSignals(True)
-                    self.combobox_search.clear()
-                    self.combobox_search.lineEdit().setText(text)
-                    for pubkey, uid in nodes.items():
-                        self.nodes.append({'pubkey': pubkey, 'uid': uid})
-                        self.combobox_search.addItem(uid)
-                    self.blockSignals(False)
-                    self.combobox_search.showPopup()
-            except errors.DuniterError as e:
-                if e.ucode == errors.NO_MATCHING_IDENTITY:
-                    self.nodes = list()
-                    self.blockSignals(True)
-                    self.combobox_search.clear()
-                    self.blockSignals(False)
-                    self.combobox_search.showPopup()
-                else:
-                    pass
-            except NoPeerAvailable:
-                pass
+                non_members = await self.community.lookup_non_members(text)
+                self._show_nodes(text, [(i['pubkey'], i['uids'][0]['uid']) for i in non_members],
+                                 len(members) == 0)
+            except NoPeerAvailable as e:
+                logging.debug(str(e))
         self.search_completed.emit()
 
+    def _show_nodes(self, text, nodes, replace):
+        """
+        Add found nodes to the combobox and show its list, if any node was found
+        :param str text: The searched text
+        :param list nodes: The (pubkey, uid) of the found nodes
+        :param bool replace: True to replace the nodes of the previous search
+        """
+        if not nodes:
+            return
+        if replace:
+            self.nodes = list()
+        pubkeys = [n['pubkey'] for n in self.nodes]
+        self.blockSignals(True)
+        if replace:
+            self.combobox_search.clear()
+            self.combobox_search.lineEdit().setText(text)
+        for pubkey, uid in nodes:
+            if pubkey not in pubkeys:
+                self.nodes.append({'pubkey': pubkey, 'uid': uid})
+                self.combobox_search.addItem(uid)
+        self.blockSignals(False)
+        self.combobox_search.showPopup()
+
     def select_node(self, index):
         """
         Select node in graph when item is selected in combobox
@@ -49,6 +49,11 @@ class NetworkFilterProxyModel(QSortFilterProxyModel):
                              source_model.columns_types.index('current_time')):
             left_data = int(left_data) if left_data != '' else 0
             right_data = int(right_data) if right_data != '' else 0
+        elif left.column() in (source_model.columns_types.index('latency'),
+                               source_model.columns_types.index('error_rate'),
+                               source_model.columns_types.index('last_success')):
+            left_data = left_data if left_data is not None else float('inf')
+            right_data = right_data if right_data is not None else float('inf')
 
         return left_data < right_data
 
@@ -66,7 +71,10 @@ class NetworkFilterProxyModel(QSortFilterProxyModel):
             'is_member': self.tr('Member'),
             'pubkey': self.tr('Pubkey'),
             'software': self.tr('Software'),
-            'version': self.tr('Version')
+            'version': self.tr('Version'),
+            'latency': self.tr('Latency'),
+            'error_rate': self.tr('Errors'),
+            'last_success': self.tr('Last success')
         }
         _type = self.sourceModel().headerData(section, orientation, role)
         return header_names[_type]
@@ -102,6 +110,25 @@ class NetworkFilterProxyModel(QSortFilterProxyModel):
                             QLocale.dateTimeFormat(QLocale(), QLocale.ShortFormat)
                         )
 
+            if index.column() == source_model.columns_types.index('latency'):
+                if source_data is None:
+                    return ""
+                return self.tr("{0} ms").format(int(source_data * 1000))
+
+            if index.column() == source_model.columns_types.index('error_rate'):
+                if source_data is None:
+                    return ""
+                return "{0:.0%}".format(source_data)
+
+            if index.column() == source_model.columns_types.index('last_success'):
+                if source_data is None:
+                    return ""
+                return QLocale.toString(
+                            QLocale(),
+                            QDateTime.fromTime_t(int(source_data)),
+                            QLocale.dateTimeFormat(QLocale(), QLocale.ShortFormat)
+                        )
+
         if role == Qt.TextAlignmentRole:
             if source_index.column() == source_model.columns_types.index('address') or source_index.column() == self.sourceModel().columns_types.index('current_block'):
                 return Qt.AlignRight | Qt.AlignVCenter
@@ -141,6 +168,9 @@ class NetworkTableModel(QAbstractTableModel):
             'pubkey',
             'software',
             'version',
+            'latency',
+            'error_rate',
+            'last_success',
             'is_root',
             'state'
         )
@@ -202,8 +232,12 @@ class NetworkTableModel(QAbstractTableModel):
             number, block_hash, block_time = node.block['number'], node.block['hash'], node.block['medianTime']
         else:
             number, block_hash, block_time = "", "", ""
+        health = self.community.bma_access.health.get(node)
+        error_rate = health.error_rate if health.requests else None
         return (address, port, number, block_hash, block_time, node.uid,
-                is_member, node.pubkey, node.software, node.version, is_root, node.state)
+                is_member, node.pubkey, node.software, node.version,
+                health.latency, error_rate, health.last_success,
+                is_root, node.state)
 
     @once_at_a_time
     @asyncify
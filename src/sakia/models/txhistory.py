@@ -6,7 +6,6 @@ Created on 5 févr. 2014
 
 import datetime
 import logging
-import asyncio
 import math
 from ..core.transfer import Transfer, TransferState
 from ..core.net.network import MAX_CONFIRMATIONS
@@ -229,18 +228,12 @@ class HistoryTableModel(QAbstractTableModel):
         else:
             return []
 
-    async def data_received(self, transfer):
+    def data_received(self, transfer, deposit):
         amount = transfer.metadata['amount']
         if transfer.blockUID:
             block_number = transfer.blockUID.number
         else:
             block_number = None
-        try:
-            deposit = await self.account.current_ref.instance(transfer.metadata['amount'], self.community,
-                                                     self.app, block_number)\
-                .diff_localized(international_system=self.app.preferences['international_system_of_units'])
-        except NoPeerAvailable:
-            deposit = "Could not compute"
         comment = ""
         if transfer.metadata['comment'] != "":
             comment = transfer.metadata['comment']
@@ -256,19 +249,13 @@ class HistoryTableModel(QAbstractTableModel):
                 comment, transfer.state, txid,
                 transfer.metadata['issuer'], block_number, amount)
 
-    async def data_sent(self, transfer):
+    def data_sent(self, transfer, paiment):
         if transfer.blockUID:
             block_number = transfer.blockUID.number
         else:
             block_number = None
 
         amount = transfer.metadata['amount']
-        try:
-            paiment = await self.account.current_ref.instance(transfer.metadata['amount'], self.community,
-                                                     self.app, block_number)\
-                .diff_localized(international_system=self.app.preferences['international_system_of_units'])
-        except NoPeerAvailable:
-            paiment = "Could not compute"
         comment = ""
         if transfer.metadata['comment'] != "":
             comment = transfer.metadata['comment']
@@ -283,13 +270,8 @@ class HistoryTableModel(QAbstractTableModel):
                 "", comment, transfer.state, txid,
                 transfer.metadata['receiver'], block_number, amount)
 
-    async def data_dividend(self, dividend):
+    def data_dividend(self, dividend, deposit):
         amount = dividend['amount'] * math.pow(10, dividend['base'])
-        try:
-            deposit = await self.account.current_ref.instance(amount, self.community, self.app, dividend['block_number'])\
-                .diff_localized(international_system=self.app.preferences['international_system_of_units'])
-        except NoPeerAvailable:
-            deposit = "Could not compute"
         comment = ""
         receiver = self.account.name
         date_ts = dividend['time']
@@ -301,6 +283,32 @@ class HistoryTableModel(QAbstractTableModel):
                 deposit, "", state, id,
                 self.account.pubkey, block_number, amount)
 
+    async def localized_amounts(self, transfers):
+        """
+        Convert the amounts of the transfers in the current referential,
+        all at once so that the universal dividends are requested only once
+
+        :param list transfers: The transfers and dividends
+        :return: The localized amounts
+        :rtype: list
+        """
+        amounts = []
+        block_numbers = []
+        for transfer in transfers:
+            if type(transfer) is Transfer:
+                amounts.append(transfer.metadata['amount'])
+                block_numbers.append(transfer.blockUID.number if transfer.blockUID else None)
+            else:
+                amounts.append(transfer['amount'] * math.pow(10, transfer['base']))
+                block_numbers.append(transfer['block_number'])
+        international_system = self.app.preferences['international_system_of_units']
+        try:
+            return await self.account.current_ref.diff_localized_many(amounts, block_numbers,
+                                                                      self.community, self.app,
+                                                                      international_system=international_system)
+        except NoPeerAvailable:
+            return ["Could not compute"] * len(transfers)
+
     @once_at_a_time
     @asyncify
     async def refresh_transfers(self):
@@ -310,32 +318,16 @@ class HistoryTableModel(QAbstractTableModel):
         self.beginResetModel()
         transfers_data = []
         if self.community:
-            requests_coro = []
-            data_list = []
-            count = 0
             transfers = self.transfers()
-            for transfer in transfers:
-                coro = None
-                count += 1
+            localized_amounts = await self.localized_amounts(transfers)
+            for transfer, localized_amount in zip(transfers, localized_amounts):
                 if type(transfer) is Transfer:
                     if transfer.metadata['issuer'] == self.account.pubkey:
-                        coro = asyncio.ensure_future(self.data_sent(transfer))
+                        transfers_data.append(self.data_sent(transfer, localized_amount))
                     else:
-                        coro = asyncio.ensure_future(self.data_received(transfer))
+                        transfers_data.append(self.data_received(transfer, localized_amount))
                 elif type(transfer) is dict:
-                    coro = asyncio.ensure_future(self.data_dividend(transfer))
-                if coro:
-                    requests_coro.append(coro)
-                if count % 25 == 0:
-                    gathered_list = await asyncio.gather(*requests_coro)
-                    requests_coro = []
-                    data_list.extend(gathered_list)
-            # One last gathering
-            gathered_list = await asyncio.gather(*requests_coro)
-            data_list.extend(gathered_list)
-
-            for data in data_list:
-                transfers_data.append(data)
+                    transfers_data.append(self.data_dividend(transfer, localized_amount))
         self.transfers_data = transfers_data
         self.endResetModel()
 
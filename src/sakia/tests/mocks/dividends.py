@@ -0,0 +1,47 @@
+"""
+Mock of the universal dividends of a community,
+used to compare the localization of several amounts at once with the localization one by one
+"""
+from asynctest.mock import CoroutineMock, PropertyMock
+
+# The latest block with universal dividend before each block, None for the current block
+UD_BLOCKS = {None: {'dividend': 2000, 'medianTime': 1452700000},
+             100: {'dividend': 1000, 'medianTime': 1452600000},
+             5: None}
+# The median time of the blocks
+TIMES = {None: 1452700000, 100: 1452600000, 5: 1452500000}
+# Amounts without block number or before the first universal dividend
+AMOUNTS = [1011, 0, 4000, 7]
+BLOCK_NUMBERS = [100, None, 100, 5]
+
+
+def mock_dividends(community):
+    """
+    Mock the requests of the universal dividends and of the blocks times of a community
+
+    :param community: The community mock
+    """
+    community.block_dividend = lambda block: block['dividend'] if block else 1
+    community.dividend = CoroutineMock(side_effect=lambda block_number=None:
+                                       community.block_dividend(UD_BLOCKS[block_number]))
+    community.get_ud_block = CoroutineMock(side_effect=lambda x=0, block_number=None: UD_BLOCKS[block_number])
+    community.ud_blocks = CoroutineMock(side_effect=lambda numbers: {n: UD_BLOCKS[n] for n in numbers})
+    community.get_block = CoroutineMock(side_effect=lambda number=None: {'medianTime': TIMES[number]})
+    community.times = CoroutineMock(side_effect=lambda numbers: {n: TIMES[n] for n in numbers})
+    community.parameters = CoroutineMock(return_value={'dt': 86400})
+    type(community).short_currency = PropertyMock(return_value="TC")
+
+
+async def diff_localized_one_by_one(referential, community, app):
+    """
+    Localize the amounts one by one
+
+    :param class referential: The referential class
+    :return: The localized amounts
+    :rtype: list
+    """
+    localized = []
+    for amount, block_number in zip(AMOUNTS, BLOCK_NUMBERS):
+        localized.append(await referential(amount, community, app, block_number)
+                         .diff_localized(units=True, international_system=True))
+    return localized
@@ -174,6 +174,27 @@ class TestExplorerGraph(unittest.TestCase, QuamashTest):
 
         self.lp.run_until_complete(exec_test())
 
+    @patch('sakia.core.Community')
+    @patch('sakia.core.Application')
+    @patch('time.time', Mock(return_value=50000))
+    def test_explore_graph_changed_throttled(self, app, community):
+        community.parameters = CoroutineMock(return_value = {'sigValidity': 1000})
+        community.network.confirmations = Mock(side_effect=lambda n: 4 if 996 else None)
+        community.nb_members = CoroutineMock(return_value = 3)
+        app.preferences = {'expert_mode': True}
+
+        explorer_graph = ExplorerGraph(app, community)
+        changes = []
+        explorer_graph.graph_changed.connect(lambda: changes.append(True))
+
+        async def exec_test():
+            await explorer_graph._explore(self.idA, 5)
+            # the graph changes are signaled when the exploration starts and ends
+            self.assertEqual(len(changes), 2)
+            self.assertEqual(self.idC.unique_valid_certified_by.call_count, 1)
+
+        self.lp.run_until_complete(exec_test())
+
     @patch('sakia.core.Community')
     @patch('sakia.core.Application')
     @patch('time.time', Mock(return_value=50000))
@@ -109,12 +109,15 @@ class TestWotGraph(unittest.TestCase, QuamashTest):
         identity_unknown = Mock(specs='core.registry.Identity')
         identity_unknown.pubkey = "8Fi1VSTbjkXguwThF4v2ZxC5whK7pwG2vcGTkPUPjPGU"
         identity_unknown.uid = "unkwn"
+        identity_unknown.unique_valid_certifiers_of = CoroutineMock(spec='core.registry.Identity.certifiers_of',
+                                                                    return_value=[])
 
         async def exec_test():
             result = await wot_graph.explore_to_find_member(self.account_identity, identity_unknown)
             self.assertFalse(result)
-            self.assertEqual(len(wot_graph.nx_graph.nodes()), 3)
-            self.assertEqual(len(wot_graph.nx_graph.edges()), 2)
+            # the search stops as soon as the unknown identity has no certifiers
+            self.assertEqual(len(wot_graph.nx_graph.nodes()), 2)
+            self.assertEqual(len(wot_graph.nx_graph.edges()), 1)
 
         self.lp.run_until_complete(exec_test())
 
@@ -140,6 +143,26 @@ class TestWotGraph(unittest.TestCase, QuamashTest):
 
         self.lp.run_until_complete(exec_test())
 
+    @patch('sakia.core.Community')
+    @patch('sakia.core.Application')
+    @patch('time.time', Mock(return_value=50000))
+    def test_explore_to_find_member_depth(self, app, community):
+        community.parameters = CoroutineMock(return_value = {'sigValidity': 1000})
+        community.network.confirmations = Mock(side_effect=lambda n: 4 if 996 else None)
+        app.preferences = {'expert_mode': True}
+
+        wot_graph = WoTGraph(app, community)
+
+        async def exec_test():
+            result = await wot_graph.explore_to_find_member(self.account_identity, self.idC, max_depth=1)
+            self.assertFalse(result)
+            result = await wot_graph.explore_to_find_member(self.account_identity, self.idC, max_depth=2)
+            self.assertTrue(result)
+            # the searches from both identities met at B
+            self.assertEqual(self.idB.unique_valid_certified_by.call_count, 0)
+
+        self.lp.run_until_complete(exec_test())
+
     @patch('sakia.core.Community')
     @patch('sakia.core.Application')
     @patch('time.time', Mock(return_value=50000))
@@ -0,0 +1,30 @@
+import unittest
+from asynctest.mock import patch
+from PyQt5.QtCore import QLocale
+from sakia.tests import QuamashTest
+from sakia.tests.mocks.dividends import mock_dividends, diff_localized_one_by_one, AMOUNTS, BLOCK_NUMBERS
+from sakia.core.money import DividendPerDay
+
+
+class TestDividendPerDay(unittest.TestCase, QuamashTest):
+    def setUp(self):
+        self.setUpQuamash()
+        QLocale.setDefault(QLocale("en_GB"))
+
+    def tearDown(self):
+        self.tearDownQuamash()
+
+    @patch('sakia.core.Community')
+    @patch('sakia.core.Application')
+    def test_diff_localized_many(self, app, community):
+        mock_dividends(community)
+        app.preferences = {
+            'digits_after_comma': 6,
+            'forgetfulness': True
+        }
+        async def exec_test():
+            values = await DividendPerDay.diff_localized_many(AMOUNTS, BLOCK_NUMBERS, community, app,
+                                                              units=True, international_system=True)
+            # the batch gives the same values as the amounts localized one by one
+            self.assertEqual(values, await diff_localized_one_by_one(DividendPerDay, community, app))
+        self.lp.run_until_complete(exec_test())
@@ -2,6 +2,7 @@ import unittest
 from asynctest.mock import Mock, CoroutineMock, patch, PropertyMock
 from PyQt5.QtCore import QLocale
 from sakia.tests import QuamashTest
+from sakia.tests.mocks.dividends import mock_dividends, diff_localized_one_by_one, AMOUNTS, BLOCK_NUMBERS
 from sakia.core.money import Relative
 
 
@@ -157,4 +158,19 @@ class TestRelative(unittest.TestCase, QuamashTest):
         async def exec_test():
             value = await referential.diff_localized(units=False, international_system=True)
             self.assertEqual(value, "1.011000 mUD ")
-        self.lp.run_until_complete(exec_test())
\ No newline at end of file
+        self.lp.run_until_complete(exec_test())
+
+    @patch('sakia.core.Community')
+    @patch('sakia.core.Application')
+    def test_diff_localized_many(self, app, community):
+        mock_dividends(community)
+        app.preferences = {
+            'digits_after_comma': 6,
+            'forgetfulness': True
+        }
+        async def exec_test():
+            values = await Relative.diff_localized_many(AMOUNTS, BLOCK_NUMBERS, community, app,
+                                                        units=True, international_system=True)
+            # the batch gives the same values as the amounts localized one by one
+            self.assertEqual(values, await diff_localized_one_by_one(Relative, community, app))
+        self.lp.run_until_complete(exec_test())
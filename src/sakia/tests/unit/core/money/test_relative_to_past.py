@@ -2,6 +2,7 @@ import unittest
 from asynctest.mock import Mock, CoroutineMock, patch, PropertyMock
 from PyQt5.QtCore import QLocale, QDateTime
 from sakia.tests import QuamashTest
+from sakia.tests.mocks.dividends import mock_dividends, diff_localized_one_by_one, AMOUNTS, BLOCK_NUMBERS
 from sakia.core.money.relative_to_past import RelativeToPast
 
 
@@ -190,3 +191,32 @@ class TestRelativeToPast(unittest.TestCase, QuamashTest):
                             QLocale.dateFormat(QLocale(), QLocale.ShortFormat)
                         )))
         self.lp.run_until_complete(exec_test())
+
+    @patch('sakia.core.Community')
+    @patch('sakia.core.Application')
+    def test_diff_localized_many(self, app, community):
+        community.ud_blocks = CoroutineMock(return_value={100: {'dividend': 1000, 'medianTime': 1452663088792},
+                                                          300: {'dividend': 2000, 'medianTime': 1452663088792}})
+        community.block_dividend = lambda block: block['dividend']
+        app.preferences = {
+            'digits_after_comma': 6
+        }
+        async def exec_test():
+            values = await RelativeToPast.diff_localized_many([1011, 1011, 4000], [100, 100, 300], community, app)
+            self.assertEqual(values, ["1.011000", "1.011000", "2.000000"])
+        self.lp.run_until_complete(exec_test())
+        community.ud_blocks.assert_called_once_with([100, 100, 300])
+
+    @patch('sakia.core.Community')
+    @patch('sakia.core.Application')
+    def test_diff_localized_many_one_by_one(self, app, community):
+        mock_dividends(community)
+        app.preferences = {
+            'digits_after_comma': 6
+        }
+        async def exec_test():
+            values = await RelativeToPast.diff_localized_many(AMOUNTS, BLOCK_NUMBERS, community, app,
+                                                              units=True, international_system=True)
+            # the batch gives the same values as the amounts localized one by one
+            self.assertEqual(values, await diff_localized_one_by_one(RelativeToPast, community, app))
+        self.lp.run_until_complete(exec_test())
@@ -0,0 +1,50 @@
+import unittest
+from asynctest.mock import CoroutineMock, patch
+from PyQt5.QtCore import QLocale
+from sakia.tests import QuamashTest
+from sakia.tests.mocks.dividends import mock_dividends, diff_localized_one_by_one, AMOUNTS, BLOCK_NUMBERS
+from sakia.core.money.udd_to_past import UDDToPast
+from sakia.tools.exceptions import NoPeerAvailable
+
+
+class TestUDDToPast(unittest.TestCase, QuamashTest):
+    def setUp(self):
+        self.setUpQuamash()
+        QLocale.setDefault(QLocale("en_GB"))
+
+    def tearDown(self):
+        self.tearDownQuamash()
+
+    @patch('sakia.core.Community')
+    @patch('sakia.core.Application')
+    def test_diff_localized_many(self, app, community):
+        mock_dividends(community)
+        app.preferences = {
+            'digits_after_comma': 6,
+            'forgetfulness': False
+        }
+        async def exec_test():
+            values = await UDDToPast.diff_localized_many(AMOUNTS, BLOCK_NUMBERS, community, app,
+                                                         units=True, international_system=True)
+            # the batch gives the same values as the amounts localized one by one
+            self.assertEqual(values, await diff_localized_one_by_one(UDDToPast, community, app))
+        self.lp.run_until_complete(exec_test())
+
+    @patch('sakia.core.Community')
+    @patch('sakia.core.Application')
+    def test_diff_localized_many_unknown_time(self, app, community):
+        mock_dividends(community)
+        community.get_block = CoroutineMock(side_effect=NoPeerAvailable("test_currency", 0))
+        # the times which could not be requested are 0
+        community.times = CoroutineMock(side_effect=lambda numbers: {n: 0 for n in numbers})
+        app.preferences = {
+            'digits_after_comma': 6,
+            'forgetfulness': False
+        }
+        async def exec_test():
+            with self.assertRaises(NoPeerAvailable):
+                await UDDToPast(1011, community, app, 100).diff_localized(units=True, international_system=True)
+            with self.assertRaises(NoPeerAvailable):
+                await UDDToPast.diff_localized_many(AMOUNTS, BLOCK_NUMBERS, community, app,
+                                                    units=True, international_system=True)
+        self.lp.run_until_complete(exec_test())
@@ -74,6 +74,26 @@ class TestAccount(unittest.TestCase, QuamashTest):
         self.assertEqual(account.contacts[0]["pubkey"], "FFFcSms8jzwngtVomTTnzudZx7SHUQY8sVE1y8yBmULk")
         self.assertTrue(called)
 
+    def test_stop_coroutines_closing(self):
+        session = Mock()
+        session.close = CoroutineMock()
+        communities = [Mock(), Mock()]
+        for community in communities:
+            community.stop_coroutines = CoroutineMock()
+        account = Account("test_salt", "HnFcSms8jzwngtVomTTnzudZx7SHUQY8sVE1y8yBmULk",
+                          "test_uid", communities, [], [], self.identities_registry, session)
+
+        async def exec_test():
+            await account.stop_coroutines()
+            self.assertEqual(session.close.call_count, 0)
+            await account.stop_coroutines(closing=True)
+            # the session shared by the communities is closed once
+            self.assertEqual(session.close.call_count, 1)
+            for community in communities:
+                community.stop_coroutines.assert_called_with(True)
+
+        self.lp.run_until_complete(exec_test())
+
     def test_send_membership(self):
         account = Account("test_salt", "H8uYXvyF6GWeCr8cwFJ6V5B8tNprwRdjepFNJBqivrzr",
                           "test_account", [], [], [],
@@ -26,3 +26,32 @@ class TestApplication(unittest.TestCase, QuamashTest):
             asyncio.sleep(5)
 
         self.lp.run_until_complete(exec_test())
+
+    @patch('sakia.core.registry.IdentitiesRegistry')
+    def test_change_current_account_lazy(self, identities_registry):
+        app = Application(self.qapplication, self.lp, identities_registry)
+        community1 = Mock()
+        community2 = Mock()
+        account = Mock()
+        account.communities = [community1, community2]
+        account.wallets = [Mock()]
+        app._unloaded_caches[account] = set(account.communities)
+        app.load_community_cache = Mock()
+        app.load_wallet_cache = Mock()
+        changed = []
+        app.account_changed.connect(lambda: changed.append(app.current_account))
+
+        async def exec_test():
+            await app.change_current_account(account)
+            # the account is displayed before its caches are loaded
+            self.assertEqual(changed, [account])
+            self.assertFalse(account.start_coroutines.called)
+            # the cache of a community is loaded when it is used first
+            app.require_community_cache(account, community2)
+            app.load_community_cache.assert_called_once_with(account, community2)
+            await app._cache_loading
+            self.assertEqual(app.load_community_cache.call_count, 2)
+            app.load_wallet_cache.assert_called_once_with(account, account.wallets[0])
+            account.start_coroutines.assert_called_once_with()
+
+        self.lp.run_until_complete(exec_test())
@@ -0,0 +1,113 @@
+import unittest
+import os
+import tempfile
+import shutil
+from sakia.core.net.api.bma.blocks_store import BlocksStore
+
+
+def block(number, block_hash):
+    return {'number': number, 'hash': block_hash, 'raw': "", 'signature': ""}
+
+
+class TestBlocksStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, '__cache__', 'test_currency_blocks')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_add_get_block(self):
+        store = BlocksStore.open(self.path)
+        store.add(block(0, "A0"))
+        store.add(block(1, "A1"))
+        self.assertEqual(store.get(1)['hash'], "A1")
+        self.assertEqual(store.number("A0"), 0)
+        self.assertEqual(store.block_hash(1), "A1")
+        self.assertIsNone(store.get(2))
+        store.close()
+
+    def test_decoded_blocks_kept(self):
+        store = BlocksStore.open(self.path)
+        store.add(block(0, "A0"))
+        first = store.get(0)
+        # the decoded block is kept in memory instead of being read again
+        self.assertIs(store.get(0), first)
+        store.add(block(0, "B0"))
+        self.assertEqual(store.get(0)['hash'], "B0")
+        store.close()
+
+    def test_reload_store(self):
+        store = BlocksStore.open(self.path)
+        for i in range(10):
+            store.add(block(i, "A{0}".format(i)))
+        store.close()
+        store = BlocksStore.open(self.path)
+        self.assertEqual(len(store), 10)
+        self.assertEqual(store.get(5)['hash'], "A5")
+        store.close()
+
+    def test_invalidate_suffix(self):
+        store = BlocksStore.open(self.path)
+        for i in range(10):
+            store.add(block(i, "A{0}".format(i)))
+        store.invalidate_from(7)
+        self.assertEqual(len(store), 7)
+        self.assertTrue(store.is_forked("A8"))
+        self.assertFalse(store.is_forked("A6"))
+        store.add(block(7, "B7"))
+        store.close()
+
+        store = BlocksStore.open(self.path)
+        self.assertEqual(len(store), 8)
+        self.assertEqual(store.get(7)['hash'], "B7")
+        self.assertTrue(store.is_forked("A7"))
+        store.close()
+
+    def test_invalidate_unordered(self):
+        store = BlocksStore.open(self.path)
+        for i in (5, 2, 8, 3):
+            store.add(block(i, "A{0}".format(i)))
+        store.invalidate_from(4)
+        self.assertEqual([n for n in range(10) if n in store], [2, 3])
+        self.assertTrue(store.is_forked("A8"))
+        store.add(block(6, "B6"))
+        self.assertEqual(store.get(6)['hash'], "B6")
+        store.close()
+
+    def test_fork_on_add(self):
+        store = BlocksStore.open(self.path)
+        for i in range(5):
+            store.add(block(i, "A{0}".format(i)))
+        store.add(block(3, "B3"))
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.get(3)['hash'], "B3")
+        self.assertIsNone(store.get(4))
+        store.close()
+
+    def test_truncated_store(self):
+        store = BlocksStore.open(self.path)
+        store.add(block(0, "A0"))
+        store.add(block(1, "A1"))
+        store.close()
+        with open(self.path, 'ab') as store_file:
+            store_file.write(b'2 A2 {"number":')
+        store = BlocksStore.open(self.path)
+        self.assertEqual(len(store), 2)
+        store.add(block(2, "A2"))
+        self.assertEqual(store.get(2)['hash'], "A2")
+        store.close()
+
+    def test_compact(self):
+        store = BlocksStore.open(self.path)
+        for i in range(10):
+            store.add(block(i, "A{0}".format(i)))
+        store.invalidate_from(2)
+        store.flush()
+        size = os.path.getsize(self.path)
+        store.compact()
+        self.assertLess(os.path.getsize(self.path), size)
+        self.assertEqual(store.get(1)['hash'], "A1")
+        store.add(block(2, "B2"))
+        self.assertEqual(store.get(2)['hash'], "B2")
+        store.close()
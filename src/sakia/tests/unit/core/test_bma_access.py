@@ -1,4 +1,8 @@
 import unittest
+import asyncio
+import os
+import shutil
+import tempfile
 from unittest.mock import Mock
 import time
 from PyQt5.QtCore import QLocale
@@ -9,6 +13,7 @@ from sakia.tests import QuamashTest
 from sakia.core import Application, Community
 from sakia.core.net import Network, Node
 from duniterpy.documents.peer import Peer
+from duniterpy.api import bma
 from sakia.core.net.api.bma.access import BmaAccess
 
 
@@ -45,5 +50,95 @@ BASIC_MERKLED_API duniter.inso.ovh 80
         res = self.bma_access._compare_json({}, corrupted.bma_null_data)
         self.assertFalse(res)
 
+    def test_future_request_coalescing(self):
+        request = Mock()
+
+        async def get(*args, **kwargs):
+            await asyncio.sleep(0.1)
+            return {'currency': "test_currency"}
+
+        request.return_value.get = get
+
+        async def exec_test():
+            replies = await asyncio.gather(*[self.bma_access.future_request(request) for i in range(10)])
+            for reply in replies:
+                self.assertEqual(reply['currency'], "test_currency")
+
+        self.lp.run_until_complete(exec_test())
+        self.assertEqual(self.bma_access.stats['sent'], 1)
+        self.assertEqual(self.bma_access.stats['coalesced'], 9)
+
+    def test_fork_point(self):
+        directory = tempfile.mkdtemp()
+        self.bma_access.open_blocks_store(os.path.join(directory, "test_currency_blocks"))
+        for i in range(100):
+            self.bma_access.blocks_store.add({'number': i, 'hash': "A{0}".format(i)})
+        network = Mock()
+        network.current_blockUID.number = 99
+        network.synced_nodes = [self.node]
+        self.bma_access._network = network
+        self.bma_access.rollback()
+        requested = []
+
+        async def request_nodes(request, req_args, get_args, nodes):
+            number = req_args['number']
+            requested.append(number)
+            block_hash = "A{0}".format(number) if number < 97 else "B{0}".format(number)
+            block = {'number': number, 'hash': block_hash}
+            self.bma_access._update_cache(request, req_args, get_args, block)
+            return block
+
+        self.bma_access._request_nodes = request_nodes
+
+        async def exec_test():
+            fork_point = await self.bma_access.fork_point()
+            self.assertEqual(fork_point, 97)
+
+        self.lp.run_until_complete(exec_test())
+        self.assertLessEqual(len(requested), 7)
+        self.assertIn(96, self.bma_access.blocks_store)
+        self.assertNotIn(97, self.bma_access.blocks_store)
+        self.assertEqual(self.bma_access._get_from_cache(bma.blockchain.Block, {'number': 96}, {})[0], False)
+        self.bma_access.close_blocks_store()
+        shutil.rmtree(directory)
+
+    def test_hedged_request(self):
+        slow_node = Mock()
+        slow_node.pubkey = "slow"
+        fast_node = Mock()
+        fast_node.pubkey = "fast"
+        network = Mock()
+        network.synced_nodes = [slow_node, fast_node]
+        self.bma_access._network = network
+        self.bma_access.health.choose = lambda nodes, tried: [n for n in nodes if n not in tried][0]
+        self.bma_access.health.hedge_delay = lambda: 0.1
+        cancelled = []
+
+        def request(conn_handler):
+            req = Mock()
+
+            async def get(*args, **kwargs):
+                if conn_handler is slow_node.endpoint.conn_handler.return_value:
+                    try:
+                        await asyncio.sleep(10)
+                    except asyncio.CancelledError:
+                        cancelled.append(slow_node)
+                        raise
+                return {'currency': "test_currency"}
+
+            req.get = get
+            return req
+
+        async def exec_test():
+            start = time.time()
+            reply = await self.bma_access.simple_request(request, hedged=True)
+            self.assertEqual(reply['currency'], "test_currency")
+            self.assertLess(time.time() - start, 1)
+            await asyncio.sleep(0)
+
+        self.lp.run_until_complete(exec_test())
+        self.assertEqual(self.bma_access.stats['hedged'], 1)
+        self.assertEqual(cancelled, [slow_node])
+
     def test_filter_nodes(self):
         pass#TODO
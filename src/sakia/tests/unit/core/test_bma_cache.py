@@ -0,0 +1,116 @@
+import unittest
+import json
+import copy
+import os
+import shutil
+import tempfile
+import time
+from duniterpy.api import bma
+from sakia.core.net.api.bma.cache import BmaCache, freeze
+from sakia.core.net.api.bma.cache_store import CacheStore
+
+
+class TestBmaCache(unittest.TestCase):
+    def test_gen_key_is_canonical(self):
+        key_1 = BmaCache.gen_key(bma.wot.Lookup, {'search': "john", 'other': 1}, {})
+        key_2 = BmaCache.gen_key(bma.wot.Lookup, {'other': 1, 'search': "john"}, {})
+        self.assertEqual(key_1, key_2)
+        self.assertNotEqual(key_1, BmaCache.gen_key(bma.wot.Lookup, {'search': "doe", 'other': 1}, {}))
+
+    def test_lru_eviction(self):
+        cache = BmaCache(max_entries=3)
+        keys = [BmaCache.gen_key(bma.blockchain.Block, {'number': i}, {}) for i in range(4)]
+        for k in keys[:3]:
+            cache.put(k, {'number': k[1][0][1]}, {})
+        # touch the oldest entry so that the second one gets evicted
+        cache.get(keys[0])
+        cache.put(keys[3], {'number': 3}, {})
+        self.assertEqual(len(cache), 3)
+        self.assertIn(keys[0], cache)
+        self.assertNotIn(keys[1], cache)
+
+    def test_size_eviction(self):
+        cache = BmaCache(max_size=4096)
+        for i in range(100):
+            cache.put(BmaCache.gen_key(bma.blockchain.Block, {'number': i}, {}), {'raw': "a" * 100}, {})
+        self.assertLessEqual(cache.size, 4096)
+        self.assertIn(BmaCache.gen_key(bma.blockchain.Block, {'number': 99}, {}), cache)
+
+    def test_ttl_expiration(self):
+        cache = BmaCache(ttl_policies={str(bma.wot.Lookup): 10})
+        lookup_key = BmaCache.gen_key(bma.wot.Lookup, {'search': "john"}, {})
+        block_key = BmaCache.gen_key(bma.blockchain.Block, {'number': 1}, {})
+        cache.put(lookup_key, {'results': []}, {'time': time.time() - 20})
+        cache.put(block_key, {'number': 1}, {'time': 0})
+        self.assertIsNone(cache.get(lookup_key))
+        self.assertIsNotNone(cache.get(block_key))
+
+    def test_frozen_values(self):
+        cache = BmaCache()
+        key = BmaCache.gen_key(bma.ud.History, {'pubkey': "7Aqw"}, {})
+        cache.put(key, {'history': {'history': [{'block_number': 1}]}}, {})
+        value = cache.get(key)['value']
+        with self.assertRaises(TypeError):
+            value['history'] = {}
+        with self.assertRaises(TypeError):
+            value['history']['history'].append({})
+        with self.assertRaises(TypeError):
+            value['history']['history'][0]['id'] = 0
+        mutable = [d.copy() for d in value['history']['history']]
+        mutable[0]['id'] = 0
+        self.assertEqual(copy.deepcopy(value), {'history': {'history': [{'block_number': 1}]}})
+
+    def test_invalidate(self):
+        cache = BmaCache()
+        cache.put(BmaCache.gen_key(bma.wot.Lookup, {'search': "john"}, {}), {}, {})
+        cache.put(BmaCache.gen_key(bma.blockchain.Block, {'number': 1}, {}), {}, {})
+        cache.invalidate(bma.wot.Lookup)
+        self.assertEqual(len(cache), 1)
+
+    def test_load_save_cache(self):
+        cache = BmaCache()
+        key = BmaCache.gen_key(bma.blockchain.Block, {'number': 1}, {})
+        cache.put(key, freeze({'number': 1, 'transactions': []}), {'block_hash': "ABCD"})
+        json_data = json.loads(json.dumps(cache.jsonify()))
+        cache_from_json = BmaCache()
+        cache_from_json.load_json(json_data)
+        self.assertEqual(cache_from_json.get(key)['value'], {'number': 1, 'transactions': []})
+        self.assertEqual(cache_from_json.get(key)['metadata']['block_hash'], "ABCD")
+
+    def test_cache_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "test_cache")
+        lookup_key = BmaCache.gen_key(bma.wot.Lookup, {'search': "john"}, {})
+        block_key = BmaCache.gen_key(bma.blockchain.Block, {'number': 1}, {})
+        ud_key = BmaCache.gen_key(bma.ud.History, {'pubkey': "7Aqw"}, {})
+
+        store = CacheStore.open(path)
+        cache = BmaCache(max_entries=2)
+        cache.attach_store(store)
+        cache.put(lookup_key, {'results': []}, {})
+        cache.put(block_key, {'number': 1}, {'block_hash': "ABCD"})
+        # the lookup is evicted from memory and written to the store
+        cache.put(ud_key, {'history': {'history': []}}, {})
+        self.assertEqual(len(store), 1)
+        self.assertEqual(cache.dirty, 2)
+        cache.flush()
+        store.commit()
+        self.assertEqual(cache.dirty, 0)
+        self.assertEqual(len(store), 3)
+        cache.remove(ud_key)
+        cache.flush()
+        store.close()
+
+        store = CacheStore.open(path)
+        cache = BmaCache()
+        cache.attach_store(store)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get(block_key)['metadata']['block_hash'], "ABCD")
+        self.assertEqual(cache.get(lookup_key)['value'], {'results': []})
+        self.assertIsNone(cache.get(ud_key))
+        self.assertEqual(len(cache), 2)
+        cache.invalidate(bma.wot.Lookup)
+        self.assertIsNone(cache.get(lookup_key))
+        self.assertEqual(len(store), 1)
+        store.close()
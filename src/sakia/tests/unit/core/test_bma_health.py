@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import Mock
+from sakia.core.net.api.bma.health import NodesHealth, DEFAULT_LATENCY
+
+
+class TestNodesHealth(unittest.TestCase):
+    def mock_node(self, pubkey):
+        node = Mock()
+        node.pubkey = pubkey
+        return node
+
+    def test_record(self):
+        health = NodesHealth()
+        node = self.mock_node("pubkey0")
+        node_health = health.get(node)
+        self.assertEqual(node_health.score, DEFAULT_LATENCY)
+        node_health.record_success(0.2)
+        node_health.record_success(0.4)
+        self.assertAlmostEqual(node_health.latency, 0.26)
+        self.assertIsNotNone(node_health.last_success)
+        node_health.record_failure()
+        self.assertGreater(node_health.error_rate, 0)
+        self.assertGreater(node_health.score, node_health.latency)
+        self.assertIs(health.get(node), node_health)
+
+    def test_choose_healthy_nodes(self):
+        health = NodesHealth()
+        fast = self.mock_node("fast")
+        slow = self.mock_node("slow")
+        failing = self.mock_node("failing")
+        health.get(fast).record_success(0.1)
+        health.get(slow).record_success(2)
+        health.get(failing).record_success(0.1)
+        health.get(failing).record_failure()
+        for i in range(20):
+            self.assertIs(health.choose([fast, slow]), fast)
+            self.assertIs(health.choose([fast, failing]), fast)
+        self.assertIs(health.choose([fast, slow], tried=[fast]), slow)
+        self.assertIs(health.choose([fast], tried=[fast]), fast)
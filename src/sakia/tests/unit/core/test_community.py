@@ -1,10 +1,15 @@
 import unittest
+import asyncio
 from unittest.mock import Mock
+from asynctest import CoroutineMock
 from pkg_resources import parse_version
 from PyQt5.QtCore import QLocale
+from duniterpy.api import bma
 from sakia.core.net.api.bma.access import BmaAccess
 from sakia.core.net.network import Network
 from sakia.core import Community
+from sakia.core.dividends import DividendsSeries
+from sakia.tools.exceptions import NoPeerAvailable
 from sakia.tests import QuamashTest
 
 
@@ -27,3 +32,128 @@ class TestCommunity(unittest.TestCase, QuamashTest):
         self.assertEqual(len(community.network._nodes), len(community_from_json.network._nodes))
         community_from_json.network.session.close()
 
+
+    def test_blocks_times(self):
+        network = Mock()
+        bma_access = Mock()
+        bma_access.future_request = CoroutineMock(side_effect=lambda request, req_args:
+                                                  {'medianTime': req_args['number'] * 10})
+        community = Community("test_currency", network, bma_access)
+
+        async def exec_test():
+            times = await community.times([1, 2, 1, 3])
+            self.assertEqual(times, {1: 10, 2: 20, 3: 30})
+            self.assertEqual(bma_access.future_request.call_count, 3)
+            # known blocks times are not requested again
+            times = await community.times([2, 3])
+            self.assertEqual(times, {2: 20, 3: 30})
+            self.assertEqual(await community.time(1), 10)
+            self.assertEqual(bma_access.future_request.call_count, 3)
+
+        self.lp.run_until_complete(exec_test())
+
+    def test_search_with_non_members(self):
+        async def future_request(request, req_args={}, get_args={}, hedged=False):
+            if request is bma.wot.Members:
+                return {'results': [{'pubkey': "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ", 'uid': "alice"}]}
+            elif request is bma.wot.Lookup:
+                return {'results': [{'pubkey': "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ",
+                                     'uids': [{'uid': "alice"}]},
+                                    {'pubkey': "FADxcH5LmXGmGFgdixSes6nWnC4Vb4pRUBYT81zQRhjn",
+                                     'uids': [{'uid': "alice2"}]}]}
+
+        network = Mock()
+        network.current_blockUID.number = 10
+        bma_access = Mock()
+        bma_access.future_request = CoroutineMock(side_effect=future_request)
+        community = Community("test_currency", network, bma_access)
+
+        async def exec_test():
+            members = await community.search_members("alice")
+            self.assertEqual(members, [("7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ", "alice")])
+            # the pending identity is found next to the member
+            non_members = await community.lookup_non_members("alice")
+            self.assertEqual([r['uids'][0]['uid'] for r in non_members], ["alice2"])
+
+        self.lp.run_until_complete(exec_test())
+
+    def test_lookup_no_peer(self):
+        network = Mock()
+        bma_access = Mock()
+        bma_access.future_request = CoroutineMock(side_effect=NoPeerAvailable("test_currency", 0))
+        community = Community("test_currency", network, bma_access)
+
+        async def exec_test():
+            # the searches do not show an empty list when the network does not answer
+            with self.assertRaises(NoPeerAvailable):
+                await community.lookup_non_members("alice")
+
+        self.lp.run_until_complete(exec_test())
+
+    def test_dividends_series(self):
+        def ud_block(number):
+            return {'number': number, 'medianTime': number * 10, 'dividend': number, 'unitbase': 0,
+                    'monetaryMass': number * 100, 'membersCount': 5}
+
+        async def future_request(request, req_args={}, get_args={}):
+            if request is bma.blockchain.UD:
+                return {'result': {'blocks': [10, 20, 30]}}
+            else:
+                return ud_block(req_args['number'])
+
+        network = Mock()
+        network.current_blockUID.number = 39
+        bma_access = Mock()
+        bma_access.future_request = CoroutineMock(side_effect=future_request)
+        community = Community("test_currency", network, bma_access)
+
+        async def exec_test():
+            self.assertEqual((await community.get_ud_block())['number'], 30)
+            self.assertEqual((await community.get_ud_block(block_number=25))['number'], 20)
+            self.assertEqual((await community.get_ud_block(x=1, block_number=25))['number'], 10)
+            self.assertIsNone(await community.get_ud_block(block_number=5))
+            self.assertEqual(await community.dividend(15), 10)
+            # the series is requested once
+            self.assertEqual(bma_access.future_request.call_count, 4)
+
+            # then updated from the new blocks
+            community.handle_new_block(40)
+            await asyncio.sleep(0)
+            self.assertEqual((await community.get_ud_block())['number'], 40)
+            self.assertEqual(bma_access.future_request.call_count, 5)
+
+            json_data = community.dividends.jsonify()
+            series = DividendsSeries()
+            series.load_json(json_data)
+            self.assertEqual(series.numbers, [10, 20, 30, 40])
+            self.assertEqual(series.block(), ud_block(40))
+
+        self.lp.run_until_complete(exec_test())
+
+    def test_dividend_block_pending(self):
+        def ud_block(number):
+            return {'number': number, 'medianTime': number * 10, 'dividend': number, 'unitbase': 0,
+                    'monetaryMass': number * 100, 'membersCount': 5}
+
+        async def future_request(request, req_args={}, get_args={}):
+            if request is bma.blockchain.UD:
+                return {'result': {'blocks': [10, 20, 30]}}
+            else:
+                await asyncio.sleep(0.1)
+                return ud_block(req_args['number'])
+
+        network = Mock()
+        network.current_blockUID.number = 39
+        bma_access = Mock()
+        bma_access.future_request = CoroutineMock(side_effect=future_request)
+        community = Community("test_currency", network, bma_access)
+
+        async def exec_test():
+            await community.sync_dividends()
+            community.handle_new_block(40)
+            community.handle_new_block(41)
+            # the readers of the new block get its dividend
+            self.assertEqual((await community.get_ud_block())['number'], 41)
+            self.assertEqual((await community.ud_blocks([None, 40]))[40]['number'], 40)
+
+        self.lp.run_until_complete(exec_test())
@@ -0,0 +1,114 @@
+import unittest
+import asyncio
+import aiohttp
+from aiohttp import hdrs
+from unittest.mock import Mock, patch
+from asynctest import CoroutineMock
+from PyQt5.QtCore import QLocale
+from sakia.core.net.connector import PooledConnector
+from sakia.tests import QuamashTest
+
+
+class TestPooledConnector(unittest.TestCase, QuamashTest):
+    def setUp(self):
+        self.setUpQuamash()
+        QLocale.setDefault(QLocale("en_GB"))
+
+    def tearDown(self):
+        self.tearDownQuamash()
+
+    def request(self, host, websocket=False):
+        req = Mock()
+        req.host = host
+        req.port = 80
+        req.ssl = False
+        req.headers = {hdrs.UPGRADE: "websocket"} if websocket else {}
+        req.response = None
+        return req
+
+    def connection(self, req):
+        protocol = Mock()
+        protocol.reader.output = None
+        return Mock(), protocol
+
+    @patch('aiohttp.TCPConnector._create_connection')
+    def test_limit_per_host(self, create_connection):
+        create_connection.side_effect = CoroutineMock(side_effect=self.connection)
+        connector = PooledConnector(limit_per_host=2, max_connections=10, loop=self.lp)
+
+        async def exec_test():
+            first = await connector.connect(self.request("node1"))
+            second = await connector.connect(self.request("node1"))
+            third = asyncio.ensure_future(connector.connect(self.request("node1")))
+            await asyncio.sleep(0)
+            self.assertFalse(third.done())
+            # the other hosts are not limited
+            other = await connector.connect(self.request("node2"))
+            first.release()
+            await asyncio.wait_for(third, 1)
+            # the released connection is reused
+            self.assertEqual(connector.stats, {'created': 3, 'reused': 1, 'idle': 0, 'acquired': 3})
+            for connection in (second, third.result(), other):
+                connection.close()
+
+        self.lp.run_until_complete(exec_test())
+        connector.close()
+
+    @patch('aiohttp.TCPConnector._create_connection')
+    def test_max_connections(self, create_connection):
+        create_connection.side_effect = CoroutineMock(side_effect=self.connection)
+        connector = PooledConnector(limit_per_host=2, max_connections=2, loop=self.lp)
+
+        async def exec_test():
+            first = await connector.connect(self.request("node1"))
+            second = await connector.connect(self.request("node2"))
+            third = asyncio.ensure_future(connector.connect(self.request("node3")))
+            # the websockets are not counted in the total limit
+            websocket = await connector.connect(self.request("node4", websocket=True))
+            await asyncio.sleep(0)
+            self.assertFalse(third.done())
+            first.close()
+            await asyncio.wait_for(third, 1)
+            self.assertEqual(connector.stats, {'created': 4, 'reused': 0, 'idle': 0, 'acquired': 3})
+            for connection in (second, third.result(), websocket):
+                connection.close()
+
+        self.lp.run_until_complete(exec_test())
+        connector.close()
+
+    @patch('aiohttp.TCPConnector._create_connection')
+    def test_release_on_error(self, create_connection):
+        create_connection.side_effect = CoroutineMock(side_effect=OSError(111, "Connection refused"))
+        connector = PooledConnector(limit_per_host=1, max_connections=1, loop=self.lp)
+
+        async def exec_test():
+            for i in range(0, 3):
+                with self.assertRaises(aiohttp.errors.ClientOSError):
+                    await connector.connect(self.request("node1"))
+            # the failed connections do not block the next ones
+            create_connection.side_effect = CoroutineMock(side_effect=self.connection)
+            connection = await asyncio.wait_for(connector.connect(self.request("node1")), 1)
+            self.assertFalse(connection.closed)
+            connection.close()
+
+        self.lp.run_until_complete(exec_test())
+        connector.close()
+
+    @patch('aiohttp.TCPConnector._create_connection')
+    def test_close(self, create_connection):
+        create_connection.side_effect = CoroutineMock(side_effect=self.connection)
+        connector = PooledConnector(limit_per_host=1, max_connections=1, loop=self.lp)
+
+        async def exec_test():
+            connection = await connector.connect(self.request("node1"))
+            websocket = await connector.connect(self.request("node2", websocket=True))
+            connector.close()
+            self.assertTrue(connector.closed)
+            # the connections acquired when closing are released
+            self.assertFalse(connector._connections.locked())
+            self.assertFalse(connector._host_connections[("node1", 80, False)].locked())
+            self.assertFalse(connector._host_connections[("node2", 80, False)].locked())
+            connection.close()
+            websocket.close()
+
+        self.lp.run_until_complete(exec_test())
@@ -5,6 +5,8 @@ import asyncio
 import quamash
 import logging
 from PyQt5.QtCore import QLocale
+from asynctest import CoroutineMock
+from duniterpy.api import bma
 from sakia.core.registry.identities import Identity, IdentitiesRegistry, LocalState, BlockchainState
 from sakia.tests import QuamashTest
 
@@ -35,3 +37,74 @@ class TestIdentity(unittest.TestCase, QuamashTest):
                                                                    community)
         self.assertEqual(identity, identity_from_data)
 
+    def test_find_many(self):
+        community = mock.MagicMock()
+        type(community).currency = mock.PropertyMock(return_value="test_currency")
+
+        async def future_request(request, req_args={}, get_args={}):
+            if request is bma.wot.Members:
+                return {'results': [{'pubkey': "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ", 'uid': "john"},
+                                    {'pubkey': "FADxcH5LmXGmGFgdixSes6nWnC4Vb4pRUBYT81zQRhjn", 'uid': "doe"}]}
+
+        community.bma_access.future_request = CoroutineMock(side_effect=future_request)
+        identities_registry = IdentitiesRegistry({})
+        found = []
+
+        async def future_find(pubkey, community):
+            found.append(pubkey)
+            identities_registry._identities(community)[pubkey] = Identity.empty(pubkey)
+
+        identities_registry.future_find = future_find
+
+        async def exec_test():
+            identities = await identities_registry.find_many(["7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ",
+                                                              "HnFcSms8jzwngtVomTTnzudZx7SHUQY8sVE1y8yBmULk",
+                                                              "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ"],
+                                                             community)
+            self.assertEqual(len(identities), 2)
+            self.assertEqual(identities["7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ"].uid, "john")
+            # only the identity which is not a member is looked up
+            self.assertEqual(found, ["HnFcSms8jzwngtVomTTnzudZx7SHUQY8sVE1y8yBmULk"])
+
+        self.lp.run_until_complete(exec_test())
+
+    def test_future_find_not_found(self):
+        community = mock.MagicMock()
+        type(community).currency = mock.PropertyMock(return_value="test_currency")
+        community.network.current_blockUID.number = 10
+        community.bma_access.simple_request = CoroutineMock(side_effect=asyncio.TimeoutError())
+        identities_registry = IdentitiesRegistry({})
+        pubkey = "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ"
+
+        async def exec_test():
+            identity = await identities_registry.future_find(pubkey, community)
+            self.assertEqual(identity.local_state, LocalState.NOT_FOUND)
+            self.assertEqual(community.bma_access.simple_request.call_count, 3)
+            # the miss is cached
+            await identities_registry.future_find(pubkey, community)
+            self.assertEqual(community.bma_access.simple_request.call_count, 3)
+            # until it expires
+            identities_registry._checks["test_currency"][pubkey] = (0, 10)
+            await identities_registry.future_find(pubkey, community)
+            self.assertEqual(community.bma_access.simple_request.call_count, 6)
+
+        self.lp.run_until_complete(exec_test())
+
+    def test_future_find_unknown_block(self):
+        community = mock.MagicMock()
+        type(community).currency = mock.PropertyMock(return_value="test_currency")
+        community.network.current_blockUID.number = None
+        community.bma_access.simple_request = CoroutineMock()
+        pubkey = "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ"
+        identity = Identity("john", pubkey, None, LocalState.COMPLETED, BlockchainState.VALIDATED)
+        identities_registry = IdentitiesRegistry({"test_currency": {pubkey: identity}})
+        identities_registry._checks["test_currency"] = {pubkey: (0, None)}
+
+        async def exec_test():
+            # the identity is not refreshed while the heights are unknown
+            self.assertEqual(await identities_registry.future_find(pubkey, community), identity)
+            community.network.current_blockUID.number = 500
+            self.assertEqual(await identities_registry.future_find(pubkey, community), identity)
+            self.assertEqual(community.bma_access.simple_request.call_count, 0)
+
+        self.lp.run_until_complete(exec_test())
@@ -46,7 +46,7 @@ class TestIdentity(unittest.TestCase, QuamashTest):
 
         self.community.bma_access.future_request = CoroutineMock(side_effect=bma_access)
         self.identities_registry.from_handled_data = Mock(return_value=id_doe)
-        self.community.time = CoroutineMock(side_effect=block_to_time)
+        self.community.times = CoroutineMock(side_effect=lambda numbers: {n: block_to_time(n) for n in numbers})
         async def exec_test():
             certifiers = await identity.certifiers_of(self.identities_registry, self.community)
 
@@ -125,3 +125,25 @@ class TestIdentity(unittest.TestCase, QuamashTest):
 
         self.lp.run_until_complete(exec_test())
 
+    def test_identity_unique_valid(self):
+        certifier_a = Mock()
+        certifier_a.pubkey = "A"
+        certifier_b = Mock()
+        certifier_b.pubkey = "B"
+        cert_list = [{'identity': certifier_a, 'cert_time': 100, 'block_number': 10},
+                     {'identity': certifier_b, 'cert_time': 110, 'block_number': None},
+                     {'identity': certifier_a, 'cert_time': 120, 'block_number': 12},
+                     {'identity': certifier_b, 'cert_time': 130, 'block_number': None}]
+        # the last pending certification of B is not writable anymore
+        self.community.certifications_validity = CoroutineMock(return_value=[(False, True), (False, True),
+                                                                             (False, False), (False, False)])
+        identity = Identity("john", "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ",
+                            BlockUID(20, "7518C700E78B56CC21FB1DDC6CBAB24E0FACC9A798F5ED8736EA007F38617D67"),
+                            LocalState.COMPLETED, BlockchainState.VALIDATED)
+
+        async def exec_test():
+            unique_valid = await identity._unique_valid(cert_list, self.community)
+            self.assertEqual([c['cert_time'] for c in unique_valid], [120, 110])
+
+        self.lp.run_until_complete(exec_test())
+        self.community.certifications_validity.assert_called_once_with([100, 110, 120, 130])
@@ -0,0 +1,28 @@
+import unittest
+from sakia.core.registry.members_index import MembersIndex
+
+
+class TestMembersIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = MembersIndex()
+        self.index.update([{'pubkey': "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ", 'uid': "john"},
+                           {'pubkey': "FADxcH5LmXGmGFgdixSes6nWnC4Vb4pRUBYT81zQRhjn", 'uid': "doe"},
+                           {'pubkey': "HnFcSms8jzwngtVomTTnzudZx7SHUQY8sVE1y8yBmULk", 'uid': "johnny"}])
+
+    def test_search(self):
+        self.assertEqual([m[1] for m in self.index.search("jo")], ["john", "johnny"])
+        self.assertEqual([m[1] for m in self.index.search("HNNY")], ["johnny"])
+        self.assertEqual(self.index.search("fadxch5"),
+                         [("FADxcH5LmXGmGFgdixSes6nWnC4Vb4pRUBYT81zQRhjn", "doe")])
+        self.assertEqual(self.index.search("oh"), [])
+        self.assertEqual(self.index.search("alice"), [])
+
+    def test_update(self):
+        added, removed = self.index.update([{'pubkey': "7Aqw6Efa9EzE7gtsc8SveLLrM7gm6NEGoywSv4FJx6pZ", 'uid': "john"},
+                                            {'pubkey': "FADxcH5LmXGmGFgdixSes6nWnC4Vb4pRUBYT81zQRhjn", 'uid': "doe"},
+                                            {'pubkey': "2ny7YAdmzReQxAayyJZsyVYwYhVyax2thKcGknmQy5nQ", 'uid': "alice"}])
+        self.assertEqual((added, removed), (1, 1))
+        self.assertEqual(len(self.index), 3)
+        self.assertNotIn("HnFcSms8jzwngtVomTTnzudZx7SHUQY8sVE1y8yBmULk", self.index)
+        self.assertEqual([m[1] for m in self.index.search("john")], ["john"])
+        self.assertEqual([m[1] for m in self.index.search("lic")], ["alice"])
@@ -4,7 +4,7 @@ from unittest.mock import PropertyMock
 from asynctest import Mock, patch
 from duniterpy.documents.block import BlockUID
 from PyQt5.QtCore import QLocale
-from sakia.core.net import Network
+from sakia.core.net import Network, Node
 from sakia.tests import QuamashTest
 
 
@@ -15,3 +15,60 @@ class TestCommunity(unittest.TestCase, QuamashTest):
 
     def tearDown(self):
         self.tearDownQuamash()
+
+    def test_nodes_index(self):
+        nodes = []
+        for i, state in enumerate((Node.ONLINE, Node.DESYNCED, Node.OFFLINE, Node.ONLINE)):
+            node = Mock()
+            node.pubkey = "pubkey{0}".format(i)
+            node.state = state
+            node.block = {'number': 10, 'hash': "ABCD"}
+            nodes.append(node)
+        duplicate = Mock()
+        duplicate.pubkey = "pubkey0"
+        duplicate.state = Node.ONLINE
+        nodes.append(duplicate)
+
+        network = Network("test_currency", nodes, Mock("aiohttp.ClientSession"))
+        self.assertEqual(network.node_by_pubkey("pubkey0"), nodes[0])
+        self.assertIsNone(network.node_by_pubkey("pubkey5"))
+        self.assertEqual(network.synced_nodes, [nodes[0], nodes[3], duplicate])
+        self.assertEqual(network.online_nodes, [nodes[0], nodes[1], nodes[3], duplicate])
+        self.assertEqual(network.nodes_in_state(Node.OFFLINE), [nodes[2]])
+        self.assertEqual(network.current_blockUID, BlockUID(10, "ABCD"))
+
+        network._check_nodes_unique()
+        self.assertEqual(len(network.nodes), 4)
+        self.assertNotIn(duplicate, network.synced_nodes)
+
+    def test_incremental_nodes_sync(self):
+        block_a = {'number': 10, 'hash': "AAAA", 'powMin': 1, 'time': 1}
+        block_b = {'number': 10, 'hash': "BBBB", 'powMin': 1, 'time': 0}
+        nodes = []
+        for i, block in enumerate((block_a, block_a, block_a, block_b, block_b)):
+            node = Mock()
+            node.pubkey = "pubkey{0}".format(i)
+            node.state = Node.ONLINE
+            node.block = block
+            nodes.append(node)
+
+        network = Network("test_currency", nodes, Mock("aiohttp.ClientSession"))
+        network._check_nodes_sync()
+        self.assertEqual([n.state for n in nodes], [Node.ONLINE] * 3 + [Node.DESYNCED] * 2)
+
+        block_c = {'number': 11, 'hash': "CCCC", 'powMin': 1, 'time': 3}
+        nodes[0].block = block_c
+        network._check_nodes_sync(nodes[0])
+        network._invalidate_states()
+        self.assertEqual([n.state for n in nodes], [Node.DESYNCED] + [Node.ONLINE] * 2 + [Node.DESYNCED] * 2)
+        self.assertEqual(network.current_blockUID, BlockUID(10, "AAAA"))
+
+        nodes[1].block = block_b
+        network._check_nodes_sync(nodes[1])
+        network._invalidate_states()
+        self.assertEqual([n.state for n in nodes], [Node.DESYNCED, Node.ONLINE, Node.DESYNCED, Node.ONLINE, Node.ONLINE])
+        self.assertEqual(network.current_blockUID, BlockUID(10, "BBBB"))
+
+        nodes[2].state = Node.OFFLINE
+        network._check_nodes_sync(nodes[2])
+        self.assertEqual(len(network._nodes_by_block), 2)
@@ -0,0 +1,63 @@
+import unittest
+import asyncio
+from unittest.mock import Mock
+from PyQt5.QtCore import QLocale
+from sakia.core.net import Node
+from sakia.core.net.scheduler import RefreshScheduler, MIN_BACKOFF, MAX_BACKOFF, \
+    ONLINE_REFRESH_INTERVAL, REFRESH_INTERVAL
+from sakia.tests import QuamashTest
+
+
+class TestRefreshScheduler(unittest.TestCase, QuamashTest):
+    def setUp(self):
+        self.setUpQuamash()
+        QLocale.setDefault(QLocale("en_GB"))
+
+    def tearDown(self):
+        self.tearDownQuamash()
+
+    def mock_node(self, state):
+        node = Mock()
+        node.state = state
+
+        async def refresh():
+            await asyncio.sleep(0.1)
+
+        node.refresh = lambda: [asyncio.ensure_future(refresh())]
+        return node
+
+    def test_bounded_parallelism(self):
+        scheduler = RefreshScheduler(max_parallel=3)
+        nodes = [self.mock_node(Node.ONLINE) for i in range(10)]
+
+        async def exec_test():
+            scheduler.schedule(nodes)
+            self.assertEqual(scheduler.running, 3)
+            self.assertEqual(scheduler.queue_depth, 7)
+            while scheduler.cycle_latency is None:
+                await asyncio.sleep(0.05)
+                scheduler.schedule(nodes)
+                self.assertLessEqual(scheduler.running, 3)
+            self.assertEqual(scheduler.queue_depth, 0)
+
+        self.lp.run_until_complete(exec_test())
+        self.assertGreater(scheduler.cycle_latency, 0.3)
+
+    def test_backoff(self):
+        scheduler = RefreshScheduler()
+        online = self.mock_node(Node.ONLINE)
+        offline = self.mock_node(Node.OFFLINE)
+        for i in range(10):
+            scheduler._refreshed(online)
+            scheduler._refreshed(offline)
+            if i == 0:
+                self.assertEqual(scheduler.interval(offline), MIN_BACKOFF)
+            elif i == 1:
+                self.assertEqual(scheduler.interval(offline), MIN_BACKOFF * 2)
+        self.assertEqual(scheduler.interval(online), ONLINE_REFRESH_INTERVAL)
+        self.assertEqual(scheduler.interval(self.mock_node(Node.DESYNCED)), REFRESH_INTERVAL)
+        self.assertEqual(scheduler.interval(offline), MAX_BACKOFF)
+        offline.state = Node.ONLINE
+        scheduler._refreshed(offline)
+        offline.state = Node.OFFLINE
+        self.assertEqual(scheduler.interval(offline), MIN_BACKOFF)
@@ -0,0 +1,41 @@
+import unittest
+import asyncio
+from PyQt5.QtCore import QLocale
+from sakia.core.txhistory import BlocksPipeline
+from sakia.tests import QuamashTest
+
+
+class TestBlocksPipeline(unittest.TestCase, QuamashTest):
+    def setUp(self):
+        self.setUpQuamash()
+        QLocale.setDefault(QLocale("en_GB"))
+
+    def tearDown(self):
+        self.tearDownQuamash()
+
+    def test_ranges(self):
+        ranges = BlocksPipeline.ranges([150, 1, 2, 3, 20, 25, 100, 149, 200], chunk=50, gap=10)
+        self.assertEqual(ranges, [(1, 3), (20, 6), (100, 1), (149, 2), (200, 1)])
+
+    def test_ranges_chunk(self):
+        ranges = BlocksPipeline.ranges(range(0, 120), chunk=50, gap=10)
+        self.assertEqual(ranges, [(0, 50), (50, 50), (100, 20)])
+
+    def test_chain_order(self):
+        fetched = []
+
+        async def fetch(start, count):
+            fetched.append(start)
+            # the first ranges are the slowest to answer
+            await asyncio.sleep(0.1 / len(fetched))
+            return {n: "block {0}".format(n) for n in range(start, start + count)}
+
+        async def exec_test():
+            pipeline = BlocksPipeline(fetch, [(0, 2), (10, 1), (20, 3)], max_parallel=2)
+            docs = []
+            for number in (0, 1, 10, 20, 22):
+                docs.append(await pipeline.block_doc(number))
+            self.assertEqual(docs, ["block 0", "block 1", "block 10", "block 20", "block 22"])
+            self.assertEqual(fetched, [0, 10, 20])
+
+        self.lp.run_until_complete(exec_test())
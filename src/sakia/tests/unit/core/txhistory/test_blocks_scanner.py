@@ -0,0 +1,138 @@
+import unittest
+import asyncio
+from unittest.mock import Mock, patch
+from PyQt5.QtCore import QLocale
+from duniterpy.api import errors
+from sakia.core.txhistory import BlocksScanner, TxHistory
+from sakia.tests import QuamashTest
+
+
+class TestBlocksScanner(unittest.TestCase, QuamashTest):
+    def setUp(self):
+        self.setUpQuamash()
+        QLocale.setDefault(QLocale("en_GB"))
+
+    def tearDown(self):
+        self.tearDownQuamash()
+
+    def mock_tx(self, issuer, receiver):
+        tx = Mock()
+        tx.issuers = [issuer]
+        output = Mock()
+        output.conditions.left.pubkey = receiver
+        tx.outputs = [output]
+        return tx
+
+    def mock_community(self, docs, requested):
+        async def future_request(request, req_args={}, get_args={}):
+            return {'result': {'blocks': [2, 6, 200]}}
+
+        async def future_blocks(start, count):
+            requested.append((start, count))
+            return [{'number': n, 'transactions': [{}] if n in docs else [], 'dividend': 100 if n == 5 else None}
+                    for n in range(start, start + count)]
+
+        community = Mock()
+        community.bma_access.future_request = future_request
+        community.bma_access.future_blocks = future_blocks
+        community.bma_access.block_doc = lambda n: docs.get(n)
+        return community
+
+    @patch('sakia.core.txhistory.SimpleTransaction.is_simple', return_value=True)
+    def test_single_pass(self, is_simple):
+        sent = self.mock_tx("A", "C")
+        received = self.mock_tx("C", "B")
+        docs = {2: Mock(transactions=[sent]), 6: Mock(transactions=[received])}
+        requested = []
+        community = self.mock_community(docs, requested)
+
+        async def exec_test():
+            scanner = BlocksScanner(community, ["A", "B"])
+            scanner.register("A", 0, 100)
+            scanner.register("B", 5, 100)
+            self.assertEqual(await scanner.blocks_with_tx(), {2, 6})
+            self.assertIsNone(scanner.dividend_blocks)
+            self.assertEqual(await scanner.block("A", 2), (docs[2], [sent]))
+            self.assertEqual(await scanner.block("B", 6), (docs[6], [received]))
+            self.assertEqual(await scanner.block("A", 6), (docs[6], []))
+            # the blocks are released once read by all the wallets
+            self.assertEqual(len(scanner._blocks), 0)
+
+        self.lp.run_until_complete(exec_test())
+        self.assertEqual(requested, [(2, 5)])
+
+    @patch('sakia.core.txhistory.SimpleTransaction.is_simple', return_value=True)
+    def test_release(self, is_simple):
+        docs = {2: Mock(transactions=[self.mock_tx("A", "C")]), 6: Mock(transactions=[self.mock_tx("C", "B")])}
+        community = self.mock_community(docs, [])
+
+        async def exec_test():
+            scanner = BlocksScanner(community, ["A", "B"])
+            scanner.register("A", 0, 100)
+            scanner.register("B", 0, 100)
+            await scanner.blocks_with_tx()
+            self.assertEqual((await scanner.block("A", 2))[0], docs[2])
+            # the wallet A stops its refresh before reading the block 6
+            scanner.release("A")
+            self.assertEqual(set(scanner._blocks.keys()), {2, 6})
+            self.assertEqual((await scanner.block("B", 2))[0], docs[2])
+            scanner.release("B")
+            self.assertEqual(len(scanner._blocks), 0)
+
+        self.lp.run_until_complete(exec_test())
+
+    @patch('sakia.core.txhistory.SimpleTransaction.is_simple', return_value=True)
+    def test_incremental(self, is_simple):
+        docs = {6: Mock(transactions=[self.mock_tx("C", "A")])}
+        requested = []
+        community = self.mock_community(docs, requested)
+
+        async def exec_test():
+            scanner = BlocksScanner(community, ["A"])
+            scanner.register("A", 3, 10)
+            # the short range is read from the blocks instead of the list of blocks with transactions
+            self.assertEqual(await scanner.blocks_with_tx(), {6})
+            self.assertEqual(scanner.dividend_blocks, {5})
+            self.assertEqual((await scanner.block("A", 6))[0], docs[6])
+
+        self.lp.run_until_complete(exec_test())
+        self.assertEqual(requested[0], (3, 8))
+
+    @patch('sakia.core.txhistory.SimpleTransaction.is_simple', return_value=True)
+    def test_scan_ahead(self, is_simple):
+        docs = {2: Mock(transactions=[self.mock_tx("A", "C")]), 6: Mock(transactions=[self.mock_tx("C", "A")])}
+        community = self.mock_community(docs, [])
+
+        async def exec_test():
+            scanner = BlocksScanner(community, ["A"], max_ahead=1)
+            scanner.register("A", 0, 100)
+            await scanner.blocks_with_tx()
+            for i in range(0, 10):
+                await asyncio.sleep(0)
+            # the scan waits for the wallet to read the block 2
+            self.assertTrue(scanner._blocks[2].done())
+            self.assertFalse(scanner._blocks[6].done())
+            self.assertEqual((await scanner.block("A", 2))[0], docs[2])
+            self.assertEqual((await asyncio.wait_for(scanner.block("A", 6), 1))[0], docs[6])
+
+        self.lp.run_until_complete(exec_test())
+
+    def test_refresh_error(self):
+        community = Mock()
+
+        async def future_request(request, req_args={}, get_args={}):
+            raise errors.DuniterError({'ucode': errors.BLOCK_NOT_FOUND, 'message': "Block not found"})
+
+        community.bma_access.future_request = future_request
+        wallet = Mock()
+        wallet.pubkey = "A"
+        history = TxHistory(Mock(), wallet)
+
+        async def exec_test():
+            scanner = BlocksScanner(community, ["A"])
+            scanner.register("A", 0, 100)
+            await history._refresh(community, 0, {'number': 100}, [], scanner)
+
+        self.lp.run_until_complete(exec_test())
+        # the refresh finishes when the list of the blocks with transactions could not be requested
+        wallet.refresh_finished.emit.assert_called_once_with([])
@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import Mock
+from PyQt5.QtCore import QLocale
+from duniterpy.documents import BlockUID
+from sakia.core.transfer import Transfer, TransferState
+from sakia.core.txhistory import TxHistory
+from sakia.tests import QuamashTest
+
+
+class TestTxHistoryIndexes(unittest.TestCase, QuamashTest):
+    def setUp(self):
+        self.setUpQuamash()
+        QLocale.setDefault(QLocale("en_GB"))
+
+    def tearDown(self):
+        self.tearDownQuamash()
+
+    def metadata(self):
+        return {'receiver': "B", 'time': 0, 'issuer': "A", 'amount': 10, 'comment': "",
+                'issuer_uid': "", 'receiver_uid': "", 'txid': 0}
+
+    def test_transfers_indexes(self):
+        history = TxHistory(None, Mock())
+        validating = Transfer.create_from_blockchain("ABCD", BlockUID(12, "0123"), self.metadata())
+        to_send = Transfer.initiate(self.metadata())
+        history.add_transfer(validating)
+        history.add_transfer(to_send)
+
+        self.assertIs(history.transfer_by_hash("ABCD"), validating)
+        self.assertEqual(history.transfers_in_block(12), [validating])
+        self.assertEqual(history.transfers_in_block(12, TransferState.VALIDATED), [])
+        self.assertEqual(history.transfers_in_state(TransferState.TO_SEND), [to_send])
+
+        # the indexes follow the state transitions
+        to_send.cancel()
+        self.assertEqual(history.transfers_in_state(TransferState.TO_SEND), [])
+        self.assertEqual(history.transfers_in_state(TransferState.DROPPED), [to_send])
+        self.assertEqual(history.transfers, [validating])
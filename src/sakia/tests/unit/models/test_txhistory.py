@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import Mock
+from asynctest import CoroutineMock
+from PyQt5.QtCore import QLocale
+from duniterpy.documents import BlockUID
+from sakia.core.transfer import Transfer
+from sakia.models.txhistory import HistoryTableModel
+from sakia.tools.exceptions import NoPeerAvailable
+from sakia.tests import QuamashTest
+
+
+class TestHistoryTableModel(unittest.TestCase, QuamashTest):
+    def setUp(self):
+        self.setUpQuamash()
+        QLocale.setDefault(QLocale("en_GB"))
+
+    def tearDown(self):
+        self.tearDownQuamash()
+
+    def metadata(self):
+        return {'receiver': "B", 'time': 0, 'issuer': "A", 'amount': 10, 'comment': "",
+                'issuer_uid': "", 'receiver_uid': "", 'txid': 0}
+
+    def test_localized_amounts(self):
+        model = Mock()
+        model.app.preferences = {'international_system_of_units': False}
+        model.account.current_ref.diff_localized_many = CoroutineMock(return_value=["1", "2", "3"])
+        transfers = [Transfer.create_from_blockchain("ABCD", BlockUID(12, "0123"), self.metadata()),
+                     Transfer.initiate(self.metadata()),
+                     {'amount': 5, 'base': 1, 'block_number': 20}]
+
+        async def exec_test():
+            self.assertEqual(await HistoryTableModel.localized_amounts(model, transfers), ["1", "2", "3"])
+            # the transfers which are not in a block are localized without block number
+            model.account.current_ref.diff_localized_many.assert_called_once_with([10, 10, 50], [12, None, 20],
+                                                                                 model.community, model.app,
+                                                                                 international_system=False)
+            # the amounts can not be computed when no peer answers
+            model.account.current_ref.diff_localized_many = CoroutineMock(
+                side_effect=NoPeerAvailable("test_currency", 0))
+            self.assertEqual(await HistoryTableModel.localized_amounts(model, transfers),
+                             ["Could not compute"] * 3)
+
+        self.lp.run_until_complete(exec_test())